@@ -6,25 +6,32 @@
 #   1) 학습(+MAE평가):       python ai-5-4.py --retrain --years 2023,2024 --eval-mae --eval-split 0.2
 #   2) 학습 후 DB로 추론:     python ai-5-4.py --predict --from-db
 #   3) 학습 후 CSV로 추론:    python ai-5-4.py --predict --from-csv data/snapshot_today.csv
+#   4) 변경 그룹만 재학습:    python ai-5-4.py --retrain --incremental
 # 정책/옵션)
 #   --event-prob 0.08  --event-range 0.03 0.08
 #   --allow-negative-in-calc  (계산 단계에서 음수 재고 허용; 기본은 0으로 클립)
 #   --save-meta               (model_meta.json 저장; 기본은 저장 안 함)
 # ====================================================================================
 
-import os, glob, json, argparse, sys, re
+import os, glob, json, argparse, sys, re, hashlib
 from typing import Dict, List, Tuple
 import numpy as np
 import pandas as pd
 from datetime import datetime
-import joblib
+from concurrent.futures import ProcessPoolExecutor
 
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
 
+from services.model_bundle import load_bundle_file, resolve_bundle_path, resolve_group, save_bundle_mmap, save_bundle_pkl
+from services.order_optimizer import optimize_order_top3
+
 MODEL_DIR = "ML_model"
 os.makedirs(MODEL_DIR, exist_ok=True)
+FEATURE_CACHE_DIR = os.path.join(MODEL_DIR, "feature_cache")
+# load_annual_category_data 의 피처/라벨 계산이 바뀌면 올릴 것 (기존 캐시 자동 무효화)
+FEATURE_VERSION = "1"
 
 # ───────────────────────────── 공통 유틸 ─────────────────────────────
 def _print(s=""):
@@ -59,6 +66,14 @@ def _norm_manufacturer(x: str) -> str:
     return str(x).strip()
 
 # ─────────────────────── 데이터 로드/피처 엔지니어링 ───────────────────────
+def _check_sorted_by_part_date(df:pd.DataFrame)->None:
+    """part_id 가 연속 구간이고 구간 안에서 date 가 오름차순인지 확인 (누적합 기반 라벨의 전제, 외부에서 읽은 프레임용)"""
+    pid=df["part_id"].to_numpy()
+    dates=df["date"].to_numpy()
+    same=pid[1:]==pid[:-1]
+    if not df["part_id"].is_monotonic_increasing or (dates[1:][same]<dates[:-1][same]).any():
+        raise ValueError("(part_id, date) 정렬이 깨졌습니다.")
+
 def load_annual_category_data(data_root="data", years=None)->pd.DataFrame:
     years = years or [2023, 2024]
     frames=[]
@@ -74,7 +89,9 @@ def load_annual_category_data(data_root="data", years=None)->pd.DataFrame:
     df=pd.concat(frames,ignore_index=True)
 
     df["date"]=pd.to_datetime(df["date"])
+    # 아래 rolling/shift/누적합 라벨은 모두 part_id 연속 구간 + 날짜 오름차순이라는 전제 (입력 CSV 순서와 무관하게 여기서 보장)
     df.sort_values(["part_id","date"],inplace=True)
+    df.reset_index(drop=True,inplace=True)
 
     # 그대로 사용(Null만 처리)
     if "category" in df.columns:
@@ -84,15 +101,16 @@ def load_annual_category_data(data_root="data", years=None)->pd.DataFrame:
     if "manufacturer" in df.columns:
         df["manufacturer"]=df["manufacturer"].map(_norm_manufacturer)
 
-    # 시계열 피처
+    # 시계열 피처 (part_id,date 정렬 1회 + 그룹 rolling/shift 벡터 연산, 그룹별 파이썬 람다 없음)
     df["dow"]=df["date"].dt.dayofweek
     df["month"]=df["date"].dt.month
-    df["rolling7_used"]=df.groupby("part_id")["used_actual"].transform(lambda s:s.rolling(7,1).mean())
-    df["rolling30_used"]=df.groupby("part_id")["used_actual"].transform(lambda s:s.rolling(30,1).mean())
+    g_used=df.groupby("part_id")["used_actual"]
+    df["rolling7_used"]=g_used.rolling(7,1).mean().droplevel(0)
+    df["rolling30_used"]=g_used.rolling(30,1).mean().droplevel(0)
     for lag in [1,7,30]:
-        df[f"lag{lag}_used"]=df.groupby("part_id")["used_actual"].shift(lag).fillna(0)
-    df["roll7_std_used"]=df.groupby("part_id")["used_actual"].transform(lambda s:s.rolling(7,1).std().fillna(0))
-    df["roll30_std_used"]=df.groupby("part_id")["used_actual"].transform(lambda s:s.rolling(30,1).std().fillna(0))
+        df[f"lag{lag}_used"]=g_used.shift(lag).fillna(0)
+    df["roll7_std_used"]=g_used.rolling(7,1).std().droplevel(0).fillna(0)
+    df["roll30_std_used"]=g_used.rolling(30,1).std().droplevel(0).fillna(0)
 
     # 소진일/위험
     eps=1e-5
@@ -100,21 +118,67 @@ def load_annual_category_data(data_root="data", years=None)->pd.DataFrame:
     df["risk_6m"]=(df["days_to_zero_est"]<=183).astype(int)
     df["risk_12m"]=(df["days_to_zero_est"]<=365).astype(int)
 
-    # 미래 30일 수요(라벨)
-    fut=[]
-    for _,g in df.groupby("part_id"):
-        u=g["used_actual"].to_numpy()
-        n=len(u)
-        fut.extend([u[i+1:i+31].sum() for i in range(n)])
+    # 미래 30일 수요(라벨): 행 i 기준 u[i+1:i+31].sum() → 누적합 차이로 계산 (그룹 끝에서 잘림)
+    df["_row"] = g_used.cumcount().to_numpy()
+    df["_n"]   = g_used.transform("size").to_numpy()
+    u=df["used_actual"].to_numpy()
+    nan=pd.isna(u)
+    csum=np.concatenate([np.zeros(1,dtype=u.dtype), np.cumsum(np.where(nan,0,u) if nan.any() else u)])
+    pos=np.arange(len(df))
+    group_end=pos-df["_row"].to_numpy()+df["_n"].to_numpy()
+    lo, hi = np.minimum(pos+1,group_end), np.minimum(pos+31,group_end)
+    fut=csum[hi]-csum[lo]
+    if nan.any():
+        # 결측이 윈도우에 있으면 기존 슬라이스 합과 같이 NaN (누적합 전체로 번지지 않도록 개수로 판정)
+        ncnt=np.concatenate([[0], np.cumsum(nan)])
+        fut=np.where(ncnt[hi]-ncnt[lo]>0, np.nan, fut)
     df["future_30d_used"]=fut
 
     # horizon 미충족 구간 제거
-    df = df.sort_values(["part_id","date"]).copy()
-    df["_row"] = df.groupby("part_id").cumcount()
-    df["_n"]   = df.groupby("part_id")["part_id"].transform("size")
     df = df[df["_row"] < df["_n"] - 30].drop(columns=["_row","_n"]).reset_index(drop=True)
     return df
 
+def _feature_cache_key(data_root:str, years:List[int])->str:
+    """입력 CSV (경로, mtime, 크기) + 연도 + FEATURE_VERSION 해시"""
+    h=hashlib.sha1(f"v{FEATURE_VERSION}|{sorted(years)}".encode())
+    for yr in sorted(years):
+        for p in sorted(glob.glob(os.path.join(data_root,str(yr),"Part_*.csv"))):
+            st=os.stat(p)
+            h.update(f"|{os.path.relpath(p,data_root)}:{st.st_mtime_ns}:{st.st_size}".encode())
+    return h.hexdigest()[:16]
+
+def load_features_cached(data_root="data", years=None, cache_dir=FEATURE_CACHE_DIR, keep:int=3)->pd.DataFrame:
+    """
+    load_annual_category_data 결과를 Parquet 로 캐시.
+    CSV 가 하나라도 바뀌거나(mtime/크기) FEATURE_VERSION 이 바뀌면 다시 계산.
+    pyarrow 가 없거나 쓰기 실패 시 캐시 없이 계산 결과만 반환.
+    """
+    years = years or [2023, 2024]
+    path=os.path.join(cache_dir,f"features_{_feature_cache_key(data_root,years)}.parquet")
+    if os.path.exists(path):
+        try:
+            df=pd.read_parquet(path)
+            # 캐시는 이 프로세스에서 정렬한 결과가 아니므로 라벨 전제(part_id, date 정렬)를 여기서만 확인
+            _check_sorted_by_part_date(df)
+            _print(f"[feature] 캐시 사용: {path} ({len(df)} rows)")
+            return df
+        except Exception as e:
+            _print(f"[feature] 캐시 읽기 실패 → 재계산: {e}")
+
+    df=load_annual_category_data(data_root, years=years)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path=path+".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        _print(f"[feature] 캐시 저장: {path}")
+        olds=sorted(glob.glob(os.path.join(cache_dir,"features_*.parquet")), key=os.path.getmtime)
+        for p in [q for q in olds if q!=path][:max(0,len(olds)-keep)]:
+            os.remove(p)
+    except Exception as e:
+        _print(f"[feature] 캐시 저장 생략: {e}")
+    return df
+
 # ─────────────────────────── 학습 (그룹별 모델) ───────────────────────────
 def _build_X(df:pd.DataFrame)->Tuple[pd.DataFrame,List[str]]:
     base=[
@@ -134,13 +198,90 @@ def _order_from_usage(usage30: float, opening_stock: float,
         return int(np.ceil(need/pack_size)*pack_size)
     return int(max(0.0, need))
 
+def _fit_group_models(task:dict, n_jobs:int)->Tuple[tuple,dict]:
+    """한 그룹의 포레스트 4개 학습 (프로세스 풀에서 pickle 로 호출되므로 모듈 최상위 함수)"""
+    Xtr, max_depth = task["Xtr"], task["max_depth"]
+    reg_usage=RandomForestRegressor(n_estimators=task["rf_reg"], max_depth=max_depth, random_state=42, n_jobs=n_jobs).fit(Xtr,task["ytr_u"])
+    reg_days =RandomForestRegressor(n_estimators=task["rf_days"],max_depth=max_depth, random_state=42, n_jobs=n_jobs).fit(Xtr,task["ytr_d"])
+    cls_6m   =RandomForestClassifier(n_estimators=task["rf_cls"],max_depth=max_depth, random_state=42, n_jobs=n_jobs).fit(Xtr,task["ytr6"])
+    cls_12m  =RandomForestClassifier(n_estimators=task["rf_cls"],max_depth=max_depth, random_state=42, n_jobs=n_jobs).fit(Xtr,task["ytr12"])
+    return task["key"], {"reg_usage": reg_usage, "reg_days": reg_days, "cls_6m": cls_6m, "cls_12m": cls_12m}
+
+def _plan_group_jobs(n_rows:int, cores:int, rows_per_job:int)->int:
+    """그룹 행 수로 포레스트 n_jobs 결정: rows_per_job 행당 코어 1개, 최대 cores"""
+    return int(min(cores, max(1, -(-int(n_rows) // max(1, int(rows_per_job))))))
+
+def _train_groups(tasks:List[dict], workers:int=0, rows_per_job:int=5000)->Dict[tuple,dict]:
+    """
+    그룹별 모델 학습 스케줄러 (코어 초과 할당 없음)
+      - workers=1 : 기존 방식 (그룹 순차, 포레스트 n_jobs=-1)
+      - 그 외     : n_jobs==1 인 소형 그룹은 프로세스 풀(workers 개, 0이면 코어 수)로 그룹 단위 병렬,
+                    대형 그룹은 풀 종료 후 메인 프로세스에서 순차로 n_jobs 만큼 트리 병렬
+    포레스트는 random_state=42 고정이라 n_jobs/실행 순서와 무관하게 같은 모델이 나옴
+    """
+    cores = os.cpu_count() or 1
+    workers = cores if int(workers or 0) <= 0 else int(workers)
+    if workers == 1 or len(tasks) <= 1:
+        return dict(_fit_group_models(t, -1) for t in tasks)
+
+    plan = {t["key"]: _plan_group_jobs(len(t["Xtr"]), cores, rows_per_job) for t in tasks}
+    small = sorted((t for t in tasks if plan[t["key"]] == 1), key=lambda t: -len(t["Xtr"]))
+    large = [t for t in tasks if plan[t["key"]] > 1]
+    _print(f"[train] 그룹 {len(tasks)}개: 풀 병렬 {len(small)}개(workers={min(workers, cores)}), "
+           f"트리 병렬 {len(large)}개(cores={cores})")
+
+    fitted = {}
+    if small:
+        # 행 수 내림차순 제출 → 큰 그룹이 마지막에 남아 꼬리 지연이 생기지 않도록
+        with ProcessPoolExecutor(max_workers=min(workers, cores, len(small))) as ex:
+            for key, models in ex.map(_fit_group_models, small, [1] * len(small)):
+                fitted[key] = models
+    for t in large:
+        key, models = _fit_group_models(t, plan[t["key"]])
+        fitted[key] = models
+    return fitted
+
+def _group_label(key:tuple)->str:
+    return "|".join(str(k) for k in key)
+
+def _group_seed(key:tuple)->int:
+    return int(hashlib.sha1(_group_label(key).encode()).hexdigest()[:8], 16)
+
+def _group_fingerprint(task:dict)->str:
+    """그룹 학습 입력(X/라벨/포레스트 파라미터) 해시 — 같으면 같은 모델이 나옴"""
+    h=hashlib.sha1()
+    h.update(",".join(map(str, task["Xtr"].columns)).encode())
+    h.update(pd.util.hash_pandas_object(task["Xtr"], index=False).to_numpy().tobytes())
+    for k in ("ytr_u","ytr_d","ytr6","ytr12"):
+        h.update(np.ascontiguousarray(task[k]).tobytes())
+    h.update(json.dumps([task["rf_reg"],task["rf_days"],task["rf_cls"],task["max_depth"]]).encode())
+    return h.hexdigest()
+
+def _load_previous_groups(out_dir:str, feature_columns:List[str])->Dict[tuple,dict]:
+    """증분 학습용 기존 번들의 {그룹키: {models, info}}. 피처 컬럼이 달라졌으면 전체 재학습(빈 dict)"""
+    # 서버(api_server 레지스트리)가 서빙하는 것과 같은 번들에서 이어서 학습
+    path=resolve_bundle_path(out_dir)
+    if not os.path.exists(path):
+        _print("[train] 기존 번들 없음 → 전체 학습")
+        return {}
+    prev=load_bundle_file(path)
+    if list(prev.get("feature_columns",[]))!=list(feature_columns):
+        _print("[train] 피처 컬럼 변경 → 전체 재학습")
+        return {}
+    infos=(prev.get("meta") or {}).get("groups") or {}
+    return {key:{"models":models,"info":infos[_group_label(key)]}
+            for key,models in prev["models"].items() if _group_label(key) in infos}
+
 def train_and_save_models(df_all:pd.DataFrame, out_dir=MODEL_DIR, args=None)->str:
     X, feature_columns = _build_X(df_all)
     if args and getattr(args, "float32", False):
         X[X.select_dtypes("float64").columns]=X.select_dtypes("float64").astype("float32")
 
     models_by_group={}
-    rng=np.random.default_rng(42)
+    incremental=bool(getattr(args,"incremental",False))
+    prev_groups=_load_previous_groups(out_dir, feature_columns) if incremental else {}
+    group_info={}
+    trained_at=datetime.now().isoformat(timespec="seconds")
 
     # 평가 수집버킷
     do_eval = bool(getattr(args, "eval_mae", False))
@@ -148,6 +289,7 @@ def train_and_save_models(df_all:pd.DataFrame, out_dir=MODEL_DIR, args=None)->st
     y_true_usage_all, y_pred_usage_all = [], []
     y_true_order_all, y_pred_order_all = [], []
     used_fallback_for_order = False
+    tasks, eval_parts = [], []
 
     for (cat,size,man), g in df_all.groupby(["category","size","manufacturer"]):
         idx=g.index
@@ -159,6 +301,8 @@ def train_and_save_models(df_all:pd.DataFrame, out_dir=MODEL_DIR, args=None)->st
         y_12=df_all.loc[idx,"risk_12m"].values.astype(int)
 
         # 수량 불일치 이벤트(라벨에 8% 확률로 ±3~8% 편차)
+        #   그룹 키로 시드 → 다른 그룹의 행 수가 바뀌어도 이 그룹 라벨은 그대로 (증분 학습 전제)
+        rng=np.random.default_rng([42, _group_seed((cat,size,man))])
         pr=getattr(args,"event_prob",0.08)
         lo,hi=(0.03,0.08)
         if getattr(args,"event_range",None): lo,hi=args.event_range
@@ -186,14 +330,30 @@ def train_and_save_models(df_all:pd.DataFrame, out_dir=MODEL_DIR, args=None)->st
             ytr12, yte12 = y_12, None
             idx_tr, idx_te = idx, None
 
-        reg_usage=RandomForestRegressor(n_estimators=rf_reg, max_depth=max_depth, random_state=42, n_jobs=-1).fit(Xtr,ytr_u)
-        reg_days =RandomForestRegressor(n_estimators=rf_days,max_depth=max_depth, random_state=42, n_jobs=-1).fit(Xtr,ytr_d)
-        cls_6m   =RandomForestClassifier(n_estimators=rf_cls,max_depth=max_depth, random_state=42, n_jobs=-1).fit(Xtr,ytr6)
-        cls_12m  =RandomForestClassifier(n_estimators=rf_cls,max_depth=max_depth, random_state=42, n_jobs=-1).fit(Xtr,ytr12)
+        # 라벨 노이즈는 여기서 확정 → 병렬 학습 순서와 무관하게 결과 동일
+        task={"key": (cat,size,man), "Xtr": Xtr, "ytr_u": ytr_u, "ytr_d": ytr_d,
+              "ytr6": ytr6, "ytr12": ytr12, "rf_reg": rf_reg, "rf_days": rf_days,
+              "rf_cls": rf_cls, "max_depth": max_depth}
+        fp=_group_fingerprint(task)
+        prev=prev_groups.get((cat,size,man))
+        if prev is not None and prev["info"].get("fingerprint")==fp:
+            models_by_group[(cat,size,man)]=prev["models"]
+            group_info[_group_label((cat,size,man))]=prev["info"]
+        else:
+            tasks.append(task)
+            group_info[_group_label((cat,size,man))]={"fingerprint": fp, "trained_at": trained_at,
+                                                       "n_rows": int(len(Xtr))}
+        eval_parts.append(((cat,size,man), Xte, yte_u, idx_te))
+
+    if incremental:
+        _print(f"[train] 증분 학습: 재학습 {len(tasks)}개 / 재사용 {len(eval_parts)-len(tasks)}개")
+    fitted = _train_groups(tasks, workers=getattr(args,"train_workers",0),
+                           rows_per_job=getattr(args,"rows_per_job",5000))
+    # 삽입 순서 = groupby 순서 (build_group_index 의 대표 그룹 선택이 이 순서에 의존)
+    models_by_group = {key: models_by_group.get(key) or fitted[key] for key, *_ in eval_parts}
 
-        models_by_group[(cat,size,man)] = {
-            "reg_usage": reg_usage, "reg_days": reg_days, "cls_6m": cls_6m, "cls_12m": cls_12m
-        }
+    for key, Xte, yte_u, idx_te in eval_parts:
+        reg_usage = models_by_group[key]["reg_usage"]
 
         # ── 평가: 예측 MAE(30일 수요) + 발주 MAE
         if do_eval and Xte is not None and len(Xte) > 0:
@@ -228,15 +388,20 @@ def train_and_save_models(df_all:pd.DataFrame, out_dir=MODEL_DIR, args=None)->st
             y_pred_order_all.extend(list(pred_order))
 
     # ── 메타/저장
+    now=datetime.now()
     meta={
-        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "version": now.strftime("%Y%m%d-%H%M%S"),
+        "created_at": now.isoformat(timespec="seconds"),
         "train_years": sorted({int(y) for y in df_all["year"].unique()}) if "year" in df_all.columns else [],
         "n_rows": int(len(df_all)),
         "n_parts": int(df_all["part_id"].nunique()),
         "group_count": int(df_all.groupby(["category","size","manufacturer"])["part_id"].nunique().shape[0]),
         "feature_count": len(feature_columns),
         "rf_params": {"rf_reg":getattr(args,"rf_reg",200),"rf_days":getattr(args,"rf_days",200),
-                      "rf_cls":getattr(args,"rf_cls",200),"max_depth":getattr(args,"max_depth",None)}
+                      "rf_cls":getattr(args,"rf_cls",200),"max_depth":getattr(args,"max_depth",None)},
+        # 그룹별 학습 슬라이스 지문/학습 시각 ("category|size|manufacturer" → {...})
+        "groups": group_info,
+        "retrained_groups": len(tasks),
     }
 
     # ── MAE 출력/기록
@@ -251,9 +416,16 @@ def train_and_save_models(df_all:pd.DataFrame, out_dir=MODEL_DIR, args=None)->st
         meta["metrics"] = {}
 
     bundle={"feature_columns":feature_columns,"models":models_by_group,"meta":meta}
+    bundle_format=getattr(args,"bundle_format","pkl")
     path=os.path.join(out_dir,"model_bundle.pkl")
-    joblib.dump(bundle,path,compress=getattr(args,"compress",3))
-    _print(f"[model] 저장: {path}")
+    if bundle_format in ("pkl","both"):
+        # 임시 파일에 쓴 뒤 교체 → 서버 레지스트리가 쓰는 중인 파일을 읽지 않도록. 기존 파일은 .prev 로 보관(롤백용)
+        save_bundle_pkl(bundle,path,compress=getattr(args,"compress",3))
+        _print(f"[model] 저장: {path}")
+    if bundle_format in ("mmap","both"):
+        # 그룹별 비압축 파일 → 서버가 mmap_mode='r' 로 로드 (콜드 스타트/워커 메모리 절감)
+        version_dir=save_bundle_mmap(bundle,os.path.join(out_dir,"model_bundle_mmap"))
+        _print(f"[model] mmap 저장: {version_dir}")
 
     if getattr(args,"save_meta",False):
         with open(os.path.join(out_dir,"model_meta.json"),"w",encoding="utf-8") as f:
@@ -299,33 +471,9 @@ def _demand_forecast_from_pred(mu:float, horizon:int)->np.ndarray:
 def optimize_order_day_quantity(state:PartState, demand:np.ndarray, price:np.ndarray,
                                 horizon=30, service_days=14, holding_rate_per_day=0.0005,
                                 penalty_mult=5.0):
-    H=min(horizon,len(demand),len(price))
-    if H<=0: return []
-    out=[]
-    for d in range(H):
-        arr=d+state.lead_time_days
-        pre=demand[:min(arr,H)].sum()
-        stock_at_arr=state.opening_stock - pre
-        unit= float(price[d])
-        penalty = max(0.0, -stock_at_arr) * unit * penalty_mult
-
-        need = demand[arr:min(arr+service_days,H)].sum()
-        base_q = max(0.0, need - max(0.0, stock_at_arr))
-        q = int(max(base_q, state.moq))
-        if state.pack_size>0:
-            q = int(np.ceil(q/state.pack_size)*state.pack_size)
-
-        purchase = unit*q
-        window = demand[arr:min(arr+service_days,H)]
-        avg_consumed = window.mean()*len(window) if len(window) else 0.0
-        avg_carry = max(0.0, q - avg_consumed)
-        holding = holding_rate_per_day * unit * avg_carry * max(1,len(window))
-        total = purchase + holding + penalty
-        out.append((total,d,q,unit,penalty,holding))
-    out.sort(key=lambda x:x[0])
-    return [{"day_offset":int(d),"quantity":int(q),"expected_unit_price":round(p,4),
-             "expected_total_cost":round(t,2),"stockout_penalty":round(pen,2),
-             "holding_cost":round(h,2)} for (t,d,q,p,pen,h) in out[:3]]
+    """후보 발주일 전체를 누적합 기반 벡터 연산으로 평가 (services/order_optimizer.py)"""
+    return optimize_order_top3(state, demand, price, horizon=horizon, service_days=service_days,
+                               hold_rate_per_day=holding_rate_per_day, penalty_mult=penalty_mult)
 
 # ─────────────────────────── 추론(콘솔 출력) ───────────────────────────
 def _build_X_predict(rows:pd.DataFrame, feat_cols:List[str])->pd.DataFrame:
@@ -344,23 +492,25 @@ def _build_X_predict(rows:pd.DataFrame, feat_cols:List[str])->pd.DataFrame:
     X = X[feat_cols]
     return X
 
-def _pick_model(models_by_group:dict, cat:str, size:str, man:str):
-    key=(cat,size,man)
-    if key in models_by_group: return models_by_group[key]
-    for (c,s,m),mdl in models_by_group.items():
-        if c==cat and s==size: return mdl
-    return next(iter(models_by_group.values()))
+def _pick_model(models_by_group:dict, group_index:dict, cat:str, size:str, man:str):
+    """정확키 → (cat,size) → cat → 전역 기본값 순으로 O(1) 조회. (모델 그룹, 매칭 단계) 반환"""
+    key, level = resolve_group(models_by_group, group_index, cat, size, man)
+    return models_by_group[key], level
 
 # ai-5-4.py
 _MODEL_CACHE = None
 
+def _bundle_path() -> str:
+    """model_bundle.pkl / mmap 레이아웃(model_bundle_mmap/) 중 최근 기록된 쪽 (서버와 같은 규칙)"""
+    return resolve_bundle_path(MODEL_DIR)
+
 def _load_bundle() -> dict:
     global _MODEL_CACHE
-    p = os.path.join(MODEL_DIR, "model_bundle.pkl")
+    p = _bundle_path()
     if _MODEL_CACHE is None:
         if not os.path.exists(p):
             raise FileNotFoundError("model_bundle.pkl 없음. 먼저 --retrain 실행.")
-        _MODEL_CACHE = joblib.load(p)
+        _MODEL_CACHE = load_bundle_file(p)
     return _MODEL_CACHE
 
 
@@ -370,7 +520,7 @@ def _predict_rows(rows:pd.DataFrame, args)->pd.DataFrame:
     필수 컬럼: part_id, category, size, manufacturer, quantity(=opening_stock 원시)
     """
     b=_load_bundle()
-    models=b["models"]; feats=b["feature_columns"]
+    models=b["models"]; feats=b["feature_columns"]; group_index=b["group_index"]
 
     rows=rows.copy()
 
@@ -409,7 +559,7 @@ def _predict_rows(rows:pd.DataFrame, args)->pd.DataFrame:
 
     for i,r in rows.iterrows():
         cat,size,man = r["category"], str(r["size"]), str(r["manufacturer"])
-        mdl=_pick_model(models,cat,size,man)
+        mdl,match=_pick_model(models,group_index,cat,size,man)
         Xi=X.iloc[[i]]
 
         # 수요(미래30일), 소진일, 위험
@@ -451,7 +601,7 @@ def _predict_rows(rows:pd.DataFrame, args)->pd.DataFrame:
             "opening_stock_calc": float(r["opening_stock"]),
             "pred_usage_30d": round(usage30,2),
             "pred_days_to_zero": round(days,2),
-            "risk_6m": risk6, "risk_12m": risk12,
+            "risk_6m": risk6, "risk_12m": risk12, "model_match": match,
             "event_applied": event, "event_factor": round(factor,4),
             "recommendations_top3": recos,
             "planned_usage": float(r.get("planned_usage", 0.0)),
@@ -609,8 +759,9 @@ def _print_grouped_result(df:pd.DataFrame):
             usage30 = r["pred_usage_30d"]
             dleft = r["pred_days_to_zero"]
             eflag = " (이벤트)" if r["event_applied"] else ""
+            mflag = f" (fallback 모델: {r['model_match']})" if r.get("model_match", "exact") != "exact" else ""
             _print(f"  - [{pk}] {r['manufacturer']}: 재고(원시/계산)={stock_raw}/{stock_calc}, "
-                   f"30일수요={usage30}, 소진예상일={dleft}{eflag}")
+                   f"30일수요={usage30}, 소진예상일={dleft}{eflag}{mflag}")
             for rec in (r["recommendations_top3"] or []):
                 _print(f"      · day+{rec['day_offset']}, qty={rec['quantity']}, "
                        f"단가≈{rec['expected_unit_price']}, 총비용≈{rec['expected_total_cost']} "
@@ -644,6 +795,16 @@ def main():
     ap.add_argument("--max-depth", type=int, default=None)
     ap.add_argument("--float32", action="store_true")
     ap.add_argument("--compress", type=int, default=3)
+    ap.add_argument("--no-feature-cache", action="store_true",
+                    help="ML_model/feature_cache/ Parquet 피처 캐시 사용 안 함")
+    ap.add_argument("--incremental", action="store_true",
+                    help="--retrain 시 학습 데이터 지문이 바뀐 그룹만 재학습하고 나머지는 기존 번들에서 재사용")
+    ap.add_argument("--train-workers", type=int, default=0,
+                    help="그룹 병렬 학습 프로세스 수 (0=코어 수, 1=기존 순차 학습)")
+    ap.add_argument("--rows-per-job", type=int, default=5000,
+                    help="그룹 행 수 기준 포레스트 n_jobs 산정 단위 (이보다 작은 그룹은 풀에서 n_jobs=1)")
+    ap.add_argument("--bundle-format", choices=["pkl","mmap","both"], default="pkl",
+                    help="pkl: 압축 단일 파일 / mmap: ML_model/model_bundle_mmap/ 그룹별 비압축 / both")
     ap.add_argument("--sample-rate", type=float, default=1.0)
     # 메타/시드
     ap.add_argument("--save-meta", action="store_true")
@@ -656,9 +817,12 @@ def main():
     years=[int(x.strip()) for x in args.years.split(",") if x.strip()]
 
     # ── 학습
-    model_path=os.path.join(MODEL_DIR,"model_bundle.pkl")
+    model_path=_bundle_path()
     if args.retrain or not os.path.exists(model_path):
-        df_all = load_annual_category_data("data", years=years)
+        if args.no_feature_cache:
+            df_all = load_annual_category_data("data", years=years)
+        else:
+            df_all = load_features_cached("data", years=years)
         if 0.0 < getattr(args, "sample_rate", 1.0) < 1.0:
             frac = max(0.0, min(1.0, args.sample_rate))
             df_all = df_all.sample(frac=frac, random_state=42).reset_index(drop=True)
@@ -676,6 +840,8 @@ def main():
             _print("입력원 미지정: --from-db 또는 --from-csv <path> 지정 필요.")
             return
         df = _predict_rows(rows, args)
+        if not df.empty:
+            _print(f"[model] 그룹 매칭 단계별 건수: {df['model_match'].value_counts().to_dict()}")
 
         # (A) 상세 나열
         _print_grouped_result(df)
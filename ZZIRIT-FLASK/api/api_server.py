@@ -2,7 +2,10 @@
 # api/api_server.py
 # Flask Blueprint exposing:
 #  - POST /api/predict   : run predictions using ML_model/model_bundle.pkl + current DB
-#  - GET  /api/model/meta: model availability & metadata
+#  - GET  /api/model/meta: model availability & metadata (+ active/previous bundle version)
+#  - POST /api/model/reload: re-check model_bundle.pkl now and swap if it changed
+#  - POST /api/model/rollback: switch back to the previously loaded bundle
+#    (reload/rollback: disabled unless ZZIRIT_MODEL_ADMIN_TOKEN is set; send it as X-Admin-Token)
 #
 # Requirements:
 #   - db_config.py providing DB_CONFIG dict
@@ -11,32 +14,44 @@
 
 from __future__ import annotations
 
+import hmac
 import logging
 import os
+from functools import wraps
 from typing import Any, Dict, List
 
 import numpy as np
 import pandas as pd
-import joblib
 import pymysql
 from flask import Blueprint, jsonify, request
 from pathlib import Path
 
+from services.model_bundle import MATCH_EXACT, MATCH_LEVELS, ModelRegistry, resolve_bundle_path, resolve_group
+from services.order_optimizer import evaluate_order_days, optimize_order_top3, top3_from_costs
+
 _HERE = Path(__file__).resolve()
 # ZZIRIT-FLASK 디렉토리
 _FLASK_ROOT = _HERE.parent.parent
 # ────────────────────────────────────────────────────────────────────────────────
 # Config
 _env_path = os.environ.get("ZZIRIT_MODEL_PATH")
+MODEL_DIR = str((_FLASK_ROOT / "ML_model").resolve())
+
+
+def _resolve_model_path() -> str:
+    """
+    번들 경로 결정 (레지스트리가 감시 주기마다 호출 → 서버 실행 중 mmap 번들이 배포돼도 전환)
+      1순위: ZZIRIT_MODEL_PATH
+      2순위: ZZIRIT-FLASK/ML_model/ 의 model_bundle.pkl(권장 기본) 과 model_bundle_mmap/ (ai-5-4.py
+             --bundle-format mmap, mmap_mode='r' 로드) 중 최근 기록된 쪽 (ai-5-4.py 와 같은 규칙)
+    """
+    if _env_path:
+        return str(Path(_env_path).expanduser().resolve())
+    return resolve_bundle_path(MODEL_DIR)
 
-if _env_path:
-    MODEL_PATH = Path(_env_path).expanduser().resolve()
-else:
-    # 2순위: ZZIRIT-FLASK/ML_model/model_bundle.pkl (권장 기본)
-    MODEL_PATH = (_FLASK_ROOT / "ML_model" / "model_bundle.pkl").resolve()
 
-MODEL_DIR = str(MODEL_PATH.parent)
-MODEL_PATH = str(MODEL_PATH)  # joblib.load가 str/Path 모두 처리 가능하나, 로그 가독성 위해 str로
+# best_day_top3 시뮬레이션 시나리오 수 상한 (요청 n_sim 은 1..MAX_N_SIM 으로 클립)
+MAX_N_SIM = int(os.environ.get("ZZIRIT_MAX_N_SIM", 5000))
 
 # db_config.py 에서 DB_CONFIG 로드 (존재하지 않으면 예외 발생)
 try:
@@ -48,19 +63,33 @@ except Exception as e:  # pragma: no cover
 # Flask Blueprint (app.py에서 url_prefix='/api' 로 등록됨)
 api_bp = Blueprint("api_server", __name__)
 
-# 전역 모델 캐시
-_MODEL_BUNDLE: Dict[str, Any] | None = None
+# 모델 레지스트리: ML_model/ 의 번들 변경을 백그라운드에서 감시/로드 후 무중단 교체
+#   감시 스레드는 app.py 에서 start_model_watch() 로 시작 (import 만으로는 시작하지 않음)
+_REGISTRY = ModelRegistry(_resolve_model_path, poll_interval=float(os.environ.get("ZZIRIT_MODEL_POLL_SEC", 30)))
+
+
+def start_model_watch() -> None:
+    """앱 설정 시 호출. ZZIRIT_MODEL_WATCH=0 이면 감시 스레드 없이 첫 요청 시 1회 로드"""
+    if os.environ.get("ZZIRIT_MODEL_WATCH", "1") != "0":
+        _REGISTRY.start()
+
+
+def require_model_admin(view):
+    """모델 교체/롤백 엔드포인트 보호: ZZIRIT_MODEL_ADMIN_TOKEN 미설정 시 비활성(403), 헤더 X-Admin-Token 불일치 시 401"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = os.environ.get("ZZIRIT_MODEL_ADMIN_TOKEN")
+        if not token:
+            return jsonify({"error": "Model admin endpoints are disabled"}), 403
+        if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+            return jsonify({"error": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return wrapper
 
 
 def _load_model_bundle() -> Dict[str, Any]:
-    """사전 학습된 모델 번들(model_bundle.pkl)을 1회 로드/캐싱"""
-    global _MODEL_BUNDLE
-    if _MODEL_BUNDLE is None:
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(f"모델 파일이 없습니다: {MODEL_PATH}. 먼저 ai-5-4.py --retrain 을 실행하세요.")
-        _MODEL_BUNDLE = joblib.load(MODEL_PATH)
-        logging.info("✅ model_bundle 로드 완료: %s", MODEL_PATH)
-    return _MODEL_BUNDLE
+    """현재 활성 모델 번들 반환 (요청 단위로 한 번만 호출해 같은 버전을 일관되게 사용)"""
+    return _REGISTRY.get()
 
 
 def _get_db_conn():
@@ -126,51 +155,50 @@ def _price_forecast(unit_price: float | None, horizon: int) -> np.ndarray:
     return base * (1.0 + rng.normal(0, 0.002, size=horizon))
 
 
-def _demand_from_usage30(usage30: float, horizon: int) -> np.ndarray:
-    mu = max(usage30 / max(horizon, 1), 0.0)
-    return np.full(horizon, mu, dtype=float)
+def _price_forecast_batch(unit_prices: np.ndarray, horizon: int) -> np.ndarray:
+    """_price_forecast 의 다건 버전: (파트 수 × horizon) 가격 행렬 (동일 시드 노이즈 공유)"""
+    unit_prices = np.asarray(unit_prices, dtype=float)
+    base = np.where(unit_prices > 0, unit_prices, 100.0)
+    rng = np.random.default_rng(123)
+    return base[:, None] * (1.0 + rng.normal(0, 0.002, size=horizon))[None, :]
+
+
+def _demand_from_usage30(usage30: Any, horizon: int) -> np.ndarray:
+    """30일 수요(스칼라 또는 길이 R 배열) → 일 수요로 환산해 (R × horizon) 수요 행렬로 확장"""
+    mu = np.maximum(np.atleast_1d(np.asarray(usage30, dtype=float)) / 30.0, 0.0)
+    return np.repeat(mu[:, None], horizon, axis=1)
 
 
 def _optimize(state: PartState, demand: np.ndarray, price: np.ndarray,
               horizon: int, service_days: int, hold_rate_per_day: float, penalty_mult: float) -> List[Dict[str, Any]]:
-    H = min(horizon, len(demand), len(price))
-    if H <= 0:
+    """후보 발주일 전체를 누적합 기반 벡터 연산으로 평가해 총비용 top-3 반환"""
+    return optimize_order_top3(state, demand, price, horizon=horizon, service_days=service_days,
+                               hold_rate_per_day=hold_rate_per_day, penalty_mult=penalty_mult)
+
+
+def _simulate_best_day_top3(state: PartState, usage30: float, price: np.ndarray, horizon: int, n_sim: int,
+                            service_days: int, hold_rate_per_day: float, penalty_mult: float,
+                            seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    수요 이벤트 시나리오 n_sim 개를 (n_sim × H) 수요 행렬로 만들어 한 번에 최적화하고,
+    시나리오별 최적 발주일의 빈도 상위 3개를 확률로 반환 (동률이면 먼저 등장한 날짜 우선)
+    """
+    n_sim = max(int(n_sim), 1)
+    rng = np.random.default_rng(seed)
+    event = rng.random(n_sim) < 0.08  # 이벤트 확률 8%
+    factor = np.where(event, rng.uniform(0.97, 1.08, size=n_sim), 1.0)
+    demand = _demand_from_usage30(usage30 * factor, horizon)
+
+    costs = evaluate_order_days(state.opening_stock, state.lead_time_days, demand, price,
+                                horizon=horizon, service_days=service_days,
+                                pack_size=state.pack_size, moq=state.moq,
+                                hold_rate_per_day=hold_rate_per_day, penalty_mult=penalty_mult)
+    if costs["total"].shape[1] == 0:
         return []
-    outcomes: List[tuple] = []
-    for d in range(H):
-        arrival_day = d + state.lead_time_days
-        consumed_before_arrival = float(demand[:min(arrival_day, H)].sum())
-        stock_at_arrival = state.opening_stock - consumed_before_arrival
-        unit_price = float(price[d])
-
-        penalty_cost = max(0.0, -stock_at_arrival) * unit_price * penalty_mult
-
-        window = demand[arrival_day:min(arrival_day + service_days, H)]
-        need_qty = float(window.sum())
-        base_order = max(0.0, need_qty - max(0.0, stock_at_arrival))
-        order_qty = int(max(base_order, state.moq))
-        if state.pack_size > 0:
-            order_qty = int(np.ceil(order_qty / state.pack_size) * state.pack_size)
-
-        purchase_cost = unit_price * order_qty
-        avg_carry = max(0.0, order_qty - float(window.mean() * len(window) if len(window) else 0.0))
-        holding_cost = hold_rate_per_day * unit_price * avg_carry * max(1, len(window))
-        total_cost = purchase_cost + holding_cost + penalty_cost
-        outcomes.append((total_cost, d, order_qty, unit_price, penalty_cost, holding_cost))
-
-    outcomes.sort(key=lambda x: x[0])
-    top3 = []
-    for (total, d, qty, unit, pen, hold) in outcomes[:3]:
-        top3.append({
-            "day_offset": int(d),
-            "quantity": int(qty),
-            "expected_total_cost": round(float(total), 2),
-            # 추가 정보(프론트 타입에 없지만 있어도 무해)
-            "expected_unit_price": round(float(unit), 4),
-            "stockout_penalty": round(float(pen), 2),
-            "holding_cost": round(float(hold), 2),
-        })
-    return top3
+    best_days = np.argmin(costs["total"], axis=1)
+    days, first_seen, counts = np.unique(best_days, return_index=True, return_counts=True)
+    order = np.lexsort((first_seen, -counts))[:3]
+    return [{"day_offset": int(days[k]), "prob": round(float(counts[k]) / n_sim, 2)} for k in order]
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -179,7 +207,7 @@ def _optimize(state: PartState, demand: np.ndarray, price: np.ndarray,
 @api_bp.route("/model/meta", methods=["GET"])
 def model_meta():
     """모델 파일 존재 및 로드 가능 여부"""
-    available = os.path.exists(MODEL_PATH)
+    available = os.path.exists(_resolve_model_path())
     meta = None
     try:
         if available:
@@ -189,7 +217,27 @@ def model_meta():
         logging.warning("model_meta: 로드 중 문제: %s", e)
         available = False
         meta = None
-    return jsonify({"available": available, "path": MODEL_PATH, "meta": meta})
+    status = _REGISTRY.status()
+    return jsonify({"available": available, "path": status["path"], "meta": meta,
+                    "version": status["active_version"], "registry": status})
+
+
+@api_bp.route("/model/reload", methods=["POST"])
+@require_model_admin
+def model_reload():
+    """번들 파일 변경 여부를 즉시 확인해 바뀌었으면 교체"""
+    swapped = _REGISTRY.refresh()
+    return jsonify({"swapped": swapped, "registry": _REGISTRY.status()})
+
+
+@api_bp.route("/model/rollback", methods=["POST"])
+@require_model_admin
+def model_rollback():
+    """직전 번들 버전으로 되돌림 (보관된 직전 파일로 포인터/이름만 교체)"""
+    if not _REGISTRY.rollback():
+        status = _REGISTRY.status()
+        return jsonify({"error": status["last_error"] or "No previous model version", "registry": status}), 409
+    return jsonify({"rolled_back": True, "registry": _REGISTRY.status()})
 
 
 @api_bp.route("/predict", methods=["POST"])
@@ -199,6 +247,8 @@ def predict():
     {
       "years":[2022,2023,2024],
       "service_days":14,
+      "horizon":30,
+      "n_sim":40,
       "pack_size":100,
       "moq":0,
       "holding_rate_per_day":0.0005,
@@ -207,6 +257,8 @@ def predict():
     """
     params = request.get_json(silent=True) or {}
     service_days = int(params.get("service_days", 14))
+    horizon = max(1, int(params.get("horizon", 30)))
+    n_sim = min(max(1, int(params.get("n_sim", 40))), MAX_N_SIM)
     pack_size = int(params.get("pack_size", 100))
     moq = int(params.get("moq", 0))
     hold_rate = float(params.get("holding_rate_per_day", 0.0005))
@@ -215,6 +267,7 @@ def predict():
     try:
         bundle = _load_model_bundle()
         models: Dict[tuple, Dict[str, Any]] = bundle["models"]
+        group_index: Dict[str, Any] = bundle["group_index"]
         feat_cols: List[str] = bundle["feature_columns"]
     except Exception as e:
         logging.error("모델 로드 실패: %s", e, exc_info=True)
@@ -280,41 +333,62 @@ def predict():
 
     items: List[Dict[str, Any]] = []
 
-    # 보조: 키 매칭 (정확키 → (cat,size) → 임의 하나)
-    def pick_group(cat: str, size: str, man: str) -> Dict[str, Any]:
-        key = (cat, size, man)
-        if key in models:
-            return models[key]
-        for (c, s, m), grp in models.items():
-            if c == cat and s == size:
-                return grp
-        # fallback
-        return next(iter(models.values()))
-
-    H = 30
-    for i, row in df.iterrows():
-        cat = row["category"]; size = str(row["size"]); manu = str(row["manufacturer"])
-        model_group = pick_group(cat, size, manu)
-
-        Xi = X.iloc[[i]]
+    # 그룹별 배치 추론: 같은 모델 그룹으로 매칭된 행을 모아 모델당 1회만 predict 후 행 위치로 되돌림
+    n_rows = len(df)
+    usage30_arr = np.zeros(n_rows, dtype=float)
+    days_arr = np.full(n_rows, 9999.0, dtype=float)
+    risk6_arr = np.zeros(n_rows, dtype=bool)
+    risk12_arr = np.zeros(n_rows, dtype=bool)
+
+    # 키 매칭 (정확키 → (cat,size) → cat → 전역 기본값), 행별 매칭 단계 기록
+    rows_by_group: Dict[tuple, List[int]] = {}
+    match_levels: List[str] = []
+    for pos, (cat, size, manu) in enumerate(zip(df["category"], df["size"], df["manufacturer"])):
+        key, level = resolve_group(models, group_index, cat, str(size), str(manu))
+        rows_by_group.setdefault(key, []).append(pos)
+        match_levels.append(level)
+    match_counts = {level: match_levels.count(level) for level in MATCH_LEVELS}
+    if match_counts[MATCH_EXACT] < n_rows:
+        logging.info("predict: fallback 모델 사용 %d/%d건 %s", n_rows - match_counts[MATCH_EXACT], n_rows, match_counts)
+
+    for key, positions in rows_by_group.items():
+        model_group = models[key]
+        Xg = X.iloc[positions]
         try:
-            usage30 = float(model_group["reg_usage"].predict(Xi)[0])
+            usage30_arr[positions] = model_group["reg_usage"].predict(Xg)
         except Exception:
-            usage30 = 0.0
+            usage30_arr[positions] = 0.0
         try:
-            days_to_zero = float(model_group["reg_days"].predict(Xi)[0])
+            days_arr[positions] = model_group["reg_days"].predict(Xg)
         except Exception:
-            days_to_zero = 9999.0
+            days_arr[positions] = 9999.0
 
         # 위험도(사용할 경우)
         try:
-            risk6 = bool(model_group["cls_6m"].predict(Xi)[0])
-            risk12 = bool(model_group["cls_12m"].predict(Xi)[0])
+            risk6_arr[positions] = model_group["cls_6m"].predict(Xg).astype(bool)
+            risk12_arr[positions] = model_group["cls_12m"].predict(Xg).astype(bool)
         except Exception:
-            risk6 = risk12 = False
+            risk6_arr[positions] = False
+            risk12_arr[positions] = False
+
+    # 전 파트 발주 최적화를 (파트 수 × H) 행렬로 한 번에 평가
+    H = horizon
+    demand_mat = _demand_from_usage30(usage30_arr, H)
+    price_mat = _price_forecast_batch(df["unit_price"].fillna(100.0).to_numpy(dtype=float), H)
+    all_costs = evaluate_order_days(
+        df["opening_stock"].to_numpy(dtype=float), df["lead_time_days"].to_numpy(dtype=float).astype(int),
+        demand_mat, price_mat, horizon=H, service_days=service_days, pack_size=pack_size, moq=moq,
+        hold_rate_per_day=hold_rate, penalty_mult=pen_mult,
+    )
 
-        demand_vec = _demand_from_usage30(usage30, H)
-        price_vec = _price_forecast(float(row.get("unit_price", 100.0)), H)
+    for i, row in df.iterrows():
+        cat = row["category"]; size = str(row["size"]); manu = str(row["manufacturer"])
+        usage30 = float(usage30_arr[i])
+        days_to_zero = float(days_arr[i])
+        risk6 = bool(risk6_arr[i])
+        risk12 = bool(risk12_arr[i])
+
+        price_vec = price_mat[i]
 
         state = PartState(
             part_id=int(row.get("part_id", 0)),
@@ -323,27 +397,12 @@ def predict():
             pack_size=pack_size,
             moq=moq,
         )
-        recos = _optimize(state, demand_vec, price_vec, horizon=H,
-                          service_days=service_days, hold_rate_per_day=hold_rate, penalty_mult=pen_mult)
-
-        # 시뮬레이션 기반 best_day_top3 (가벼운 N으로)
-        day_counts: Dict[int, int] = {}
-        N_sim = 40
-        rng = np.random.default_rng(7)
-        for _ in range(N_sim):
-            usage_sim = usage30
-            if rng.random() < 0.08:  # 이벤트 확률 8%
-                usage_sim *= rng.uniform(0.97, 1.08)
-            demand_sim = _demand_from_usage30(usage_sim, H)
-            recos_sim = _optimize(state, demand_sim, price_vec, horizon=H,
-                                  service_days=service_days, hold_rate_per_day=hold_rate, penalty_mult=pen_mult)
-            if recos_sim:
-                best_d = int(recos_sim[0]["day_offset"])
-                day_counts[best_d] = day_counts.get(best_d, 0) + 1
-        best_day_top3 = [
-            {"day_offset": int(d), "prob": round(cnt / max(N_sim, 1), 2)}
-            for d, cnt in sorted(day_counts.items(), key=lambda kv: kv[1], reverse=True)[:3]
-        ]
+        recos = top3_from_costs(all_costs, row=i)
+
+        # 시뮬레이션 기반 best_day_top3 (n_sim 개 시나리오를 한 번에 평가)
+        best_day_top3 = _simulate_best_day_top3(state, usage30, price_vec, horizon=H, n_sim=n_sim,
+                                                service_days=service_days, hold_rate_per_day=hold_rate,
+                                                penalty_mult=pen_mult)
 
         predicted_qty = int(recos[0]["quantity"]) if recos else 0
         best_order_day = int(recos[0]["day_offset"]) if recos else None
@@ -371,10 +430,14 @@ def predict():
             "recommendations_top3": recos,
             "predicted_best_order_day": best_order_day if best_order_day is not None else None,
             "best_day_top3": best_day_top3,
+            "model_match": match_levels[i],
         })
 
     # summary.categories: {category, days_possible}
-    summary = {"categories": []}
+    summary = {
+        "categories": [],
+        "model_match": match_counts,
+    }
     if items:
         df_items = pd.DataFrame(items)
         for cat, g in df_items.groupby("category"):
@@ -1,15 +1,51 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g, has_request_context
 from gemini_handler import get_gemini_response, get_api_status
 import json
 from datetime import datetime
-import asyncio
 import concurrent.futures
 from data_crawler import crawler
+from services.menu_prefetcher import MenuPrefetcher
+from services.menu_snapshot import ALL_MENUS, MenuSnapshotStore
 import traceback
 import os
+import time
+from functools import wraps
 
 chat_bp = Blueprint('chat', __name__)
 
+# 메뉴 데이터 스냅샷 (메뉴별 TTL, 오래된 스냅샷은 즉시 반환 + 백그라운드 갱신)
+menu_snapshots = MenuSnapshotStore(crawler)
+
+# 메뉴별 주기 선조회 (MES 5초, 재고 1분, 불량 5분 ...)
+#   스냅샷은 프로세스 메모리에 있으므로 선조회도 프로세스마다 돌아감 → 워커 N개면 백엔드 부하 N배.
+#   기본 비활성(요청 시 스냅샷 TTL 로만 갱신). 단일 프로세스 실행(python app.py)에서만 ZZIRIT_MENU_PREFETCH=1 권장
+menu_prefetcher = MenuPrefetcher(menu_snapshots)
+if os.environ.get("ZZIRIT_MENU_PREFETCH", "0") == "1":
+    menu_prefetcher.start()
+
+# 채팅(LLM 응답) 요청 1건이 메뉴 데이터 조회(크롤링)에 쓸 수 있는 총 시간(초)
+#   @with_crawl_budget 가 붙은 엔드포인트만 적용. 초과하면 기다리지 않고 직전 스냅샷을 stale 로 표시해 응답
+#   (백엔드 지연이 채팅 지연으로 번지지 않도록). 그 밖의 경로(다른 라우트/스크립트/스레드)는 기존 45초 타임아웃
+CRAWL_BUDGET_SECONDS = float(os.environ.get("ZZIRIT_CHAT_CRAWL_BUDGET", 8))
+DEFAULT_CRAWL_TIMEOUT = 45
+
+
+def with_crawl_budget(view):
+    """이 요청의 크롤링 마감 시각을 g 에 기록 (채팅/LLM 엔드포인트 전용)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.crawl_deadline = time.monotonic() + CRAWL_BUDGET_SECONDS
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def crawl_budget_remaining():
+    """현재 요청의 남은 크롤링 예산(초). 예산이 없는 요청/요청 밖에서는 기존 타임아웃(45초)"""
+    deadline = g.get("crawl_deadline") if has_request_context() else None
+    if deadline is None:
+        return DEFAULT_CRAWL_TIMEOUT
+    return max(0.0, deadline - time.monotonic())
+
 # 메뉴별 프롬프트 템플릿 (개선된 버전)
 PROMPT_TEMPLATES = {
     "menu1": {
@@ -249,22 +285,12 @@ PROMPT_TEMPLATES = {
     }
 }
 
-# 전역 executor (비동기 작업용)
-executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
-
 def run_async_in_thread(coro):
-    """비동기 함수를 동기 함수에서 실행하기 위한 헬퍼 (개선된 버전)"""
+    """비동기 함수를 동기 함수에서 실행하기 위한 헬퍼 (crawler 전용 루프 + 공유 세션 사용)"""
     try:
-        # 현재 이벤트 루프가 있는지 확인
-        loop = asyncio.get_running_loop()
-        # 이미 실행 중인 루프가 있으면 새 스레드에서 실행
-        future = executor.submit(asyncio.run, coro)
-        return future.result(timeout=45)  # 타임아웃 증가 (45초)
-    except RuntimeError:
-        # 실행 중인 루프가 없으면 직접 실행
-        return asyncio.run(coro)
+        return crawler.run_sync(coro, timeout=crawl_budget_remaining())
     except concurrent.futures.TimeoutError:
-        print("❌ 비동기 실행 타임아웃 (45초 초과)")
+        print("❌ 비동기 실행 타임아웃 (크롤링 예산/타임아웃 초과)")
         return None
     except Exception as e:
         print(f"❌ 비동기 실행 오류: {e}")
@@ -272,29 +298,35 @@ def run_async_in_thread(coro):
         return None
 
 def get_all_menu_data_sync():
-    """모든 메뉴의 데이터를 동기 방식으로 가져오기 (개선됨)"""
+    """모든 메뉴의 데이터를 동기 방식으로 가져오기 (스냅샷 우선, 오래된 메뉴는 백그라운드 갱신)"""
     try:
-        print("🚀 전체 메뉴 데이터 크롤링 시작...")
+        print("🚀 전체 메뉴 데이터 조회 시작...")
         start_time = datetime.now()
         
-        all_data = run_async_in_thread(crawler.get_all_menu_data())
+        snapshots = menu_snapshots.get_many(ALL_MENUS, timeout=crawl_budget_remaining())
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         
-        if all_data:
-            print(f"✅ 전체 메뉴 데이터 크롤링 성공 (소요시간: {duration:.2f}초)")
+        if any(s["data"] is not None for s in snapshots.values()):
+            print(f"✅ 전체 메뉴 데이터 조회 성공 (소요시간: {duration:.2f}초)")
             
             # 데이터 품질 검증
             cleaned_data = {}
             data_sources = {}
+            menu_ages = {}
+            stale_menus = []
             
-            for menu_id, data in all_data.items():
+            for menu_id, snap in snapshots.items():
+                data = snap["data"]
+                menu_ages[menu_id] = snap["age_seconds"]
+                if snap["stale"]:
+                    stale_menus.append(menu_id)
                 if data is not None:
                     cleaned_data[menu_id] = data
                     source = data.get('data_source', 'unknown') if isinstance(data, dict) else 'unknown'
                     data_sources[menu_id] = source
-                    print(f"📊 {menu_id}: 데이터 소스 = {source}")
+                    print(f"📊 {menu_id}: 데이터 소스 = {source}, 경과 {snap['age_seconds']}초")
                 else:
                     print(f"⚠️ {menu_id} 데이터가 None입니다.")
             
@@ -303,8 +335,11 @@ def get_all_menu_data_sync():
                 'crawl_time': end_time.isoformat(),
                 'duration_seconds': duration,
                 'data_sources': data_sources,
-                'total_menus': len(all_data),
-                'successful_menus': len(cleaned_data) - 1  # _metadata 제외
+                'total_menus': len(snapshots),
+                'successful_menus': len(cleaned_data) - 1,  # _metadata 제외
+                'menu_ages_seconds': menu_ages,
+                'menu_fetched_at': {m: s["fetched_at"] for m, s in snapshots.items()},
+                'stale_menus': stale_menus
             }
             
             return cleaned_data
@@ -1222,6 +1257,7 @@ def generate_fallback_response(menu_id, user_message, context_data):
         return f"안녕하세요! PCB-Manager AI입니다.\n\n'{user_message}'에 대한 질문을 받았습니다. 현재 시스템을 점검 중이니 잠시 후 다시 시도해주세요.\n\n오류 정보: {str(e)}"
 
 @chat_bp.route('/llm', methods=['POST'])
+@with_crawl_budget
 def llm_chat():
     """HTTP API 엔드포인트 (Socket.IO 대체용) - 개선된 버전"""
     try:
@@ -1342,6 +1378,7 @@ def llm_chat():
         }), 500
 
 @chat_bp.route('/chat', methods=['POST'])
+@with_crawl_budget
 def chat():
     """프론트엔드 챗봇용 엔드포인트 (개선된 버전)"""
     try:
@@ -1589,6 +1626,17 @@ def test_endpoints():
             "timestamp": datetime.now().isoformat()
         }), 500
 
+@chat_bp.route('/prefetch/status', methods=['GET'])
+def prefetch_status():
+    """메뉴 데이터 선조회/스냅샷/회로 차단기 상태"""
+    return jsonify({
+        "prefetcher": menu_prefetcher.status(),
+        "snapshots": menu_snapshots.status(),
+        "breakers": crawler.breaker_status(),
+        "crawl_budget_seconds": CRAWL_BUDGET_SECONDS,
+        "timestamp": datetime.now().isoformat()
+    })
+
 @chat_bp.route('/moisture-monitoring', methods=['GET'])
 def get_moisture_monitoring():
     """습도 민감 자재 모니터링 전용 API 엔드포인트"""
@@ -1596,7 +1644,7 @@ def get_moisture_monitoring():
         print("💧 습도 민감 자재 모니터링 데이터 요청...")
         
         # MES 데이터에서 습도 민감 자재 정보만 추출
-        mes_data = get_menu_data_sync("mes")
+        mes_data = menu_snapshots.get("mes", timeout=crawl_budget_remaining())
         
         if not mes_data:
             return jsonify({
@@ -1687,7 +1735,7 @@ def get_environment_status():
         print("🏭 공장 환경 상태 데이터 요청...")
         
         # MES 데이터에서 환경 정보만 추출
-        mes_data = get_menu_data_sync("mes")
+        mes_data = menu_snapshots.get("mes", timeout=crawl_budget_remaining())
         
         if not mes_data:
             return jsonify({
@@ -1779,6 +1827,7 @@ def get_environment_status():
         }), 500
 
 @chat_bp.route('/moisture-chat', methods=['POST'])
+@with_crawl_budget
 def moisture_chat():
     """습도 민감 자재 모니터링 전용 챗봇 API"""
     try:
@@ -1795,7 +1844,7 @@ def moisture_chat():
         print(f"💧 습도 모니터링 챗봇 요청: {user_message}")
         
         # MES 데이터 가져오기
-        mes_data = get_menu_data_sync("mes")
+        mes_data = menu_snapshots.get("mes", timeout=crawl_budget_remaining())
         
         if not mes_data:
             return jsonify({
@@ -5,10 +5,14 @@ from services.db_handler import get_db_connection
 import re
 import os
 import pickle
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import copy
 from sklearn.feature_extraction.text import TfidfVectorizer
 from gemini_handler import get_gemini_response
+from services.rag_index import RagIndexManager
+from services.vector_index import build_vector_index, top_k as top_k_indices
+from services.part_number_index import PartNumberIndex
+from services.embedding_service import DEFAULT_EMBEDDING_MODEL, get_embedding_service
 from datetime import datetime
 
 chat4_bp = Blueprint("chat4", __name__)
@@ -22,11 +26,25 @@ def load_pickle(filename):
         return pickle.load(f)
 
 def save_pickle(data, filename):
-    with open(os.path.join(MODEL_DIR, filename), "wb") as f:
+    # 임시 파일에 쓴 뒤 교체 → 다른 프로세스가 쓰다 만 파일을 읽지 않음
+    path = os.path.join(MODEL_DIR, filename)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
         pickle.dump(data, f)
+    os.replace(tmp_path, path)
 
-# 임베딩 모델
-embedding_model = SentenceTransformer('jhgan/ko-sroberta-multitask')
+# 임베딩 모델: 첫 encode 때 로드 (또는 ZZIRIT_EMBEDDING_SOCKET 의 공유 임베딩 워커 사용)
+EMBEDDING_MODEL_NAME = DEFAULT_EMBEDDING_MODEL
+embedding_model = get_embedding_service(EMBEDDING_MODEL_NAME)
+
+# 증분 재색인: 신규/변경 행만 이 크기 배치로 인코딩
+EMBED_BATCH_SIZE = int(os.environ.get("ZZIRIT_RAG_EMBED_BATCH", 64))
+# 마지막 TF-IDF 학습 이후 바뀐 행 비율이 이 값을 넘으면 어휘를 다시 학습 (이하면 기존 어휘로 transform 만)
+TFIDF_REFIT_DRIFT = float(os.environ.get("ZZIRIT_RAG_TFIDF_REFIT_DRIFT", 0.2))
+# 근사(ANN) 인덱스 사용 시 top_k × 이 배수만큼 후보를 뽑아 하이브리드 점수로 재정렬
+ANN_CANDIDATE_FACTOR = 10
+# 질의의 부품번호 패턴이 문서 부품번호에 포함되면 더하는 가중치
+PART_NUMBER_BOOST = 0.3
 
 # Excel/RAG 프로세서
 class ExcelRAGProcessor:
@@ -37,6 +55,71 @@ class ExcelRAGProcessor:
         self.embeddings = None
         self.tfidf_vectorizer = TfidfVectorizer(max_features=1000)
         self.tfidf_matrix = None
+        # 이 인덱스를 만든 원본 지문 {"db": pcb_parts 체크섬, "excel": 워크북 sha256} 과 구축 시각
+        self.fingerprint = None
+        self.built_at = None
+        # 문서별 정제 텍스트 해시 (임베딩 재사용 키), 임베딩 모델, TF-IDF 학습 이후 누적 변경 비율
+        self.content_hashes = None
+        self.embedding_model_name = EMBEDDING_MODEL_NAME
+        self.tfidf_drift = 0.0
+        # 임베딩 검색 인덱스 (services.vector_index). 저장하지 않고 임베딩에서 다시 생성
+        self.vector_index = None
+        # 부품번호 3-gram 역색인 (services.part_number_index). 문서에서 다시 생성
+        self.part_number_index = None
+        # TF-IDF 행렬의 열 우선(CSC) 사본: 질의 단어가 들어간 행만 찾을 때 사용 (ANN 경로에서 처음 쓸 때 생성)
+        self.tfidf_columns = None
+
+    def db_fingerprint(self):
+        """pcb_parts 내용 지문 (CHECKSUM TABLE). DB 연결 실패/테이블 없음이면 None"""
+        try:
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("CHECKSUM TABLE pcb_parts")
+                row = cursor.fetchone()
+                cursor.close()
+            finally:
+                conn.close()
+            return str(row[1]) if row and row[1] is not None else None
+        except Exception as e:
+            print(f"⚠️ pcb_parts 지문 조회 실패: {e}")
+            return None
+
+    def excel_fingerprint(self):
+        """워크북 파일 sha256 (없으면 None)"""
+        if not os.path.exists(self.excel_path):
+            return None
+        h = hashlib.sha256()
+        with open(self.excel_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def source_fingerprint(self):
+        return {"db": self.db_fingerprint(), "excel": self.excel_fingerprint()}
+
+    def is_stale(self, fingerprint):
+        """이 인덱스가 원본보다 오래됐는지. DB 를 확인할 수 없으면 워크북 변경만 반영"""
+        if self.embeddings is None or self.fingerprint is None:
+            return True
+        if fingerprint.get("db") is not None and fingerprint["db"] != self.fingerprint.get("db"):
+            return True
+        return fingerprint.get("excel") is not None and fingerprint["excel"] != self.fingerprint.get("excel")
+
+    def build_index(self, fingerprint, previous=None):
+        """
+        원본에서 인덱스 구축. DB 에 연결되면 기존처럼 Excel 로 내보낸 뒤 워크북을 읽음.
+        previous(직전 인덱스)가 있으면 내용이 같은 행의 임베딩/TF-IDF 어휘를 재사용
+        """
+        if fingerprint.get("db") is not None:
+            if not self.load_excel_data_from_db():
+                print("⚠️ DB 업데이트 실패, 기존 Excel 파일 사용")
+        if not self.load_excel_data(refresh_db=False) or not self.create_embeddings(previous):
+            return False
+        # 내보내기로 워크북이 바뀌었을 수 있으므로 구축 후 해시를 다시 계산
+        self.fingerprint = {"db": fingerprint.get("db"), "excel": self.excel_fingerprint()}
+        self.built_at = datetime.now().isoformat(timespec="seconds")
+        return True
 
     def load_excel_data_from_db(self):
         try:
@@ -75,7 +158,10 @@ class ExcelRAGProcessor:
                 os.makedirs(excel_dir)
                 print(f"📁 디렉토리 생성: {excel_dir}")
             
-            df.to_excel(self.excel_path, index=False, sheet_name='pcb_parts')
+            # 임시 파일에 쓴 뒤 교체 (지문 계산/로드가 쓰다 만 워크북을 읽지 않도록)
+            tmp_path = f"{self.excel_path}.{os.getpid()}.tmp.xlsx"
+            df.to_excel(tmp_path, index=False, sheet_name='pcb_parts')
+            os.replace(tmp_path, self.excel_path)
             print(f"💾 Excel 파일 업데이트 완료: {self.excel_path}")
             return True
 
@@ -85,13 +171,14 @@ class ExcelRAGProcessor:
             traceback.print_exc()
             return False
 
-    def load_excel_data(self, excel_path=None):
+    def load_excel_data(self, excel_path=None, refresh_db=True):
         try:
-            # 먼저 DB에서 최신 데이터 가져오기 시도
-            if self.load_excel_data_from_db():
-                print("✅ DB에서 최신 데이터 로드 성공")
-            else:
-                print("⚠️ DB 업데이트 실패, 기존 Excel 파일 사용")
+            # 먼저 DB에서 최신 데이터 가져오기 시도 (build_index 는 직접 내보낸 뒤 refresh_db=False 로 호출)
+            if refresh_db:
+                if self.load_excel_data_from_db():
+                    print("✅ DB에서 최신 데이터 로드 성공")
+                else:
+                    print("⚠️ DB 업데이트 실패, 기존 Excel 파일 사용")
 
             if not os.path.exists(self.excel_path):
                 print(f"❌ Excel 파일이 존재하지 않습니다: {self.excel_path}")
@@ -128,17 +215,67 @@ class ExcelRAGProcessor:
             traceback.print_exc()
             return False
 
-    def create_embeddings(self):
+    @staticmethod
+    def content_hash(cleaned_text):
+        return hashlib.sha1(cleaned_text.encode("utf-8")).hexdigest()
+
+    def get_content_hashes(self):
+        """문서별 내용 해시 (이전 버전 저장본은 문서에서 다시 계산)"""
+        if self.content_hashes is None or len(self.content_hashes) != len(self.documents):
+            self.content_hashes = [self.content_hash(self.clean_text(doc['content'])) for doc in self.documents]
+        return self.content_hashes
+
+    def embedding_store(self):
+        """내용 해시 → 임베딩 (같은 모델로 만든 인덱스만 재사용 대상)"""
+        if self.embeddings is None or self.embedding_model_name != EMBEDDING_MODEL_NAME:
+            return {}
+        return dict(zip(self.get_content_hashes(), self.embeddings))
+
+    def create_embeddings(self, previous=None):
+        """임베딩/TF-IDF 생성. previous 가 있으면 신규/변경 행만 인코딩 (삭제된 행은 자연히 빠짐)"""
         if not self.documents:
             print("문서가 없습니다. 먼저 EXCEL 파일을 로드하세요.")
             return False
         try:
             texts = [doc['content'] for doc in self.documents]
             cleaned_texts = [self.clean_text(text) for text in texts]
-            print("임베딩 생성 중...")
-            self.embeddings = embedding_model.encode(cleaned_texts)
-            self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(cleaned_texts)
-            print(f"임베딩 생성 완료: {self.embeddings.shape}")
+            hashes = [self.content_hash(text) for text in cleaned_texts]
+
+            store = previous.embedding_store() if previous is not None else {}
+            text_by_hash = dict(zip(hashes, cleaned_texts))
+            missing = [h for h in text_by_hash if h not in store]
+            if missing:
+                print(f"임베딩 생성 중... (신규/변경 {len(missing)}개, 재사용 {len(text_by_hash) - len(missing)}개)")
+                vectors = embedding_model.encode([text_by_hash[h] for h in missing], batch_size=EMBED_BATCH_SIZE)
+                store = {**store, **dict(zip(missing, vectors))}
+            else:
+                print("임베딩 변경 없음 - 전부 재사용")
+            self.embeddings = np.vstack([store[h] for h in hashes])
+            self.content_hashes = hashes
+            self.embedding_model_name = EMBEDDING_MODEL_NAME
+
+            # TF-IDF: 변경 비율이 작으면 기존 어휘로 행렬만 다시 계산
+            prev_hashes = set(previous.get_content_hashes()) if previous is not None else set()
+            # 편집 1건은 새 해시 1개 + 사라진 해시 1개 → 큰 쪽만 세서 추가/삭제/편집 모두 1건으로 계산
+            # (행 위치가 아니라 내용 해시로 비교하므로 중간 행 삽입으로 뒤 행이 밀려도 변경으로 세지 않음)
+            new_hashes = set(hashes)
+            changed = max(len(new_hashes - prev_hashes), len(prev_hashes - new_hashes))
+            drift = (previous.tfidf_drift + changed / max(1, len(prev_hashes))) if prev_hashes else None
+            if (drift is not None and drift <= TFIDF_REFIT_DRIFT
+                    and previous.tfidf_matrix is not None and hasattr(previous.tfidf_vectorizer, "vocabulary_")):
+                # 이전 인덱스는 교체 전까지 요청을 처리하므로 공유하지 않고 복사 (어휘 max_features=1000 이라 저렴)
+                self.tfidf_vectorizer = copy.deepcopy(previous.tfidf_vectorizer)
+                self.tfidf_matrix = self.tfidf_vectorizer.transform(cleaned_texts)
+                self.tfidf_drift = drift
+            else:
+                self.tfidf_vectorizer = TfidfVectorizer(max_features=1000)
+                self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(cleaned_texts)
+                self.tfidf_drift = 0.0
+            self.vector_index = build_vector_index(self.embeddings)
+            self.part_number_index = self.build_part_number_index()
+            self.tfidf_columns = None
+            print(f"임베딩 생성 완료: {self.embeddings.shape} (TF-IDF 누적 변경 {self.tfidf_drift:.2f}, "
+                  f"검색 인덱스 {self.vector_index.kind})")
             return True
         except Exception as e:
             print(f"임베딩 생성 오류: {e}")
@@ -151,37 +288,77 @@ class ExcelRAGProcessor:
         text = re.sub(r"\s+", " ", text)
         return text.strip()
 
+    def get_vector_index(self):
+        if self.vector_index is None or len(self.vector_index) != len(self.embeddings):
+            self.vector_index = build_vector_index(self.embeddings)
+        return self.vector_index
+
+    def get_tfidf_columns(self):
+        if self.tfidf_columns is None or self.tfidf_columns.shape != self.tfidf_matrix.shape:
+            self.tfidf_columns = self.tfidf_matrix.tocsc()
+        return self.tfidf_columns
+
+    def tfidf_term_scores(self, query_tfidf):
+        """질의 단어가 하나라도 있는 행만 TF-IDF 점수 계산 → (행 id 오름차순, 점수). 전체 행 밀집 배열을 만들지 않음"""
+        columns = self.get_tfidf_columns()[:, query_tfidf.indices]
+        weights = columns.data * np.repeat(query_tfidf.data, np.diff(columns.indptr))
+        ids, inverse = np.unique(columns.indices, return_inverse=True)
+        return ids, np.bincount(inverse, weights=weights, minlength=len(ids))
+
+    def build_part_number_index(self):
+        return PartNumberIndex(doc['metadata'].get('part_number', '') for doc in self.documents)
+
+    def get_part_number_index(self):
+        if self.part_number_index is None or len(self.part_number_index) != len(self.documents):
+            self.part_number_index = self.build_part_number_index()
+        return self.part_number_index
+
     def search_documents(self, query, top_k=5, min_similarity=0.35):
         if self.embeddings is None:
             return []
         try:
             query_cleaned = self.clean_text(query)
-            query_embedding = embedding_model.encode([query_cleaned])
+            query_embedding = embedding_model.encode([query_cleaned])[0]
+            index = self.get_vector_index()
 
-            similarities = cosine_similarity(query_embedding, self.embeddings)[0]
             query_tfidf = self.tfidf_vectorizer.transform([query_cleaned])
-            tfidf_similarities = (self.tfidf_matrix * query_tfidf.T).toarray().flatten()
 
-            combined_scores = 0.7 * similarities + 0.3 * tfidf_similarities
-
-            # 부품번호 패턴 감지 시 부분일치 가중치 부여
+            # 부품번호 패턴 감지 시 부분일치 가중치 부여 대상 (문서 id 오름차순)
+            boosted_ids = np.zeros(0, dtype=np.int64)
             m = re.search(r'[A-Z0-9\-]{6,}', query.upper())
             if m:
-                qpart = m.group(0)
-                for i, doc in enumerate(self.documents):
-                    pn = str(doc['metadata'].get('part_number', '')).upper()
-                    if pn and qpart in pn:
-                        combined_scores[i] += 0.3
+                boosted_ids = self.get_part_number_index().lookup(m.group(0))
+
+            # 점수 계산 대상: exact 는 전체, ANN 은 임베딩 후보 ∪ TF-IDF 상위 ∪ 부품번호 일치 행 (후보만 점수 계산)
+            if index.exact:
+                candidates = np.arange(len(self.documents))
+                similarities = index.scores(query_embedding)
+                tfidf_similarities = (self.tfidf_matrix * query_tfidf.T).toarray().flatten()
+            else:
+                n_candidates = max(top_k * ANN_CANDIDATE_FACTOR, 50)
+                ann_ids, _ = index.search(query_embedding, n_candidates)
+                term_ids, term_scores = self.tfidf_term_scores(query_tfidf)
+                tfidf_ids = term_ids[top_k_indices(term_scores, n_candidates)]
+                candidates = np.union1d(np.union1d(ann_ids, tfidf_ids), boosted_ids)
+                similarities = index.scores(query_embedding, candidates)
+                # 질의 단어가 없는 후보의 TF-IDF 점수는 0
+                tfidf_similarities = np.zeros(len(candidates))
+                pos = np.searchsorted(term_ids, candidates)
+                hit = pos < len(term_ids)
+                hit[hit] = term_ids[pos[hit]] == candidates[hit]
+                tfidf_similarities[hit] = term_scores[pos[hit]]
+            boost = np.where(np.isin(candidates, boosted_ids, assume_unique=True), PART_NUMBER_BOOST, 0.0)
+
+            combined_scores = 0.7 * similarities + 0.3 * tfidf_similarities + boost
 
-            top_indices = np.argsort(combined_scores)[::-1][:top_k]
             results = []
-            for idx in top_indices:
-                if combined_scores[idx] >= min_similarity:
+            for pos in top_k_indices(combined_scores, top_k):
+                if combined_scores[pos] >= min_similarity:
                     results.append({
-                        'document': self.documents[idx],
-                        'similarity': float(combined_scores[idx]),
-                        'semantic_sim': float(similarities[idx]),
-                        'tfidf_sim': float(tfidf_similarities[idx])
+                        'document': self.documents[candidates[pos]],
+                        'similarity': float(combined_scores[pos]),
+                        'semantic_sim': float(similarities[pos]),
+                        'tfidf_sim': float(tfidf_similarities[pos])
                     })
             return results
         except Exception as e:
@@ -194,6 +371,9 @@ class ExcelRAGProcessor:
             save_pickle(self.embeddings, "excel_embeddings.pkl")
             save_pickle(self.tfidf_vectorizer, "excel_tfidf_vectorizer.pkl")
             save_pickle(self.tfidf_matrix, "excel_tfidf_matrix.pkl")
+            save_pickle({"fingerprint": self.fingerprint, "built_at": self.built_at,
+                         "content_hashes": self.content_hashes, "embedding_model": self.embedding_model_name,
+                         "tfidf_drift": self.tfidf_drift}, "excel_index_meta.pkl")
             print("처리된 데이터 저장 완료")
             return True
         except Exception as e:
@@ -206,60 +386,71 @@ class ExcelRAGProcessor:
             self.embeddings = load_pickle("excel_embeddings.pkl")
             self.tfidf_vectorizer = load_pickle("excel_tfidf_vectorizer.pkl")
             self.tfidf_matrix = load_pickle("excel_tfidf_matrix.pkl")
+            # 지문이 없는(이전 버전) 저장본은 그대로 쓰되 다음 갱신 확인에서 재구축됨
+            if os.path.exists(os.path.join(MODEL_DIR, "excel_index_meta.pkl")):
+                meta = load_pickle("excel_index_meta.pkl")
+                self.fingerprint, self.built_at = meta.get("fingerprint"), meta.get("built_at")
+                self.content_hashes = meta.get("content_hashes")
+                self.embedding_model_name = meta.get("embedding_model", EMBEDDING_MODEL_NAME)
+                self.tfidf_drift = meta.get("tfidf_drift", 0.0)
+            n_docs = len(self.documents)
+            if len(self.embeddings) != n_docs or self.tfidf_matrix.shape[0] != n_docs:
+                print(f"데이터 로드 오류: 저장본 불일치 (문서 {n_docs}, 임베딩 {len(self.embeddings)}, "
+                      f"TF-IDF {self.tfidf_matrix.shape[0]})")
+                return False
+            self.vector_index = build_vector_index(self.embeddings)
+            self.part_number_index = self.build_part_number_index()
+            self.tfidf_columns = None
             print(f"처리된 데이터 로드 완료: {len(self.documents)}개 문서")
             return True
         except Exception as e:
             print(f"데이터 로드 오류: {e}")
             return False
 
-# 전역 RAG 인스턴스
-rag_processor = ExcelRAGProcessor()
+# 전역 RAG 인덱스: 원본(pcb_parts / 워크북) 지문이 바뀔 때만 재구축 후 원자적 교체
+#   ZZIRIT_RAG_POLL_SEC : 감시 스레드의 지문 확인 주기(초), ZZIRIT_RAG_WATCH=0 이면 감시 스레드 비활성
+#   ZZIRIT_RAG_FRESH_SEC: 요청 경로에서 마지막 확인 후 이 시간(초)이 지났으면 요청 처리 전에 지문 확인
+#                         (답변이 반영하는 재고 데이터는 최대 이 시간만큼 늦음, 0 이면 요청 경로 확인 안 함)
+#   워커 프로세스 간 재구축/저장본 로드는 LLM_model/excel_index.lock 으로 직렬화
+rag_index = RagIndexManager(ExcelRAGProcessor,
+                            poll_interval=float(os.environ.get("ZZIRIT_RAG_POLL_SEC", 300)),
+                            fresh_interval=float(os.environ.get("ZZIRIT_RAG_FRESH_SEC", 10)),
+                            lock_path=os.path.join(MODEL_DIR, "excel_index.lock"))
+
+
+def get_rag_processor(fresh=False):
+    """
+    요청 경로용 활성 인덱스 (아직 없으면 빈 인덱스 → 검색 결과 없음).
+    fresh=True 면 ZZIRIT_RAG_FRESH_SEC 주기로 백그라운드 원본 확인을 요청 (재고 답변 경로, 기다리지 않음)
+    """
+    if fresh:
+        rag_index.ensure_fresh()
+    return rag_index.active() or ExcelRAGProcessor()
+
 
 def initialize_rag_system(excel_path=None):
-    """RAG 시스템 초기화"""
+    """RAG 시스템 초기화 (저장된 인덱스 로드 → 원본이 바뀌었을 때만 재구축 → 감시 시작)"""
     try:
         print("\n" + "="*60)
         print("[🚀] RAG 시스템 초기화 시작")
         print("="*60)
         
         if excel_path is None:
-            excel_path = os.path.join(os.path.dirname(__file__), "..", "services", "product_parts.xlsx")
+            excel_path = ExcelRAGProcessor.excel_path
         
         print(f"📁 Excel 파일 경로: {excel_path}")
         
-        # 1) 먼저 기존 처리된 데이터 로드 시도
-        print("[📦] 기존 처리된 데이터 로드 시도...")
-        if rag_processor.load_processed_data():
-            print("✅ 기존 처리된 데이터 로드 성공")
-            return True
-        
-        # 2) 기존 데이터가 없으면 Excel 파일에서 로드 시도
-        print("[📊] Excel 파일에서 데이터 로드 시도...")
-        if excel_path and os.path.exists(excel_path):
-            if rag_processor.load_excel_data(excel_path):
-                if rag_processor.create_embeddings():
-                    rag_processor.save_processed_data()
-                    print("✅ Excel 파일에서 데이터 로드 및 임베딩 생성 완료")
-                    return True
-                else:
-                    print("⚠️ Excel 파일 로드 성공했으나 임베딩 생성 실패")
-            else:
-                print("⚠️ Excel 파일 로드 실패")
+        # 저장된 인덱스 로드에는 모델이 필요 없으므로 기본은 첫 질의 때 로드. ZZIRIT_EMBEDDING_PREWARM=1 이면 미리 로드
+        if os.environ.get("ZZIRIT_EMBEDDING_PREWARM", "0") == "1":
+            embedding_model.prewarm()
+        ready = rag_index.load_or_build()
+        if os.environ.get("ZZIRIT_RAG_WATCH", "1") != "0":
+            rag_index.start()
         
-        # 3) 마지막으로 DB에서 직접 데이터 가져오기 시도
-        print("[💾] 데이터베이스에서 직접 데이터 가져오기 시도...")
-        try:
-            if rag_processor.load_excel_data_from_db():
-                if rag_processor.create_embeddings():
-                    rag_processor.save_processed_data()
-                    print("✅ 데이터베이스에서 데이터 로드 및 임베딩 생성 완료")
-                    return True
-                else:
-                    print("⚠️ DB 데이터 로드 성공했으나 임베딩 생성 실패")
-            else:
-                print("⚠️ DB 데이터 로드 실패")
-        except Exception as e:
-            print(f"⚠️ DB 데이터 로드 중 오류: {e}")
+        if ready:
+            status = rag_index.status()
+            print(f"✅ RAG 인덱스 준비 완료: {status['documents']}개 문서 (구축: {status['built_at'] or '이전 저장본'})")
+            return True
         
         print("❌ RAG 시스템 초기화 실패")
         print("💡 **문제 해결 방법:**")
@@ -314,14 +505,8 @@ def chat4():
         return jsonify({"message": {"role": "assistant", "content": "질문을 입력해 주세요."}})
 
     try:
-        print("🔄 채팅 요청 - DB에서 최신 데이터 가져오는 중...")
-        if rag_processor.load_excel_data_from_db():
-            if rag_processor.create_embeddings():
-                print("✅ 최신 데이터로 임베딩 재생성 완료")
-            else:
-                print("⚠️ 임베딩 재생성 실패")
-
-        search_results = rag_processor.search_documents(user_input, top_k=5, min_similarity=0.35)
+        # 인덱스는 원본이 바뀔 때만 백그라운드에서 재구축 (rag_index) → 요청 경로는 검색만
+        search_results = get_rag_processor(fresh=True).search_documents(user_input, top_k=5, min_similarity=0.35)
 
         if search_results:
             response = generate_rag_response(user_input, search_results)
@@ -1055,26 +1240,14 @@ def inventory_chat():
                 "success": True
             })
 
-        # 2) 최신 데이터 로드 및 임베딩
-        print("[📊] DB에서 최신 재고 데이터 가져오는 중...")
-        db_update_success = False
-        
-        try:
-            if rag_processor.load_excel_data_from_db():
-                if rag_processor.create_embeddings():
-                    print("✅ 최신 데이터로 임베딩 재생성 완료")
-                    db_update_success = True
-                else:
-                    print("⚠️ 임베딩 재생성 실패")
-            else:
-                print("⚠️ DB 데이터 로드 실패")
-        except Exception as e:
-            print(f"⚠️ DB 데이터 로드 중 오류: {e}")
+        # 2) 활성 RAG 인덱스 (DB 변경 시에만 백그라운드 재구축 → 요청마다 임베딩하지 않음)
+        processor = get_rag_processor(fresh=True)
+        db_update_success = bool(processor.fingerprint and processor.fingerprint.get("db"))
         
         # 3) RAG 검색 (보수적 파라미터)
         search_results = []
         try:
-            search_results = rag_processor.search_documents(user_message, top_k=5, min_similarity=0.35)
+            search_results = processor.search_documents(user_message, top_k=5, min_similarity=0.35)
             print(f"[🔍] 검색 결과: {len(search_results)}개 문서")
         except Exception as e:
             print(f"⚠️ RAG 검색 중 오류: {e}")
@@ -1217,10 +1390,7 @@ def quick_actions():
         }
         query = action_queries.get(action, action)
 
-        if rag_processor.load_excel_data():
-            rag_processor.create_embeddings()
-
-        search_results = rag_processor.search_documents(query, top_k=10, min_similarity=0.3)
+        search_results = get_rag_processor(fresh=True).search_documents(query, top_k=10, min_similarity=0.3)
         response = generate_inventory_specific_response(query, search_results, action)
 
         return jsonify({
@@ -1636,6 +1806,7 @@ def order_management():
 @chat4_bp.route('/health', methods=['GET'])
 def inventory_health():
     try:
+        rag_processor = get_rag_processor()
         has_documents = len(rag_processor.documents) > 0
         has_embeddings = rag_processor.embeddings is not None
 
@@ -1664,7 +1835,9 @@ def inventory_health():
                 "moisture_management": "활성화됨",
                 "order_management": "활성화됨",
                 "part_search": "활성화됨"
-            }
+            },
+            "rag_index": rag_index.status(),
+            "embedding_model": embedding_model.status()
         })
 
     except Exception as e:
@@ -5,7 +5,7 @@ from api.chat_1 import chat1_bp
 from api.chat_4 import chat4_bp
 
 from api.send_email import email_bp
-from api.api_server import api_bp as api_server_bp
+from api.api_server import api_bp as api_server_bp, start_model_watch
 import os
 from dotenv import load_dotenv
 import logging
@@ -30,6 +30,8 @@ app.register_blueprint(chat4_bp, url_prefix="/api")
 app.register_blueprint(email_bp, url_prefix="/api")
 
 app.register_blueprint(api_server_bp, url_prefix="/api")
+# 모델 번들 감시 스레드 (ZZIRIT_MODEL_WATCH=0 이면 시작 안 함)
+start_model_watch()
 
 @app.route("/")
 def index():
@@ -0,0 +1,191 @@
+# crawler_bench.py - get_all_menu_data 부하 측정 (로컬 fake_backend.py 대상)
+#  - 크기별로 fake_backend 를 별도 프로세스로 띄우고 같은 조건에서 반복 측정
+#  - cold      : 새 DataCrawler (캐시/ETag/메뉴 memo 없음) → 전체 다운로드 + 후처리
+#  - warm      : 같은 크롤러 재호출 (fetch TTL 0 → 조건부 GET 304 + 메뉴 결과 재사용 경로)
+#  - concurrent: 새 크롤러에서 --concurrency 개 동시 호출 (single-flight 포함) → 처리량(crawls/s)
+#  - memory    : cold 1회를 tracemalloc 으로 감싸 파이썬 할당 피크, 프로세스 최대 RSS
+#
+# 사용 예:
+#   python crawler_bench.py                                  # 1k/10k/100k
+#   python crawler_bench.py --sizes 1000,10000 --repeat 5 --latency 50 --json bench.json
+#   python crawler_bench.py --url http://127.0.0.1:5055      # 이미 떠 있는 백엔드 대상 (크기 1회)
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from data_crawler import DataCrawler  # noqa: E402
+
+CRAWL_TIMEOUT = 600
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def fake_backend(size, latency, seed, startup_timeout=120):
+    """fake_backend.py 를 별도 프로세스로 실행하고 /api/health 응답까지 대기"""
+    port = _free_port()
+    cmd = [sys.executable, os.path.join(HERE, "fake_backend.py"), "--port", str(port),
+           "--records", str(size), "--latency", str(latency), "--seed", str(seed)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"fake_backend 종료됨: {proc.stderr.read().decode(errors='replace')[-500:]}")
+            try:
+                if requests.get(f"{url}/api/health", timeout=1).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake_backend 시작 대기 시간 초과")
+            time.sleep(0.2)
+        yield url
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+@contextlib.contextmanager
+def _quiet():
+    """크롤러 로그(print) 억제 — 크롤러 루프 스레드 출력도 sys.stdout 을 따르므로 함께 억제됨"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _new_crawler(url):
+    with _quiet():
+        c = DataCrawler(url)
+    c.fetch_ttl = 0  # 반복 측정이 TTL 캐시에 가려지지 않도록
+    return c
+
+
+def _crawl(c, n=1):
+    async def _run():
+        import asyncio
+        return await asyncio.gather(*[c.get_all_menu_data() for _ in range(n)])
+    with _quiet():
+        results = c.run_sync(_run(), timeout=CRAWL_TIMEOUT)
+    failed = [m for r in results for m, v in (r or {None: None}).items() if v is None]
+    if failed:
+        raise RuntimeError(f"크롤링 실패 메뉴: {failed}")
+    return results
+
+
+def _timed(fn):
+    t = time.perf_counter()
+    fn()
+    return time.perf_counter() - t
+
+
+def _summary(samples):
+    return {"p50_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1)}
+
+
+def _server_stats(url):
+    try:
+        return requests.get(f"{url}/__stats", timeout=5).json()
+    except requests.RequestException:
+        return None
+
+
+def bench_one(url, repeat, concurrency):
+    cold, warm = [], []
+    for _ in range(repeat):
+        c = _new_crawler(url)
+        try:
+            cold.append(_timed(lambda: _crawl(c)))
+            warm.append(_timed(lambda: _crawl(c)))
+        finally:
+            c.close()
+
+    c = _new_crawler(url)
+    try:
+        wall = _timed(lambda: [_crawl(c, concurrency) for _ in range(repeat)])
+    finally:
+        c.close()
+
+    c = _new_crawler(url)
+    try:
+        tracemalloc.start()
+        _crawl(c)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        c.close()
+
+    return {
+        "cold": _summary(cold),
+        "warm": _summary(warm),
+        "concurrent": {"concurrency": concurrency,
+                       "crawls_per_sec": round(concurrency * repeat / wall, 2)},
+        "py_peak_mb": round(peak / 2**20, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "server": _server_stats(url),
+    }
+
+
+def _print_row(label, r):
+    print(f"{label:>8} | cold p50 {r['cold']['p50_ms']:>9.1f}ms (max {r['cold']['max_ms']:.1f}) | "
+          f"warm p50 {r['warm']['p50_ms']:>8.1f}ms | "
+          f"{r['concurrent']['crawls_per_sec']:>7.2f} crawls/s @{r['concurrent']['concurrency']} | "
+          f"py peak {r['py_peak_mb']:>7.1f}MB | rss {r['max_rss_mb']:>7.1f}MB", flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="DataCrawler.get_all_menu_data 부하 측정")
+    ap.add_argument("--sizes", type=str, default="1000,10000,100000", help="엔드포인트별 레코드 수 목록")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--latency", type=float, default=20.0, help="fake_backend 응답 지연(ms)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--url", type=str, default=None, help="이미 실행 중인 백엔드 주소 (지정 시 서버를 띄우지 않음)")
+    ap.add_argument("--json", type=str, default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    results = {}
+    if args.url:
+        print(f"📏 crawler bench: {args.url}", flush=True)
+        results["external"] = bench_one(args.url.rstrip("/"), args.repeat, args.concurrency)
+        _print_row("external", results["external"])
+    else:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+        print(f"📏 crawler bench: sizes={sizes}, repeat={args.repeat}, latency={args.latency}ms", flush=True)
+        for size in sizes:
+            with fake_backend(size, args.latency, args.seed) as url:
+                results[str(size)] = bench_one(url, args.repeat, args.concurrency)
+            _print_row(str(size), results[str(size)])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.json}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
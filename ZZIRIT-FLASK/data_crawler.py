@@ -1,17 +1,134 @@
 import aiohttp
 import asyncio
+import atexit
+import concurrent.futures
+import contextlib
+import contextvars
+import copy
+import os
+import threading
+import time
 from datetime import datetime
 import json
 import re
 import requests
 from typing import Optional, Dict, Any
 
+from services.circuit_breaker import CircuitBreaker
+from services.defect_labels import normalize_defect_type
+
+# 메뉴 크롤링 중 사용한 엔드포인트와 그 응답 버전 ({endpoint: version}) — 메뉴 결과 재사용 판정용
+_crawl_deps = contextvars.ContextVar("crawl_deps", default=None)
+# 호출자 마감 시각 (time.monotonic 기준). 공유 API 호출을 기다리다 마감이 지나면 그 호출자만 포기
+_crawl_deadline = contextvars.ContextVar("crawl_deadline", default=None)
+
+# 백엔드(Node) 기본 주소. ZZIRIT_CRAWLER_BASE_URL 로 교체 (예: 로컬 fake_backend.py)
+DEFAULT_BASE_URL = "http://43.201.249.204:5000"
+
+
 class DataCrawler:
     """각 메뉴의 데이터를 크롤링하는 클래스 (개선된 버전)"""
     
-    def __init__(self, base_url="http://43.201.249.204:5000"):
-        self.base_url = base_url
+    def __init__(self, base_url=None):
+        self.base_url = (base_url or os.environ.get("ZZIRIT_CRAWLER_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        # 전용 이벤트 루프 스레드 + 공유 세션 (keep-alive 커넥션 재사용)
+        #   Flask 동기 핸들러는 run_sync() 로 코루틴을 이 루프에 제출
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._session = None
+        # fetch_api_data 단일 비행(single-flight) + 단기 TTL 캐시
+        #   같은 URL 동시 요청은 진행 중인 작업 1개를 공유, 완료 후 fetch_ttl 초 동안은 캐시 응답
+        self.fetch_ttl = float(os.environ.get("ZZIRIT_CRAWLER_FETCH_TTL", 5))
+        self._fetch_cache = {}
+        self._inflight = {}
+        self._pagination_styles = {}
+        # 조건부 GET: URL별 ETag/Last-Modified + 마지막 본문(후처리 완료) + 버전
+        self._validators = {}
+        # 메뉴별 마지막 결과와 의존 엔드포인트 버전 (모두 304면 후처리 없이 재사용)
+        self._menu_memo = {}
+        # menu3 불량 레코드 누적 집계 상태 (_aggregate_defects)
+        self._menu3_state = None
+        # 엔드포인트별 회로 차단기 (_breaker) + 요청 1건 타임아웃
+        self._breakers = {}
+        self.request_timeout = float(os.environ.get("ZZIRIT_CRAWLER_REQUEST_TIMEOUT", 30))
         print(f"🌐 DataCrawler 초기화 - 서버: {self.base_url}")
+
+    def _ensure_loop(self):
+        """전용 이벤트 루프 스레드를 (처음 사용할 때) 시작 — gunicorn fork 이후에 생성되도록 지연 시작"""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed() or not self._loop_thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="crawler-loop", daemon=True)
+                thread.start()
+                self._loop, self._loop_thread, self._session = loop, thread, None
+            return self._loop
+
+    def run_sync(self, coro, timeout=45):
+        """
+        동기 코드에서 코루틴을 전용 루프에 제출하고 결과를 기다림 (타임아웃 시 작업 취소).
+        timeout 은 코루틴 안의 API 대기 마감으로도 전달 → 느린 엔드포인트는 기다리지 않고 None 처리
+        (응답 후처리 시간으로 마감 전 최대 1초(timeout 의 20%)를 남겨 둠)
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("crawler 루프 스레드 안에서는 run_sync 를 호출할 수 없습니다.")
+        future = asyncio.run_coroutine_threadsafe(self._with_deadline(coro, time.monotonic() + timeout - min(1.0, timeout * 0.2)), loop)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    @staticmethod
+    async def _with_deadline(coro, deadline):
+        token = _crawl_deadline.set(deadline)
+        try:
+            return await coro
+        finally:
+            _crawl_deadline.reset(token)
+
+    def submit(self, coro):
+        """코루틴을 전용 루프에 제출만 하고 concurrent.futures.Future 반환 (백그라운드 갱신용)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def _get_session(self):
+        """전용 루프용 공유 세션 (커넥션 풀은 요청 간 유지)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                connector=aiohttp.TCPConnector(limit=20, limit_per_host=10, keepalive_timeout=60),
+            )
+        return self._session
+
+    @contextlib.asynccontextmanager
+    async def _session_scope(self):
+        """전용 루프에서는 공유 세션, 다른 루프(asyncio.run 테스트 등)에서는 1회용 세션"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is self._loop:
+            yield await self._get_session()
+        else:
+            timeout = aiohttp.ClientTimeout(total=30)
+            connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
+            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+                yield session
+
+    def close(self):
+        """공유 세션 종료 + 루프 정지 (프로세스 종료 시 atexit 로 호출)"""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._loop_thread.is_alive():
+            return
+        if self._session is not None and not self._session.closed:
+            try:
+                asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=5)
+            except Exception as e:
+                print(f"⚠️ 크롤러 세션 종료 오류: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop_thread.join(timeout=5)
     
     def get_pcb_name(self, pcb_id):
         """PCB ID를 실제 PCB 이름으로 변환"""
@@ -181,24 +298,121 @@ class DataCrawler:
         return pagination_result
     
     async def fetch_api_data(self, endpoint):
+        """API 데이터 가져오기 (동시 요청 공유 + 단기 캐시). 호출자마다 독립된 사본을 반환"""
+        data = await self._fetch_shared(endpoint)
+        deps = _crawl_deps.get()
+        if deps is not None:
+            validator = self._validators.get(f"{self.base_url}{endpoint}")
+            # 실패(None)는 "변경 없음"이 아니므로 버전 없음으로 기록 → 메뉴 결과 재사용 안 함
+            deps[endpoint] = validator["version"] if validator is not None and data is not None else None
+        return data
+
+    async def _fetch_shared(self, endpoint):
+        url = f"{self.base_url}{endpoint}"
+        cached = self._fetch_cache.get(url)
+        if cached is not None and time.monotonic() - cached[0] < self.fetch_ttl:
+            print(f"♻️ API 캐시 사용: {endpoint}")
+            return copy.deepcopy(cached[1])
+
+        loop = asyncio.get_running_loop()
+        key = (loop, url)
+        task = self._inflight.get(key)
+        if task is None:
+            task = loop.create_task(self._fetch_api_data_uncached(endpoint))
+            self._inflight[key] = task
+
+            def _done(t, key=key, url=url):
+                self._inflight.pop(key, None)
+                if not t.cancelled() and t.exception() is None and t.result() is not None:
+                    self._fetch_cache[url] = (time.monotonic(), t.result())
+            task.add_done_callback(_done)
+        else:
+            print(f"🔗 진행 중인 API 호출 공유: {endpoint}")
+        # 한 호출자가 타임아웃/취소돼도 공유 작업은 계속 진행 (끝나면 캐시에 반영)
+        deadline = _crawl_deadline.get()
+        if deadline is None:
+            return copy.deepcopy(await asyncio.shield(task))
+        try:
+            return copy.deepcopy(await asyncio.wait_for(asyncio.shield(task), max(0.0, deadline - time.monotonic())))
+        except asyncio.TimeoutError:
+            print(f"⏳ 요청 마감 초과 - 응답 대기 중단: {endpoint}")
+            return None
+
+    def _breaker(self, endpoint):
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+        return breaker
+
+    def breaker_status(self):
+        """엔드포인트별 회로 차단기 상태"""
+        return {endpoint: b.status() for endpoint, b in list(self._breakers.items())}
+
+    def clear_fetch_cache(self):
+        """fetch_api_data 단기 캐시 비우기"""
+        self._fetch_cache.clear()
+
+    async def _fetch_api_data_uncached(self, endpoint):
+        """조건부 GET: 저장된 ETag/Last-Modified 를 보내고 304 면 직전 본문 재사용"""
+        url = f"{self.base_url}{endpoint}"
+        validator = self._validators.get(url)
+        headers = {}
+        if validator is not None:
+            if validator["etag"]:
+                headers['If-None-Match'] = validator["etag"]
+            if validator["last_modified"]:
+                headers['If-Modified-Since'] = validator["last_modified"]
+        breaker = self._breaker(endpoint)
+        if not breaker.allow():
+            print(f"⛔ 회로 차단 중 - 요청 생략: {endpoint}")
+            return None
+        meta = {}
+        started = time.monotonic()
+        data = None
+        try:
+            data = await self._request_api_data(endpoint, headers, meta)
+        finally:
+            breaker.record(data is not None or bool(meta.get("not_modified")), time.monotonic() - started)
+        if meta.get("not_modified") and validator is not None:
+            print(f"♻️ 304 Not Modified - 이전 응답 재사용: {endpoint}")
+            return validator["data"]
+        if data is not None:
+            # 페이지네이션으로 합친 응답은 1페이지 304 만으로 2페이지 이후가 그대로인지 알 수 없으므로 검증자 저장 안 함
+            if (meta.get("etag") or meta.get("last_modified")) and not meta.get("paginated"):
+                self._validators[url] = {
+                    "etag": meta.get("etag"),
+                    "last_modified": meta.get("last_modified"),
+                    "data": data,
+                    "version": (validator["version"] + 1) if validator is not None else 1,
+                }
+            else:
+                # 검증자 없는(또는 여러 페이지) 200: 새 본문이지만 버전을 매길 수 없으므로 항목 제거 → 메뉴 결과 재사용 안 함
+                self._validators.pop(url, None)
+        return data
+
+    async def _request_api_data(self, endpoint, conditional_headers=None, meta=None):
         """API 데이터 가져오기 (개선된 오류 처리 및 로깅, 페이지네이션 지원)"""
+        meta = meta if meta is not None else {}
         try:
             url = f"{self.base_url}{endpoint}"
             print(f"🔍 API 호출 시도: {url}")
             
-            timeout = aiohttp.ClientTimeout(total=30)  # 타임아웃 증가
-            connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
-            
-            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            async with self._session_scope() as session:
                 # 첫 번째 요청 - 기본 데이터
                 async with session.get(url, headers={
                     'Accept': 'application/json',
-                    'User-Agent': 'PCB-Manager-Crawler/1.0'
+                    'User-Agent': 'PCB-Manager-Crawler/1.0',
+                    **(conditional_headers or {})
                 }) as response:
                     
                     print(f"📡 응답 상태: {response.status} - {url}")
                     print(f"📄 Content-Type: {response.headers.get('content-type', 'unknown')}")
+                    meta["etag"] = response.headers.get('ETag')
+                    meta["last_modified"] = response.headers.get('Last-Modified')
                     
+                    if response.status == 304:
+                        meta["not_modified"] = True
+                        return None
                     if response.status == 200:
                         try:
                             data = await response.json()
@@ -215,9 +429,11 @@ class DataCrawler:
                                     # 만약 정확히 100개, 50개 등 딱 떨어지는 수라면 더 있을 가능성 체크
                                     if len(data) in [50, 100, 500, 1000]:
                                         print(f"⚠️ 데이터 개수가 {len(data)}개로 페이지네이션이 있을 수 있습니다.")
+                                        # 검증자(ETag/Last-Modified)는 1페이지만 대표 → 여러 페이지 응답에는 쓰지 않음
+                                        meta["paginated"] = True
                                         
                                         # 페이지네이션 파라미터로 더 많은 데이터 시도
-                                        additional_data = await self._fetch_paginated_data(session, url)
+                                        additional_data = await self._fetch_paginated_data(session, url, page_size=len(data))
                                         if additional_data:
                                             data.extend(additional_data)
                                             print(f"📈 페이지네이션으로 추가 데이터 수집: 총 {len(data)}개")
@@ -263,72 +479,111 @@ class DataCrawler:
             traceback.print_exc()
             return None
     
-    async def _fetch_paginated_data(self, session, base_url):
-        """페이지네이션으로 추가 데이터 가져오기"""
-        additional_data = []
-        page = 2
-        max_pages = 10  # 최대 10페이지까지만 시도
-        
+    # 페이지네이션 파라미터 형식 (엔드포인트별로 처음 한 번만 탐지 후 기억)
+    PAGINATION_STYLES = {
+        "page": lambda page, size: {'page': page},
+        "page_limit": lambda page, size: {'page': page, 'limit': size},
+        "offset_limit": lambda page, size: {'offset': (page - 1) * size, 'limit': size},
+        "skip_take": lambda page, size: {'skip': (page - 1) * size, 'take': size},
+    }
+    PAGINATION_CONCURRENCY = 4
+    PAGINATION_RETRY_SECONDS = 600  # 탐지 실패한 엔드포인트 재탐지 간격
+
+    async def _fetch_page(self, session, base_url, params):
+        """페이지 1개 요청 → (항목 리스트, 전체 개수). 실패는 (None, None), 빈 페이지는 ([], total)"""
+        params_str = '&'.join([f"{k}={v}" for k, v in params.items()])
+        separator = '&' if '?' in base_url else '?'
+        paginated_url = f"{base_url}{separator}{params_str}"
         try:
-            while page <= max_pages:
-                # 다양한 페이지네이션 파라미터 시도
-                for param_set in [
-                    {'page': page},
-                    {'page': page, 'limit': 100},
-                    {'offset': (page - 1) * 100, 'limit': 100},
-                    {'skip': (page - 1) * 100, 'take': 100}
-                ]:
-                    try:
-                        # URL에 파라미터 추가
-                        params_str = '&'.join([f"{k}={v}" for k, v in param_set.items()])
-                        separator = '&' if '?' in base_url else '?'
-                        paginated_url = f"{base_url}{separator}{params_str}"
-                        
-                        print(f"🔄 페이지네이션 시도: {paginated_url}")
-                        
-                        async with session.get(paginated_url, headers={
-                            'Accept': 'application/json',
-                            'User-Agent': 'PCB-Manager-Crawler/1.0'
-                        }) as response:
-                            
-                            if response.status == 200:
-                                page_data = await response.json()
-                                
-                                if isinstance(page_data, list) and len(page_data) > 0:
-                                    print(f"✅ 페이지 {page} 데이터 수집: {len(page_data)}개")
-                                    additional_data.extend(page_data)
-                                    page += 1
-                                    break  # 성공하면 다음 페이지로
-                                elif isinstance(page_data, dict):
-                                    if 'data' in page_data and isinstance(page_data['data'], list) and len(page_data['data']) > 0:
-                                        print(f"✅ 페이지 {page} 데이터 수집: {len(page_data['data'])}개")
-                                        additional_data.extend(page_data['data'])
-                                        page += 1
-                                        break
-                                    else:
-                                        # 더 이상 데이터가 없음
-                                        print(f"📋 페이지 {page}: 더 이상 데이터가 없습니다.")
-                                        return additional_data
-                                else:
-                                    # 빈 배열이거나 데이터가 없음
-                                    print(f"📋 페이지 {page}: 데이터가 없습니다.")
-                                    return additional_data
-                            else:
-                                print(f"❌ 페이지 {page} 요청 실패: HTTP {response.status}")
-                                continue  # 다음 파라미터 시도
-                    except Exception as e:
-                        print(f"❌ 페이지 {page} 오류: {e}")
-                        continue
-                else:
-                    # 모든 파라미터 시도했지만 실패
-                    print(f"❌ 페이지 {page}: 모든 파라미터 시도 실패")
-                    break
-            
-            return additional_data
-            
+            async with session.get(paginated_url, headers={
+                'Accept': 'application/json',
+                'User-Agent': 'PCB-Manager-Crawler/1.0'
+            }) as response:
+                if response.status != 200:
+                    print(f"❌ 페이지 요청 실패: HTTP {response.status} - {paginated_url}")
+                    return None, None
+                total = response.headers.get('X-Total-Count')
+                page_data = await response.json()
         except Exception as e:
-            print(f"❌ 페이지네이션 처리 오류: {e}")
-            return additional_data
+            print(f"❌ 페이지 요청 오류: {paginated_url} - {e}")
+            return None, None
+
+        if isinstance(page_data, dict):
+            for key in ('total', 'totalCount', 'total_count', 'count'):
+                if isinstance(page_data.get(key), int):
+                    total = page_data[key]
+                    break
+            items = page_data.get('data') if isinstance(page_data.get('data'), list) else []
+        elif isinstance(page_data, list):
+            items = page_data
+        else:
+            items = []
+        try:
+            total = int(total) if total is not None else None
+        except (TypeError, ValueError):
+            total = None
+        return items, total
+
+    async def _fetch_paginated_data(self, session, base_url, page_size=100):
+        """
+        페이지네이션으로 추가 데이터 가져오기 (2페이지부터, 최대 10페이지)
+        - 2페이지에서 파라미터 형식을 탐지해 엔드포인트별로 기억 (다음 호출부터는 탐지 생략)
+        - 나머지 페이지는 세마포어로 동시 요청 수를 제한해 병렬 조회, 결과는 페이지 순서대로 합침
+        """
+        max_pages = 10  # 최대 10페이지까지만 시도
+        known = self._pagination_styles.get(base_url)
+        if known is not None and known[0] is None and time.monotonic() - known[1] < self.PAGINATION_RETRY_SECONDS:
+            return []
+
+        # ── 2페이지: 형식 탐지 (기억된 형식이 있으면 그것만)
+        styles = [known[0]] if known is not None and known[0] is not None else list(self.PAGINATION_STYLES)
+        style, first, total = None, None, None
+        for name in styles:
+            print(f"🔄 페이지네이션 시도 ({name}): {base_url}")
+            items, total = await self._fetch_page(session, base_url, self.PAGINATION_STYLES[name](2, page_size))
+            if items is not None:
+                style, first = name, items
+                break
+        if style is None:
+            print(f"❌ 페이지 2: 모든 파라미터 시도 실패")
+            self._pagination_styles[base_url] = (None, time.monotonic())
+            return []
+        self._pagination_styles[base_url] = (style, time.monotonic())
+        if not first:
+            print(f"📋 페이지 2: 데이터가 없습니다.")
+            return []
+        print(f"✅ 페이지 2 데이터 수집: {len(first)}개 (형식: {style})")
+
+        pages = {2: first}
+        semaphore = asyncio.Semaphore(self.PAGINATION_CONCURRENCY)
+
+        async def fetch(page):
+            async with semaphore:
+                items, _ = await self._fetch_page(session, base_url, self.PAGINATION_STYLES[style](page, page_size))
+                return page, items
+
+        if total is not None:
+            # 전체 개수를 알면 남은 페이지를 한 번에 병렬 요청
+            last_page = min(max_pages, -(-total // page_size))
+            results = await asyncio.gather(*[fetch(p) for p in range(3, last_page + 1)])
+            pages.update(results)
+        else:
+            # 전체 개수를 모르면 동시성 크기 단위로 병렬 요청, 빈 페이지가 나오면 중단
+            page = 3
+            while page <= max_pages and pages.get(page - 1):
+                batch = range(page, min(max_pages, page + self.PAGINATION_CONCURRENCY - 1) + 1)
+                pages.update(await asyncio.gather(*[fetch(p) for p in batch]))
+                page = batch[-1] + 1
+
+        additional_data = []
+        for page in sorted(pages):
+            items = pages[page]
+            if not items:  # 실패/빈 페이지 이후는 버림 (순서 보장)
+                print(f"📋 페이지 {page}: 더 이상 데이터가 없습니다.")
+                break
+            print(f"✅ 페이지 {page} 데이터 수집: {len(items)}개")
+            additional_data.extend(items)
+        return additional_data
     
     async def crawl_menu1_data(self):
         """PCB 대시보드 데이터 크롤링 (메뉴1 새로운 구조 반영)"""
@@ -698,6 +953,181 @@ class DataCrawler:
             "data_source": "fallback"
         }
     
+    @staticmethod
+    def _new_defect_state():
+        """menu3 누적 집계 상태"""
+        return {
+            'keys': [],
+            'pcb_groups': {},
+            'all_defect_types': {},
+            'total_defects': 0,
+            'total_defect_instances': 0
+        }
+
+    @staticmethod
+    def _defect_record_key(item):
+        """불량 검사 레코드 식별 키 (id 계열 우선, 없으면 pcb_id + 시각). 없으면 None"""
+        for k in ('id', 'inspection_id', 'defect_id'):
+            if item.get(k) is not None:
+                return (k, item[k])
+        ts = item.get('created_at') or item.get('inspected_at') or item.get('timestamp')
+        if ts is not None:
+            return ('ts', item.get('pcb_id'), ts)
+        return None
+
+    def _aggregate_defects(self, response):
+        """
+        /api/user/pcb-defect 응답을 PCB별/유형별로 누적 집계.
+        직전 응답이 이번 응답의 앞부분(같은 키, 같은 순서)이면 새로 붙은 레코드만 반영하고,
+        키가 없거나 중복/삭제/순서 변경이 있으면 전체를 다시 집계 (결과는 전체 집계와 동일)
+        비용: 레코드 키 계산과 앞부분 비교는 매 크롤링마다 응답 전체에 대해 O(n) (튜플 비교라 가벼움).
+        줄어드는 것은 레코드별 불량 파싱/집계(_fold_defect_item)로, 신규 레코드 수에만 비례
+        """
+        keys = [self._defect_record_key(item) for item in response]
+        keyed = None not in keys and len(set(keys)) == len(keys)
+        state = self._menu3_state
+        incremental = (
+            state is not None
+            and keyed
+            and len(state['keys']) <= len(keys)
+            and keys[:len(state['keys'])] == state['keys']
+        )
+        if not incremental:
+            state = self._new_defect_state()
+            start = 0
+        else:
+            start = len(state['keys'])
+            print(f"♻️ Menu3 누적 집계: 기존 {start}건 재사용, 신규 {len(keys) - start}건 반영")
+        for item in response[start:]:
+            self._fold_defect_item(state, item)
+        state['keys'] = keys
+        self._menu3_state = state if keyed else None
+        return state
+
+    def _fold_defect_item(self, state, item):
+        """
+        검사 레코드 1건을 집계 상태에 반영.
+        누적 상태는 프로세스가 살아 있는 동안 유지되므로 원본 레코드는 보관하지 않고 메뉴가 쓰는 집계만 남김
+        """
+        pcb_id = item.get('pcb_id', 'unknown')
+        if pcb_id not in state['pcb_groups']:
+            state['pcb_groups'][pcb_id] = {
+                'defect_count': 0,
+                'total_inspections': 0,
+                'defect_types': {},
+                'all_defects': []
+            }
+
+        state['pcb_groups'][pcb_id]['total_inspections'] += 1
+
+        # 불량 검사인 경우
+        status = item.get('status', '')
+        if status == '불합격' or item.get('defect_result') or item.get('label'):
+            state['pcb_groups'][pcb_id]['defect_count'] += 1
+            state['total_defects'] += 1
+
+            # defect_result에서 불량 정보 수집 (개선된 버전)
+            defect_result = item.get('defect_result')
+
+            # API 응답 구조에 따라 불량 정보 처리
+            if defect_result:
+                # 기존 defect_result 처리 로직
+                print(f"🔍 PCB {pcb_id} 불량 데이터 처리: {type(defect_result)}")
+
+                # 다양한 데이터 구조 처리
+                defects_to_process = []
+
+                if isinstance(defect_result, list):
+                    print(f"  📋 리스트 형태 불량 데이터: {len(defect_result)}개")
+                    defects_to_process = defect_result
+                elif isinstance(defect_result, dict):
+                    print(f"  📋 딕셔너리 형태 불량 데이터: 1개")
+                    defects_to_process = [defect_result]
+                elif isinstance(defect_result, str):
+                    # 문자열인 경우 JSON 파싱 시도
+                    try:
+                        import json
+                        parsed = json.loads(defect_result)
+                        if isinstance(parsed, list):
+                            defects_to_process = parsed
+                        elif isinstance(parsed, dict):
+                            defects_to_process = [parsed]
+                        print(f"  📋 JSON 파싱된 불량 데이터: {len(defects_to_process)}개")
+                    except:
+                        # 단순 문자열을 라벨로 처리
+                        defects_to_process = [{'label': defect_result}]
+                        print(f"  📋 문자열을 라벨로 처리: '{defect_result}'")
+
+                # 불량 데이터 처리
+                for i, defect in enumerate(defects_to_process):
+                    if isinstance(defect, dict):
+                        original_label = defect.get('label', defect.get('type', defect.get('name', '기타')))
+                        defect_type = normalize_defect_type(original_label)
+                        state['total_defect_instances'] += 1
+
+                        print(f"    {i+1}. 원본: '{original_label}' -> 정규화: '{defect_type}'")
+
+                        # 전체 통계
+                        state['all_defect_types'][defect_type] = state['all_defect_types'].get(defect_type, 0) + 1
+
+                        # PCB별 통계
+                        state['pcb_groups'][pcb_id]['defect_types'][defect_type] = state['pcb_groups'][pcb_id]['defect_types'].get(defect_type, 0) + 1
+
+                        # 상세 불량 정보 저장
+                        state['pcb_groups'][pcb_id]['all_defects'].append({
+                            'id': defect.get('id', defect.get('defect_id', 0)),
+                            'type': defect_type,
+                            'confidence': round(defect.get('score', defect.get('confidence', 0)) * 100),
+                            'x1': defect.get('x1', defect.get('x', 0)),
+                            'y1': defect.get('y1', defect.get('y', 0)),
+                            'x2': defect.get('x2', defect.get('x', 0)),
+                            'y2': defect.get('y2', defect.get('y', 0)),
+                            'width': defect.get('width', defect.get('w', 0)),
+                            'height': defect.get('height', defect.get('h', 0))
+                        })
+                    elif isinstance(defect, str):
+                        # 문자열인 경우 직접 라벨로 처리
+                        defect_type = normalize_defect_type(defect)
+                        state['total_defect_instances'] += 1
+
+                        print(f"    {i+1}. 문자열 라벨: '{defect}' -> 정규화: '{defect_type}'")
+
+                        # 전체 통계
+                        state['all_defect_types'][defect_type] = state['all_defect_types'].get(defect_type, 0) + 1
+
+                        # PCB별 통계
+                        state['pcb_groups'][pcb_id]['defect_types'][defect_type] = state['pcb_groups'][pcb_id]['defect_types'].get(defect_type, 0) + 1
+
+            # API 응답에서 직접 불량 정보 추출 (defect_result가 없는 경우)
+            elif item.get('label') or item.get('class_index') is not None:
+                print(f"🔍 PCB {pcb_id} 직접 불량 데이터 처리")
+
+                # 직접 불량 정보 추출
+                original_label = item.get('label', '기타')
+                defect_type = normalize_defect_type(original_label)
+                state['total_defect_instances'] += 1
+
+                print(f"  📋 직접 불량 데이터: 원본 '{original_label}' -> 정규화 '{defect_type}'")
+
+                # 전체 통계
+                state['all_defect_types'][defect_type] = state['all_defect_types'].get(defect_type, 0) + 1
+
+                # PCB별 통계
+                state['pcb_groups'][pcb_id]['defect_types'][defect_type] = state['pcb_groups'][pcb_id]['defect_types'].get(defect_type, 0) + 1
+
+                # 상세 불량 정보 저장
+                state['pcb_groups'][pcb_id]['all_defects'].append({
+                    'id': item.get('id', 0),
+                    'type': defect_type,
+                    'confidence': round(item.get('score', 0) * 100),
+                    'x1': item.get('x1', 0),
+                    'y1': item.get('y1', 0),
+                    'x2': item.get('x2', 0),
+                    'y2': item.get('y2', 0),
+                    'width': item.get('width', 0),
+                    'height': item.get('height', 0)
+                })
+
     async def crawl_menu3_data(self):
         """PCB 불량 관리 데이터 크롤링 (개선된 버전 - 불량 유형별 분포 차트 지원)"""
         try:
@@ -724,9 +1154,6 @@ class DataCrawler:
                 if defect_items:
                     print(f"  - 첫 번째 불량 항목의 defect_result: {defect_items[0].get('defect_result')}")
                 
-                # PCB별로 그룹화
-                pcb_groups = {}
-                total_defects = 0
                 total_inspections = len(response)
                 
                 # 불량 유형별 통계 (메뉴3 모달 차트용)
@@ -740,168 +1167,12 @@ class DataCrawler:
                     "기타": "#6b7280"
                 }
                 
-                # 불량 유형 정규화 함수 (개선된 버전)
-                def normalize_defect_type(label):
-                    if not label:
-                        return "기타"
-                    
-                    normalized = label.lower().strip()
-                    
-                    # 정확한 매칭 우선
-                    exact_matches = {
-                        "missing_hole": "Missing_hole",
-                        "short": "Short", 
-                        "open_circuit": "Open_circuit",
-                        "spur": "Spur",
-                        "mouse_bite": "Mouse_bite",
-                        "spurious_copper": "Spurious_copper"
-                    }
-                    
-                    if normalized in exact_matches:
-                        return exact_matches[normalized]
-                    
-                    # 부분 매칭
-                    if "missing_hole" in normalized or "missing hole" in normalized or "hole_missing" in normalized or "홀 누락" in normalized:
-                        return "Missing_hole"
-                    elif "short" in normalized or "short_circuit" in normalized or "단락" in normalized or "쇼트" in normalized:
-                        return "Short"
-                    elif "open_circuit" in normalized or "open circuit" in normalized or "circuit_open" in normalized or "개방 회로" in normalized or "오픈" in normalized:
-                        return "Open_circuit"
-                    elif "spur" in normalized or "spur_defect" in normalized or "스퍼" in normalized or "스퍼어" in normalized:
-                        return "Spur"
-                    elif "mouse_bite" in normalized or "mouse bite" in normalized or "bite_mouse" in normalized or "마우스 바이트" in normalized or "마우스바이트" in normalized:
-                        return "Mouse_bite"
-                    elif "spurious_copper" in normalized or "spurious copper" in normalized or "copper_spurious" in normalized or "불량 구리" in normalized or "스퓨리어스" in normalized:
-                        return "Spurious_copper"
-                    else:
-                        # 원본 라벨을 그대로 반환하되, 첫 글자만 대문자로
-                        return label.capitalize() if label else "기타"
-                
-                # 전체 불량 유형별 통계 수집
-                all_defect_types = {}
-                total_defect_instances = 0
-                
-                for item in response:
-                    pcb_id = item.get('pcb_id', 'unknown')
-                    if pcb_id not in pcb_groups:
-                        pcb_groups[pcb_id] = {
-                            'inspections': [],
-                            'defect_count': 0,
-                            'total_inspections': 0,
-                            'defect_types': {},
-                            'all_defects': []
-                        }
-                    
-                    pcb_groups[pcb_id]['inspections'].append(item)
-                    pcb_groups[pcb_id]['total_inspections'] += 1
-                    
-                    # 불량 검사인 경우
-                    status = item.get('status', '')
-                    if status == '불합격' or item.get('defect_result') or item.get('label'):
-                        pcb_groups[pcb_id]['defect_count'] += 1
-                        total_defects += 1
-                
-                        # defect_result에서 불량 정보 수집 (개선된 버전)
-                        defect_result = item.get('defect_result')
-                        
-                        # API 응답 구조에 따라 불량 정보 처리
-                        if defect_result:
-                            # 기존 defect_result 처리 로직
-                            print(f"🔍 PCB {pcb_id} 불량 데이터 처리: {type(defect_result)}")
-                            
-                            # 다양한 데이터 구조 처리
-                            defects_to_process = []
-                            
-                            if isinstance(defect_result, list):
-                                print(f"  📋 리스트 형태 불량 데이터: {len(defect_result)}개")
-                                defects_to_process = defect_result
-                            elif isinstance(defect_result, dict):
-                                print(f"  📋 딕셔너리 형태 불량 데이터: 1개")
-                                defects_to_process = [defect_result]
-                            elif isinstance(defect_result, str):
-                                # 문자열인 경우 JSON 파싱 시도
-                                try:
-                                    import json
-                                    parsed = json.loads(defect_result)
-                                    if isinstance(parsed, list):
-                                        defects_to_process = parsed
-                                    elif isinstance(parsed, dict):
-                                        defects_to_process = [parsed]
-                                    print(f"  📋 JSON 파싱된 불량 데이터: {len(defects_to_process)}개")
-                                except:
-                                    # 단순 문자열을 라벨로 처리
-                                    defects_to_process = [{'label': defect_result}]
-                                    print(f"  📋 문자열을 라벨로 처리: '{defect_result}'")
-                            
-                            # 불량 데이터 처리
-                            for i, defect in enumerate(defects_to_process):
-                                if isinstance(defect, dict):
-                                    original_label = defect.get('label', defect.get('type', defect.get('name', '기타')))
-                                    defect_type = normalize_defect_type(original_label)
-                                    total_defect_instances += 1
-                                    
-                                    print(f"    {i+1}. 원본: '{original_label}' -> 정규화: '{defect_type}'")
-                                    
-                                    # 전체 통계
-                                    all_defect_types[defect_type] = all_defect_types.get(defect_type, 0) + 1
-                                    
-                                                                        # PCB별 통계
-                                    pcb_groups[pcb_id]['defect_types'][defect_type] = pcb_groups[pcb_id]['defect_types'].get(defect_type, 0) + 1
-                                    
-                                    # 상세 불량 정보 저장
-                                    pcb_groups[pcb_id]['all_defects'].append({
-                                        'id': defect.get('id', defect.get('defect_id', 0)),
-                                        'type': defect_type,
-                                        'confidence': round(defect.get('score', defect.get('confidence', 0)) * 100),
-                                        'x1': defect.get('x1', defect.get('x', 0)),
-                                        'y1': defect.get('y1', defect.get('y', 0)),
-                                        'x2': defect.get('x2', defect.get('x', 0)),
-                                        'y2': defect.get('y2', defect.get('y', 0)),
-                                        'width': defect.get('width', defect.get('w', 0)),
-                                        'height': defect.get('height', defect.get('h', 0))
-                                    })
-                                elif isinstance(defect, str):
-                                    # 문자열인 경우 직접 라벨로 처리
-                                    defect_type = normalize_defect_type(defect)
-                                    total_defect_instances += 1
-                                    
-                                    print(f"    {i+1}. 문자열 라벨: '{defect}' -> 정규화: '{defect_type}'")
-                                    
-                                    # 전체 통계
-                                    all_defect_types[defect_type] = all_defect_types.get(defect_type, 0) + 1
-                                    
-                                    # PCB별 통계
-                                    pcb_groups[pcb_id]['defect_types'][defect_type] = pcb_groups[pcb_id]['defect_types'].get(defect_type, 0) + 1
-                        
-                        # API 응답에서 직접 불량 정보 추출 (defect_result가 없는 경우)
-                        elif item.get('label') or item.get('class_index') is not None:
-                            print(f"🔍 PCB {pcb_id} 직접 불량 데이터 처리")
-                            
-                            # 직접 불량 정보 추출
-                            original_label = item.get('label', '기타')
-                            defect_type = normalize_defect_type(original_label)
-                            total_defect_instances += 1
-                            
-                            print(f"  📋 직접 불량 데이터: 원본 '{original_label}' -> 정규화 '{defect_type}'")
-                            
-                            # 전체 통계
-                            all_defect_types[defect_type] = all_defect_types.get(defect_type, 0) + 1
-                            
-                            # PCB별 통계
-                            pcb_groups[pcb_id]['defect_types'][defect_type] = pcb_groups[pcb_id]['defect_types'].get(defect_type, 0) + 1
-                            
-                            # 상세 불량 정보 저장
-                            pcb_groups[pcb_id]['all_defects'].append({
-                                'id': item.get('id', 0),
-                                'type': defect_type,
-                                'confidence': round(item.get('score', 0) * 100),
-                                'x1': item.get('x1', 0),
-                                'y1': item.get('y1', 0),
-                                'x2': item.get('x2', 0),
-                                'y2': item.get('y2', 0),
-                                'width': item.get('width', 0),
-                                'height': item.get('height', 0)
-                            })
+                # 전체 불량 유형별 통계 수집 (직전 크롤링 이후 새 레코드만 누적)
+                state = self._aggregate_defects(response)
+                pcb_groups = state['pcb_groups']
+                all_defect_types = state['all_defect_types']
+                total_defects = state['total_defects']
+                total_defect_instances = state['total_defect_instances']
                 
                 # PCB별 불량률 및 불량 유형 분포 계산
                 pcb_defect_rates = []
@@ -932,7 +1203,7 @@ class DataCrawler:
                         'total_inspections': data['total_inspections'],
                         'defect_rate': round(defect_rate, 1),
                         'defect_types': pcb_defect_types,
-                        'all_defects': data['all_defects'],
+                        'all_defects': list(data['all_defects']),  # 누적 상태와 분리
                         'total_defect_instances': total_pcb_defects
                     })
                 
@@ -2470,6 +2741,37 @@ class DataCrawler:
     
 
     
+    async def _crawl_menu(self, crawl_func):
+        """
+        메뉴 크롤링 + 결과 재사용.
+        직전 크롤링이 사용한 엔드포인트가 모두 조건부 GET 대상이고 버전이 그대로면(304)
+        파싱/집계를 다시 하지 않고 직전 결과의 사본을 반환.
+        """
+        name = crawl_func.__name__
+        memo = self._menu_memo.get(name)
+        if memo is not None and memo["deps"] and None not in memo["deps"].values():
+            check = {}
+            token = _crawl_deps.set(check)
+            try:
+                await asyncio.gather(*[self.fetch_api_data(ep) for ep in memo["deps"]])
+            finally:
+                _crawl_deps.reset(token)
+            if check == memo["deps"]:
+                print(f"♻️ {name}: 원본 데이터 변경 없음 - 이전 결과 재사용")
+                return copy.deepcopy(memo["result"])
+
+        deps = {}
+        token = _crawl_deps.set(deps)
+        try:
+            result = await crawl_func()
+        finally:
+            _crawl_deps.reset(token)
+        if result is not None and deps and None not in deps.values():
+            self._menu_memo[name] = {"deps": deps, "result": copy.deepcopy(result)}
+        else:
+            self._menu_memo.pop(name, None)
+        return result
+
     async def get_menu_data(self, menu_id):
         """메뉴별 데이터 가져오기"""
         menu_crawlers = {
@@ -2489,7 +2791,7 @@ class DataCrawler:
         if crawler:
             try:
                 print(f"🚀 {menu_id} 데이터 크롤링 시작...")
-                result = await crawler()
+                result = await self._crawl_menu(crawler)
                 print(f"✅ {menu_id} 데이터 크롤링 완료")
                 return result
             except Exception as e:
@@ -2506,11 +2808,11 @@ class DataCrawler:
             
             # 병렬 실행을 위한 태스크 생성
             tasks = [
-                ("menu1", self.crawl_menu1_data()),
-                ("menu2", self.crawl_menu2_data()), 
-                ("menu3", self.crawl_menu3_data()),
-                ("inventory", self.crawl_menu4_data()),
-                ("mes", self.crawl_mes_data())
+                ("menu1", self._crawl_menu(self.crawl_menu1_data)),
+                ("menu2", self._crawl_menu(self.crawl_menu2_data)), 
+                ("menu3", self._crawl_menu(self.crawl_menu3_data)),
+                ("inventory", self._crawl_menu(self.crawl_menu4_data)),
+                ("mes", self._crawl_menu(self.crawl_mes_data))
             ]
             
             # 모든 태스크를 병렬로 실행
@@ -2576,6 +2878,7 @@ class DataCrawler:
 
 # 전역 크롤러 인스턴스
 crawler = DataCrawler()
+atexit.register(crawler.close)
 
 # 테스트 함수
 async def test_crawler():
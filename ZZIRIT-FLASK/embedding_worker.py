@@ -0,0 +1,29 @@
+# embedding_worker.py - 공유 임베딩 워커 (services/embedding_service.py)
+#  - SentenceTransformer 를 이 프로세스에만 1회 로드하고, Flask 워커들은 로컬 소켓으로 encode 요청
+#  - Flask 쪽은 같은 주소를 ZZIRIT_EMBEDDING_SOCKET 으로 지정 (미지정 시 각 워커가 첫 사용 때 직접 로드)
+#  - 워커와 Flask 모두 같은 ZZIRIT_EMBEDDING_AUTHKEY 필요 (없으면 워커는 시작하지 않음)
+#  - 유닉스 소켓은 0600 으로 생성, TCP 는 루프백 주소만 허용
+#
+# 사용 예:
+#   export ZZIRIT_EMBEDDING_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+#   python embedding_worker.py --socket /tmp/zzirit-embedding.sock
+#   ZZIRIT_EMBEDDING_SOCKET=/tmp/zzirit-embedding.sock python app.py
+#   python embedding_worker.py --socket 127.0.0.1:5300     # TCP (같은 호스트/네트워크 네임스페이스 안에서만)
+
+import argparse
+import os
+
+from services.embedding_service import DEFAULT_EMBEDDING_MODEL, parse_address, serve
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ZZIRIT 공유 임베딩 워커")
+    ap.add_argument("--socket", default=os.environ.get("ZZIRIT_EMBEDDING_SOCKET", "/tmp/zzirit-embedding.sock"),
+                    help="유닉스 소켓 경로 또는 host:port")
+    ap.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL)
+    args = ap.parse_args(argv)
+    serve(parse_address(args.socket), args.model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# fake_backend.py - 로컬 대역 백엔드 (Node 서버 /api/user/* 흉내)
+#  - 시드 고정 픽스처 생성기로 pcb-summary / pcb-defect / pcb-parts 를 원하는 건수로 제공
+#  - 응답 지연(--latency, --jitter), ETag/304, 선택적 페이지네이션(--page-limit, ETag 는 페이지 본문 기준) 지원
+#  - 관리용: /__stats (요청 수/전송 바이트), /__reset, /__append?n=100 (불량 레코드 추가 → ETag 변경),
+#           /__brownout?latency=5000&fail=0.5 (실행 중 지연/오류율 변경, 인자 없으면 원래대로)
+#
+# 사용 예:
+#   python fake_backend.py --port 5055 --records 10000 --latency 20
+#   ZZIRIT_CRAWLER_BASE_URL=http://127.0.0.1:5055 python full_data_debug.py
+#   python crawler_bench.py --sizes 1000,10000,100000   (서버를 직접 띄워서 측정)
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+# 불량 라벨: 정규화 대상 별칭(영문/한글/표기 변형)을 섞어서 생성
+DEFECT_LABELS = [
+    "missing_hole", "Missing hole", "short", "short_circuit", "단락", "open_circuit", "open circuit",
+    "spur", "스퍼", "mouse_bite", "mouse bite", "spurious_copper", "spurious copper", "scratch",
+]
+PCB_STATUSES = ["design", "manufacturing", "testing", "completed"]
+PART_CATEGORIES = ["Capacitor", "Resistor", "Inductor", "IC", "Diode", "Transistor", "Connector"]
+PART_SIZES = ["0201", "0402", "0603", "0805", "1206"]
+MANUFACTURERS = ["SAMSUNG", "MURATA", "TDK", "YAGEO", "KEMET", "TAIYO YUDEN"]
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def _n_pcbs(n_records):
+    return max(12, n_records // 50)
+
+
+def make_pcb_summary(n, rng):
+    """PCB 요약 n건 (crawl_menu2_data 입력)"""
+    rows = []
+    for i in range(1, n + 1):
+        status = rng.choice(PCB_STATUSES)
+        progress = 100 if status == "completed" else rng.randint(0, 99)
+        rows.append({
+            "pcb_id": str(i),
+            "name": f"PCB-{i:05d}-Rev{rng.randint(1, 5)}",
+            "status": status,
+            "progress": progress,
+            "scheduled": rng.random() < 0.3,
+            "defect_rate": round(rng.uniform(0, 15), 2),
+            "total_inspections": rng.randint(0, 500),
+        })
+    return rows
+
+
+def make_pcb_defects(n, rng, start_id=1, n_pcbs=None):
+    """검사 레코드 n건 (crawl_menu3_data 입력). id 는 start_id 부터 증가, 시각도 증가"""
+    n_pcbs = n_pcbs or _n_pcbs(n)
+    rows = []
+    for i in range(start_id, start_id + n):
+        failed = rng.random() < 0.3
+        defects = None
+        if failed:
+            defects = []
+            for j in range(rng.randint(1, 3)):
+                x, y = rng.randint(0, 600), rng.randint(0, 600)
+                w, h = rng.randint(5, 60), rng.randint(5, 60)
+                defects.append({
+                    "id": i * 10 + j,
+                    "label": rng.choice(DEFECT_LABELS),
+                    "score": round(rng.uniform(0.3, 0.99), 3),
+                    "x1": x, "y1": y, "x2": x + w, "y2": y + h,
+                    "width": w, "height": h,
+                })
+        rows.append({
+            "id": i,
+            "pcb_id": str(rng.randint(1, n_pcbs)),
+            "status": "불합격" if failed else "합격",
+            "defect_result": defects,
+            "created_at": (BASE_TIME + timedelta(seconds=30 * i)).isoformat(),
+        })
+    return rows
+
+
+def make_pcb_parts(n, rng):
+    """부품 재고 n건 (crawl_menu4_data 입력)"""
+    rows = []
+    for i in range(1, n + 1):
+        category = rng.choice(PART_CATEGORIES)
+        sensitive = rng.random() < 0.25
+        rows.append({
+            "id": i,
+            "partId": f"{category[:2].upper()}{i:06d}",
+            "product": f"{category[:2].upper()}{rng.randint(10, 99)}A{rng.randint(100, 999)}K{i % 10}NNNC",
+            "type": category,
+            "size": rng.choice(PART_SIZES),
+            "manufacturer": rng.choice(MANUFACTURERS),
+            "quantity": rng.randint(0, 20000),
+            "minimumStock": rng.choice([100, 500, 1000, 2000]),
+            "unitCost": round(rng.uniform(0.5, 300), 2),
+            "receivedDate": (BASE_TIME + timedelta(days=rng.randint(0, 365))).date().isoformat(),
+            "moistureAbsorption": sensitive,
+            "moistureMaterials": "건조제" if sensitive else "불필요",
+            "actionRequired": "-",
+            "orderRequired": "-",
+        })
+    return rows
+
+
+class FakeBackend:
+    """픽스처 보관 + 직렬화 캐시 + 요청 통계"""
+
+    def __init__(self, summary=1000, defects=1000, parts=1000, latency_ms=20.0, jitter_ms=0.0,
+                 seed=42, page_limit=0, etag=True):
+        self.latency = latency_ms / 1000.0
+        self.base_latency = self.latency
+        self.fail_rate = 0.0
+        self.jitter = jitter_ms / 1000.0
+        self.page_limit = int(page_limit)
+        self.etag = etag
+        self._rng = random.Random(seed)
+        self._n_pcbs = _n_pcbs(defects)
+        self.data = {
+            "/api/user/pcb-summary": make_pcb_summary(summary, self._rng),
+            "/api/user/pcb-defect": make_pcb_defects(defects, self._rng, n_pcbs=self._n_pcbs),
+            "/api/user/pcb-parts": make_pcb_parts(parts, self._rng),
+        }
+        self._bodies = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"requests": {}, "not_modified": 0, "bytes": 0}
+
+    def append_defects(self, n):
+        rows = self.data["/api/user/pcb-defect"]
+        rows.extend(make_pcb_defects(n, self._rng, start_id=len(rows) + 1, n_pcbs=self._n_pcbs))
+        self._bodies.pop("/api/user/pcb-defect", None)
+        return len(rows)
+
+    def body(self, path):
+        """전체 응답 직렬화 결과와 ETag (데이터가 바뀔 때까지 재사용)"""
+        cached = self._bodies.get(path)
+        if cached is None:
+            raw = json.dumps(self.data[path], ensure_ascii=False).encode("utf-8")
+            cached = (raw, '"%s"' % hashlib.md5(raw).hexdigest())
+            self._bodies[path] = cached
+        return cached
+
+    def page(self, path, query):
+        """page/limit, offset/limit, skip/take 중 하나로 잘라서 반환. 페이지 파라미터가 없으면 첫 페이지"""
+        rows = self.data[path]
+        size = int(query.get("limit") or query.get("take") or self.page_limit)
+        if "offset" in query or "skip" in query:
+            start = int(query.get("offset") or query.get("skip") or 0)
+        else:
+            start = (max(1, int(query.get("page", 1))) - 1) * size
+        return rows[start:start + size], len(rows)
+
+    async def handle(self, request):
+        path = request.path
+        self.stats["requests"][path] = self.stats["requests"].get(path, 0) + 1
+        if path not in self.data:
+            return web.json_response({"error": "not found"}, status=404)
+        await asyncio.sleep(self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0))
+        if self.fail_rate and random.random() < self.fail_rate:
+            return web.json_response({"error": "fake backend failure"}, status=503)
+
+        if self.page_limit > 0:
+            rows, total = self.page(path, request.query)
+            raw = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+            headers = {"X-Total-Count": str(total)}
+            if self.etag:
+                # 실제 서버처럼 해당 페이지 본문만 대표 (다른 페이지가 바뀌어도 이 페이지 ETag 는 그대로)
+                headers["ETag"] = '"%s"' % hashlib.md5(raw).hexdigest()
+                if request.headers.get("If-None-Match") == headers["ETag"]:
+                    self.stats["not_modified"] += 1
+                    return web.Response(status=304, headers=headers)
+            self.stats["bytes"] += len(raw)
+            return web.Response(body=raw, content_type="application/json", headers=headers)
+
+        raw, etag = self.body(path)
+        if self.etag and request.headers.get("If-None-Match") == etag:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        self.stats["bytes"] += len(raw)
+        return web.Response(body=raw, content_type="application/json",
+                            headers={"ETag": etag} if self.etag else None)
+
+    async def health(self, request):
+        return web.json_response({"status": "ok", "records": {p: len(v) for p, v in self.data.items()}})
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def post_reset(self, request):
+        self.reset_stats()
+        return web.json_response({"status": "ok"})
+
+    async def post_brownout(self, request):
+        q = request.query
+        self.latency = float(q["latency"]) / 1000.0 if "latency" in q else self.base_latency
+        self.fail_rate = float(q.get("fail", 0.0))
+        return web.json_response({"latency_ms": self.latency * 1000.0, "fail_rate": self.fail_rate})
+
+    async def post_append(self, request):
+        total = self.append_defects(int(request.query.get("n", 100)))
+        return web.json_response({"status": "ok", "defects": total})
+
+
+def create_app(backend):
+    app = web.Application()
+    app.router.add_get("/api/health", backend.health)
+    app.router.add_get("/__stats", backend.get_stats)
+    app.router.add_route("*", "/__reset", backend.post_reset)
+    app.router.add_route("*", "/__append", backend.post_append)
+    app.router.add_route("*", "/__brownout", backend.post_brownout)
+    for path in backend.data:
+        app.router.add_get(path, backend.handle)
+    return app
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ZZIRIT 로컬 대역 백엔드")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--records", type=int, default=1000, help="엔드포인트별 기본 레코드 수")
+    ap.add_argument("--summary", type=int, default=None, help="pcb-summary 레코드 수 (기본 --records)")
+    ap.add_argument("--defects", type=int, default=None, help="pcb-defect 레코드 수 (기본 --records)")
+    ap.add_argument("--parts", type=int, default=None, help="pcb-parts 레코드 수 (기본 --records)")
+    ap.add_argument("--latency", type=float, default=20.0, help="응답 지연(ms)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="추가 무작위 지연 상한(ms)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--page-limit", type=int, default=0, help="0 보다 크면 이 크기로 페이지네이션")
+    ap.add_argument("--no-etag", action="store_true", help="ETag/304 비활성")
+    args = ap.parse_args(argv)
+
+    backend = FakeBackend(
+        summary=args.summary if args.summary is not None else args.records,
+        defects=args.defects if args.defects is not None else args.records,
+        parts=args.parts if args.parts is not None else args.records,
+        latency_ms=args.latency, jitter_ms=args.jitter, seed=args.seed,
+        page_limit=args.page_limit, etag=not args.no_etag,
+    )
+    print(f"🧪 fake backend: http://{args.host}:{args.port} "
+          f"(summary={len(backend.data['/api/user/pcb-summary'])}, "
+          f"defects={len(backend.data['/api/user/pcb-defect'])}, "
+          f"parts={len(backend.data['/api/user/pcb-parts'])}, latency={args.latency}ms)", flush=True)
+    web.run_app(create_app(backend), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
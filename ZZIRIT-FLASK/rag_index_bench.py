@@ -0,0 +1,170 @@
+# rag_index_bench.py - RAG 벡터 검색 인덱스 측정 (services/vector_index.py)
+#  - 크기별로 exact(전수 비교)와 ivf(근사) 인덱스를 만들고 같은 질의로 비교
+#  - build    : 인덱스 생성 시간 (exact 는 정규화만, ivf 는 k-means 학습 + 배정 포함)
+#  - latency  : 질의 1건 search(q, k) 시간 p50 / p95
+#  - recall@k : exact 상위 k 개 중 ivf 가 찾은 비율 (n_probe 별)
+#  - 기본 n_probe(*) 의 recall 이 --recall-target(기본 vector_index.RECALL_TARGET) 미만이면 종료 코드 1
+#  - 데이터   : 기본은 합성 768차원 벡터 (ko-sroberta 출력 차원). 저차원 잠재공간의 주제들이 서로 겹치도록
+#               만들어 주제 경계 근처 이웃이 많음 (군집이 뚜렷하면 n_probe 가 작아도 recall 1.0 이 나와 비교가 안 됨)
+#               --embeddings 로 LLM_model/excel_embeddings.pkl 같은 실제 임베딩 지정 가능 (크기는 복제+잡음으로 확장)
+#               합성 데이터 recall 은 크기/n_probe 간 상대 비교용. n_probe 기본값 조정 근거는 --embeddings 결과로
+#
+# 사용 예:
+#   python rag_index_bench.py                                   # 10k/50k/200k
+#   python rag_index_bench.py --sizes 20000,100000 --probes 4,8,16,32 --json rag_bench.json
+#   python rag_index_bench.py --embeddings LLM_model/excel_embeddings.pkl --sizes 50000
+
+import argparse
+import json
+import os
+import pickle
+import statistics
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from services.vector_index import IVF_PROBE_DIVISOR, RECALL_TARGET, ExactIndex, IVFIndex  # noqa: E402
+
+
+def synthetic_vectors(n, dim, rng, n_topics=None, rank=64, topic_strength=0.7, noise=0.5):
+    """
+    겹치는 주제로 만든 벡터 (부품 카테고리/규격처럼 비슷한 문서가 몰려 있지만 경계가 흐린 분포).
+    rank 차원 잠재공간(축별 분산이 1/i 로 감소 → 문장 임베딩처럼 비등방)에서 주제 중심 × topic_strength
+    + 주제 내 분산으로 뽑아 dim 차원으로 사영하고 등방 잡음을 더함. topic_strength < 1 이면 주제 간 거리가
+    주제 내 퍼짐보다 작아 상위 k 이웃이 여러 주제(= 여러 IVF 리스트)에 걸침
+    """
+    n_topics = n_topics or max(8, n // 200)
+    scale = (np.arange(1, rank + 1) ** -0.5).astype(np.float32)
+    projection = rng.standard_normal((rank, dim)).astype(np.float32)
+    topics = rng.standard_normal((n_topics, rank)).astype(np.float32) * scale
+    labels = rng.integers(0, n_topics, size=n)
+    latent = topic_strength * topics[labels] + rng.standard_normal((n, rank)).astype(np.float32) * scale
+    return latent @ projection + noise * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def expand_embeddings(base, n, rng):
+    """실제 임베딩을 n 행으로 확장 (복제 + 작은 잡음)"""
+    base = np.asarray(base, dtype=np.float32)
+    picks = base[rng.integers(0, base.shape[0], size=n)]
+    scale = 0.05 * float(np.std(base))
+    return picks + scale * rng.standard_normal(picks.shape).astype(np.float32)
+
+
+def make_queries(vectors, n_queries, rng):
+    """코퍼스 행에 잡음을 섞은 질의 (실제 질의처럼 문서와 가깝지만 같지는 않음)"""
+    picks = vectors[rng.integers(0, vectors.shape[0], size=n_queries)]
+    return picks + 0.3 * float(np.std(vectors)) * rng.standard_normal(picks.shape).astype(np.float32)
+
+
+def _timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+
+def _latency(samples):
+    samples = sorted(samples)
+    return {"p50_ms": round(statistics.median(samples) * 1000, 3),
+            "p95_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 3)}
+
+
+def bench_one(vectors, queries, k, probes):
+    exact, exact_build = _timed(lambda: ExactIndex(vectors))
+    truth, exact_times = [], []
+    for q in queries:
+        (ids, _), t = _timed(lambda: exact.search(q, k))
+        truth.append(set(ids.tolist()))
+        exact_times.append(t)
+
+    ivf, ivf_build = _timed(lambda: IVFIndex(vectors))
+    ivf_rows = {}
+    for n_probe in probes:
+        n_probe = min(n_probe, ivf.n_lists)
+        hits, times = 0, []
+        for q, expected in zip(queries, truth):
+            (ids, _), t = _timed(lambda: ivf.search(q, k, n_probe=n_probe))
+            hits += len(expected & set(ids.tolist()))
+            times.append(t)
+        ivf_rows[str(n_probe)] = {"recall": round(hits / (k * len(queries)), 4), **_latency(times)}
+
+    return {
+        "exact": {"build_s": round(exact_build, 3), **_latency(exact_times)},
+        "ivf": {"build_s": round(ivf_build, 3), "n_lists": ivf.n_lists, "default_n_probe": ivf.n_probe,
+                "probes": ivf_rows},
+    }
+
+
+def _print_rows(size, r, k):
+    e = r["exact"]
+    print(f"{size:>8} | exact  build {e['build_s']:>7.3f}s | p50 {e['p50_ms']:>8.3f}ms p95 {e['p95_ms']:>8.3f}ms", flush=True)
+    i = r["ivf"]
+    for n_probe, row in i["probes"].items():
+        mark = "*" if int(n_probe) == i["default_n_probe"] else " "
+        print(f"{'':>8} | ivf    build {i['build_s']:>7.3f}s | p50 {row['p50_ms']:>8.3f}ms p95 {row['p95_ms']:>8.3f}ms | "
+              f"n_probe {n_probe:>3}/{i['n_lists']}{mark} recall@{k} {row['recall']:.3f}", flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="RAG 벡터 검색 인덱스(exact/ivf) 측정")
+    ap.add_argument("--sizes", type=str, default="10000,50000,200000", help="코퍼스 행 수 목록")
+    ap.add_argument("--dim", type=int, default=768, help="합성 벡터 차원")
+    ap.add_argument("--topic-strength", type=float, default=0.7,
+                    help="합성 데이터 주제 분리 정도 (클수록 군집이 뚜렷해 recall 이 쉽게 1.0 에 가까워짐)")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=50, help="recall 기준 k (search_documents 의 후보 수와 같은 규모)")
+    ap.add_argument("--probes", type=str, default="", help="측정할 n_probe 목록 (기본: 인덱스 기본값의 1/2, 1, 2배)")
+    ap.add_argument("--recall-target", type=float, default=RECALL_TARGET,
+                    help="기본 n_probe 에서 요구하는 recall@k (미달이면 종료 코드 1)")
+    ap.add_argument("--embeddings", type=str, default=None, help="실제 임베딩 pickle 경로 (예: LLM_model/excel_embeddings.pkl)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", type=str, default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    base = None
+    if args.embeddings:
+        with open(args.embeddings, "rb") as f:
+            base = np.asarray(pickle.load(f), dtype=np.float32)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"📏 rag index bench: sizes={sizes}, k={args.k}, queries={args.queries}, "
+          f"data={'embeddings ' + args.embeddings if base is not None else f'synthetic dim={args.dim}'}", flush=True)
+    if base is None:
+        print("⚠️ 합성 데이터 recall 은 상대 비교용입니다. n_probe 기본값 조정 근거로는 --embeddings 결과를 사용하세요", flush=True)
+    results = {}
+    for size in sizes:
+        vectors = (expand_embeddings(base, size, rng) if base is not None
+                   else synthetic_vectors(size, args.dim, rng, topic_strength=args.topic_strength))
+        queries = make_queries(vectors, args.queries, rng)
+        default_probe = max(1, int(round(np.sqrt(size))) // IVF_PROBE_DIVISOR)
+        probes = ([int(p) for p in args.probes.split(",") if p.strip()] if args.probes
+                  else [max(1, default_probe // 2), default_probe, default_probe * 2])
+        if default_probe not in probes:
+            probes.append(default_probe)
+        results[str(size)] = bench_one(vectors, queries, args.k, probes)
+        _print_rows(str(size), results[str(size)], args.k)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.json}")
+
+    # 기본 n_probe 의 recall 목표 확인
+    failed = []
+    for size, r in results.items():
+        row = r["ivf"]["probes"].get(str(min(r["ivf"]["default_n_probe"], r["ivf"]["n_lists"])))
+        if row is not None and row["recall"] < args.recall_target:
+            failed.append(f"{size}행 recall@{args.k} {row['recall']:.3f}")
+    if failed:
+        print(f"❌ 기본 n_probe recall 목표({args.recall_target}) 미달: {', '.join(failed)}", flush=True)
+        sys.exit(1)
+    print(f"✅ 기본 n_probe recall 목표({args.recall_target}) 충족", flush=True)
+    return results
+
+
+if __name__ == "__main__":
+    main()
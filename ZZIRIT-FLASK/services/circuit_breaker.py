@@ -0,0 +1,118 @@
+# services/circuit_breaker.py
+# 엔드포인트별 회로 차단기 (data_crawler.py)
+#  - 최근 window 건의 (성공 여부, 소요 시간)으로 판정: 실패율 또는 느린 호출 비율이 임계값 이상이면 open
+#  - open 동안은 요청을 보내지 않고 즉시 실패 → 백엔드 장애 시 호출자가 타임아웃까지 기다리지 않음
+#  - open_seconds 가 지나면 half_open: 시험 요청 1건만 통과, 성공하면 closed / 실패하면 다시 open
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+class CircuitBreaker:
+    """실패율/지연 기준 회로 차단기 (스레드 안전)"""
+
+    def __init__(self, name: str, failure_rate: Optional[float] = None, slow_call_seconds: Optional[float] = None,
+                 slow_call_rate: Optional[float] = None, open_seconds: Optional[float] = None,
+                 window: int = 20, min_calls: int = 5):
+        self.name = name
+        # 인자로 주지 않으면 ZZIRIT_BREAKER_* 환경변수 → 기본값
+        self.failure_rate = failure_rate if failure_rate is not None else _env_float("ZZIRIT_BREAKER_FAILURE_RATE", 0.5)
+        self.slow_call_seconds = (slow_call_seconds if slow_call_seconds is not None
+                                  else _env_float("ZZIRIT_BREAKER_SLOW_SECONDS", 5.0))
+        self.slow_call_rate = (slow_call_rate if slow_call_rate is not None
+                               else _env_float("ZZIRIT_BREAKER_SLOW_RATE", 0.8))
+        self.open_seconds = open_seconds if open_seconds is not None else _env_float("ZZIRIT_BREAKER_OPEN_SECONDS", 30.0)
+        self.min_calls = int(min_calls)
+        self._calls: deque = deque(maxlen=int(window))
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_inflight = False
+        self._rejected = 0
+        self._last_opened: Optional[str] = None
+        self._last_reason: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_inflight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """요청을 보내도 되면 True (half_open 에서는 시험 요청 1건만 허용)"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record(self, ok: bool, seconds: float) -> None:
+        """요청 결과 반영. 느린 성공도 slow 로 집계"""
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            if self._current_state(now) == HALF_OPEN:
+                self._probe_inflight = False
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open(now, "시험 요청 " + ("지연" if ok else "실패"))
+                return
+            self._calls.append((ok, slow))
+            n = len(self._calls)
+            if self._state != CLOSED or n < self.min_calls:
+                return
+            failures = sum(1 for c_ok, _ in self._calls if not c_ok)
+            slows = sum(1 for _, c_slow in self._calls if c_slow)
+            if failures / n >= self.failure_rate:
+                self._open(now, f"실패율 {failures}/{n}")
+            elif slows / n >= self.slow_call_rate:
+                self._open(now, f"지연 {slows}/{n} (≥{self.slow_call_seconds}s)")
+
+    def _open(self, now: float, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self._last_opened = datetime.now().isoformat(timespec="seconds")
+        self._last_reason = reason
+        print(f"⛔ 회로 차단: {self.name} - {reason}, {self.open_seconds:g}초간 요청 생략")
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                "state": state,
+                "recent_calls": len(self._calls),
+                "recent_failures": sum(1 for ok, _ in self._calls if not ok),
+                "recent_slow": sum(1 for _, slow in self._calls if slow),
+                "rejected": self._rejected,
+                "last_opened": self._last_opened,
+                "last_reason": self._last_reason,
+                "retry_in_seconds": round(max(0.0, self.open_seconds - (now - self._opened_at)), 3)
+                if state == OPEN else 0.0,
+            }
@@ -0,0 +1,71 @@
+# services/defect_labels.py
+# PCB 불량 라벨 정규화 (data_crawler.py 등 불량 유형을 분류하는 코드 공용)
+#  - 별칭 전체를 하나의 정규식(교대 패턴)으로 미리 컴파일 → 라벨당 스캔 1회
+#  - 판정 순서는 기존 if/elif 체인과 동일: 정확 매칭 → 카테고리 우선순위
+#    (Missing_hole > Short > Open_circuit > Spur > Mouse_bite > Spurious_copper) → 원본 라벨 capitalize
+#  - 불량 어휘가 작으므로 원본 라벨 기준 LRU 캐시 → 반복 라벨은 dict 조회 1회
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any
+
+UNKNOWN_DEFECT = "기타"
+
+# 카테고리 우선순위 순서 (여러 별칭이 함께 들어 있으면 앞선 카테고리가 이김)
+DEFECT_ALIASES = {
+    "Missing_hole": ("missing_hole", "missing hole", "hole_missing", "홀 누락"),
+    "Short": ("short", "short_circuit", "단락", "쇼트"),
+    "Open_circuit": ("open_circuit", "open circuit", "circuit_open", "개방 회로", "오픈"),
+    "Spur": ("spur", "spur_defect", "스퍼", "스퍼어"),
+    "Mouse_bite": ("mouse_bite", "mouse bite", "bite_mouse", "마우스 바이트", "마우스바이트"),
+    "Spurious_copper": ("spurious_copper", "spurious copper", "copper_spurious", "불량 구리", "스퓨리어스"),
+}
+
+DEFECT_TYPES = tuple(DEFECT_ALIASES)
+
+_EXACT = {t.lower(): t for t in DEFECT_TYPES}
+
+# 위치마다 (?=...) 로 겹치는 별칭까지 모두 검사. 교대 순서 = 카테고리 우선순위이므로
+# 같은 위치에서는 우선순위가 가장 높은 별칭이 잡히고, 전체 최솟값이 기존 체인의 결과와 같음
+_GROUP_OF = {f"g{i}": t for i, t in enumerate(DEFECT_TYPES)}
+_PRIORITY = {t: i for i, t in enumerate(DEFECT_TYPES)}
+_ALIAS_RE = re.compile("(?=(?:" + "|".join(
+    f"(?P<g{i}>" + "|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True)) + ")"
+    for i, aliases in enumerate(DEFECT_ALIASES.values())
+) + "))")
+
+
+def _classify(label: Any) -> str:
+    if not label:
+        return UNKNOWN_DEFECT
+
+    normalized = label.lower().strip()
+    exact = _EXACT.get(normalized)
+    if exact is not None:
+        return exact
+
+    best = None
+    for m in _ALIAS_RE.finditer(normalized):
+        t = _GROUP_OF[m.lastgroup]
+        if best is None or _PRIORITY[t] < _PRIORITY[best]:
+            best = t
+            if _PRIORITY[t] == 0:
+                break
+    if best is not None:
+        return best
+    # 원본 라벨을 그대로 반환하되, 첫 글자만 대문자로
+    return label.capitalize()
+
+
+_classify_cached = lru_cache(maxsize=4096)(_classify)
+
+
+def normalize_defect_type(label: Any) -> str:
+    """불량 라벨 → 정규화된 불량 유형 (Missing_hole, Short, ... / 미분류는 capitalize, 빈 값은 '기타')"""
+    try:
+        return _classify_cached(label)
+    except TypeError:
+        # 해시 불가 라벨(list/dict 등)은 캐시 없이 처리 (기존과 같은 예외 동작)
+        return _classify(label)
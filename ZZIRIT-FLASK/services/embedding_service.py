@@ -0,0 +1,285 @@
+# services/embedding_service.py
+# 문장 임베딩 모델 공용 서비스 (api/chat_4.py ExcelRAGProcessor, embedding_worker.py)
+#  - 지연 로드: import 시점이 아니라 첫 encode() 에서 SentenceTransformer 로드 (sentence_transformers/torch import 포함)
+#    → chat4 를 처리하지 않는 워커는 모델 가중치를 메모리에 올리지 않음
+#  - prewarm(): 백그라운드 스레드에서 미리 로드 → 첫 질의가 로드 시간을 기다리지 않음
+#  - 공유 워커: ZZIRIT_EMBEDDING_SOCKET 이 설정되면 모델을 직접 올리지 않고 embedding_worker.py 프로세스 1개에
+#    로컬 소켓(multiprocessing.connection)으로 encode 요청 → 워커 N개가 모델 1벌을 공유
+#      값: 유닉스 소켓 경로 (/tmp/zzirit-embedding.sock) 또는 host:port (워커는 루프백 주소에만 바인드)
+#      ZZIRIT_EMBEDDING_AUTHKEY: 연결 인증 키 (필수, 기본값 없음), ZZIRIT_EMBEDDING_LOCAL_FALLBACK=0 이면 워커 장애 시 로컬 로드 안 함
+#      ZZIRIT_EMBEDDING_TIMEOUT: 응답 대기 기본 시간(초, 기본 10) + 텍스트당 0.1초 → 초과 시 연결을 버리고 로컬 대체
+#  - 보안: multiprocessing.connection 은 메시지를 pickle 로 주고받으므로 인증 키를 아는 쪽만 접속 가능해야 함
+#    → 인증 키 없이는 워커/클라이언트 모두 동작 안 함, 유닉스 소켓은 0600, encode 인자는 허용 목록만
+#
+# 프로토콜 (요청 → 응답):
+#   ("encode", model_name, texts, kwargs) → ("ok", ndarray) | ("error", message)
+#   ("ping", model_name)                  → ("ok", status dict) | ("error", message)
+
+from __future__ import annotations
+
+import ipaddress
+import logging
+import os
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+DEFAULT_EMBEDDING_MODEL = 'jhgan/ko-sroberta-multitask'
+# 워커로 전달 가능한 encode 인자와 허용 타입
+ALLOWED_ENCODE_KWARGS = {
+    "batch_size": int,
+    "normalize_embeddings": bool,
+    "show_progress_bar": bool,
+}
+TIMEOUT_PER_TEXT = 0.1
+
+MODE_LOCAL = "local"
+MODE_REMOTE = "remote"
+
+Address = Union[str, tuple]
+
+
+def parse_address(value: Optional[str]) -> Optional[Address]:
+    """'host:port' → (host, port), 그 외 문자열은 유닉스 소켓 경로. 빈 값이면 None"""
+    if not value:
+        return None
+    host, sep, port = value.rpartition(":")
+    if sep and host and port.isdigit() and "/" not in value:
+        return host, int(port)
+    return value
+
+
+def _authkey() -> bytes:
+    key = os.environ.get("ZZIRIT_EMBEDDING_AUTHKEY")
+    if not key:
+        raise RuntimeError("ZZIRIT_EMBEDDING_AUTHKEY 가 설정되지 않았습니다 (공유 임베딩 워커 인증 키)")
+    return key.encode("utf-8")
+
+
+def check_encode_request(texts, kwargs) -> None:
+    """워커가 받은 encode 요청 검증: 텍스트는 문자열 목록, 인자는 허용 목록/타입만"""
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        raise ValueError("texts 는 문자열 목록이어야 합니다")
+    if not isinstance(kwargs, dict):
+        raise ValueError("kwargs 는 dict 여야 합니다")
+    for name, value in kwargs.items():
+        expected = ALLOWED_ENCODE_KWARGS.get(name)
+        if expected is None:
+            raise ValueError(f"허용되지 않은 encode 인자: {name}")
+        if type(value) is not expected:
+            raise ValueError(f"encode 인자 타입 오류: {name}={value!r}")
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class EmbeddingService:
+    """SentenceTransformer 지연 로드 + (선택) 공유 임베딩 워커 클라이언트. encode() 는 스레드 안전"""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, address: Optional[Address] = None,
+                 local_fallback: Optional[bool] = None, timeout: Optional[float] = None):
+        self.model_name = model_name
+        self.address = address if address is not None else parse_address(os.environ.get("ZZIRIT_EMBEDDING_SOCKET"))
+        self.local_fallback = (local_fallback if local_fallback is not None
+                               else os.environ.get("ZZIRIT_EMBEDDING_LOCAL_FALLBACK", "1") != "0")
+        self.timeout = float(timeout if timeout is not None else os.environ.get("ZZIRIT_EMBEDDING_TIMEOUT", 10))
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        self._conns = threading.local()
+        self._load_seconds: Optional[float] = None
+        self._remote_calls = 0
+        self._local_calls = 0
+        self._last_error: Optional[str] = None
+        self._prewarm_thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return MODE_REMOTE if self.address is not None else MODE_LOCAL
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    # ---- 로컬 모델 ----
+    def load(self):
+        """모델을 (아직 없으면) 로드해서 반환. 동시에 여러 스레드가 불러도 1회만 로드"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    t = time.perf_counter()
+                    from sentence_transformers import SentenceTransformer
+                    print(f"🧠 임베딩 모델 로드 중: {self.model_name}")
+                    self._model = SentenceTransformer(self.model_name)
+                    self._load_seconds = round(time.perf_counter() - t, 3)
+                    print(f"✅ 임베딩 모델 로드 완료: {self._load_seconds}s")
+        return self._model
+
+    def _encode_local(self, texts: List[str], **kwargs) -> np.ndarray:
+        model = self.load()
+        with self._encode_lock:
+            self._local_calls += 1
+            return model.encode(texts, **kwargs)
+
+    # ---- 공유 워커 ----
+    def _request(self, message: tuple, timeout: float) -> Any:
+        conn = getattr(self._conns, "conn", None)
+        if conn is None:
+            conn = Client(self.address, authkey=_authkey())
+            self._conns.conn = conn
+        try:
+            conn.send(message)
+            # 응답이 늦으면 연결을 버림 (늦게 도착할 응답이 다음 요청과 섞이지 않도록)
+            if not conn.poll(timeout):
+                raise TimeoutError(f"임베딩 워커 응답 없음 ({timeout:g}s)")
+            status, payload = conn.recv()
+        except Exception:
+            self._conns.conn = None
+            try:
+                conn.close()
+            except OSError:
+                pass
+            raise
+        if status != "ok":
+            raise RuntimeError(f"임베딩 워커 오류: {payload}")
+        return payload
+
+    def _encode_remote(self, texts: List[str], **kwargs) -> np.ndarray:
+        kwargs = {k: v for k, v in kwargs.items() if k in ALLOWED_ENCODE_KWARGS}
+        message = ("encode", self.model_name, list(texts), kwargs)
+        timeout = self.timeout + TIMEOUT_PER_TEXT * len(message[2])
+        try:
+            vectors = self._request(message, timeout)
+        except TimeoutError:
+            raise
+        except (OSError, EOFError) as e:
+            # 연결이 끊겼으면 새 연결로 1회 재시도 (워커 재시작 직후)
+            logging.warning("EmbeddingService: 임베딩 워커 재연결: %s", e)
+            vectors = self._request(message, timeout)
+        self._remote_calls += 1
+        return vectors
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """SentenceTransformer.encode 와 같은 인자/반환"""
+        if self.address is None:
+            return self._encode_local(texts, **kwargs)
+        try:
+            return self._encode_remote(texts, **kwargs)
+        except (OSError, EOFError, RuntimeError, AuthenticationError) as e:
+            self._last_error = f"{type(e).__name__}: {e}"
+            if not self.local_fallback:
+                raise
+            logging.warning("EmbeddingService: 임베딩 워커 사용 불가, 로컬 모델로 처리: %s", e)
+            return self._encode_local(texts, **kwargs)
+
+    def prewarm(self) -> None:
+        """백그라운드에서 미리 준비 (로컬: 모델 로드, 공유 워커: 연결 확인). 중복 호출 무시"""
+        if self._prewarm_thread is not None:
+            return
+
+        def _run():
+            try:
+                if self.address is None:
+                    self.load()
+                else:
+                    self._request(("ping", self.model_name), self.timeout)
+            except Exception as e:
+                self._last_error = f"{type(e).__name__}: {e}"
+                logging.warning("EmbeddingService: 사전 로드 실패: %s", e)
+
+        self._prewarm_thread = threading.Thread(target=_run, name="embedding-prewarm", daemon=True)
+        self._prewarm_thread.start()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "mode": self.mode,
+            "address": str(self.address) if self.address is not None else None,
+            "loaded": self.loaded,
+            "load_seconds": self._load_seconds,
+            "remote_calls": self._remote_calls,
+            "local_calls": self._local_calls,
+            "last_error": self._last_error,
+        }
+
+
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str = DEFAULT_EMBEDDING_MODEL) -> EmbeddingService:
+    """프로세스 내 모델별 공용 인스턴스"""
+    with _services_lock:
+        service = _services.get(model_name)
+        if service is None:
+            service = _services[model_name] = EmbeddingService(model_name)
+        return service
+
+
+def serve(address: Address, model_name: str = DEFAULT_EMBEDDING_MODEL) -> None:
+    """
+    공유 임베딩 워커: 모델을 1회 로드하고 연결마다 스레드 1개로 encode 요청 처리 (종료 시까지 블록).
+    인증 키가 없거나 TCP 주소가 루프백이 아니면 시작하지 않음
+    """
+    authkey = _authkey()
+    if isinstance(address, tuple) and not _is_loopback(address[0]):
+        raise ValueError(f"임베딩 워커는 루프백 주소에만 바인드합니다: {address[0]}")
+    service = EmbeddingService(model_name, address=None)
+    service.load()
+    if isinstance(address, str):
+        if os.path.exists(address):
+            os.remove(address)  # 이전 실행이 남긴 소켓 파일
+        old_umask = os.umask(0o177)  # 생성 시점부터 0600
+        try:
+            listener = Listener(address, authkey=authkey)
+        finally:
+            os.umask(old_umask)
+        os.chmod(address, 0o600)
+    else:
+        listener = Listener(address, authkey=authkey)
+    print(f"🧠 임베딩 워커 대기 중: {address} ({model_name})", flush=True)
+
+    def _handle(conn):
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if message[1] != model_name:
+                        raise ValueError(f"모델 불일치: 요청 {message[1]}, 워커 {model_name}")
+                    if message[0] == "encode":
+                        check_encode_request(message[2], message[3])
+                        reply = ("ok", service.encode(message[2], **message[3]))
+                    elif message[0] == "ping":
+                        reply = ("ok", service.status())
+                    else:
+                        raise ValueError(f"알 수 없는 요청: {message[0]}")
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:  # 인증 실패 등은 해당 연결만 버림
+                logging.warning("embedding worker: 연결 수락 실패: %s", e)
+                continue
+            threading.Thread(target=_handle, args=(conn,), name="embedding-conn", daemon=True).start()
+    finally:
+        listener.close()
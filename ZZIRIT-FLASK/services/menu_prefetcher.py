@@ -0,0 +1,121 @@
+# services/menu_prefetcher.py
+# 메뉴 데이터 주기적 선조회 (api/chat_2.py)
+#  - 메뉴별 주기로 MenuSnapshotStore.refresh() 호출 → 요청 경로는 항상 따뜻한 스냅샷을 읽음
+#  - 주기에 ±jitter 를 섞어 여러 워커가 같은 순간에 백엔드를 두드리지 않도록 분산
+#  - 같은 메뉴의 이전 갱신이 아직 진행 중이면 이번 차례는 건너뜀 (중첩 방지)
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# 메뉴별 기본 선조회 주기(초). ZZIRIT_PREFETCH_<MENU> 환경변수로 개별 조정, 0 이하면 해당 메뉴 비활성
+DEFAULT_INTERVALS = {
+    "mes": 5.0,
+    "inventory": 60.0,
+    "menu1": 60.0,
+    "menu2": 300.0,
+    "menu3": 300.0,
+}
+
+
+class MenuPrefetcher:
+    """백그라운드 스레드 1개가 메뉴별 다음 실행 시각을 관리"""
+
+    def __init__(self, store: Any, intervals: Optional[Dict[str, float]] = None, jitter: float = 0.1):
+        self.store = store
+        base = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.intervals = {m: float(os.environ.get(f"ZZIRIT_PREFETCH_{m.upper()}", v)) for m, v in base.items()}
+        self.jitter = float(jitter)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {
+            m: {"runs": 0, "failures": 0, "skipped_overlaps": 0, "last_started": None,
+                "last_duration_seconds": None, "last_error": None, "next_due": 0.0, "inflight": None}
+            for m, v in self.intervals.items() if v > 0
+        }
+
+    def _next_delay(self, menu_id: str) -> float:
+        interval = self.intervals[menu_id]
+        return interval * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def start(self) -> None:
+        """선조회 스레드 시작 (중복 호출 무시). 첫 실행 시각도 jitter 만큼 분산"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        now = time.monotonic()
+        for m, st in self._state.items():
+            st["next_due"] = now + random.uniform(0.0, self.jitter * self.intervals[m])
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="menu-prefetcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for menu_id, st in self._state.items():
+                if now >= st["next_due"]:
+                    self._tick(menu_id, st, now)
+            next_due = min((st["next_due"] for st in self._state.values()), default=now + 60.0)
+            self._stop.wait(max(0.05, next_due - time.monotonic()))
+
+    def _tick(self, menu_id: str, st: Dict[str, Any], now: float) -> None:
+        st["next_due"] = now + self._next_delay(menu_id)
+        with self._lock:
+            inflight = st["inflight"]
+            if inflight is not None and not inflight.done():
+                st["skipped_overlaps"] += 1
+                return
+            st["last_started"] = datetime.now().isoformat(timespec="seconds")
+            started = time.monotonic()
+            try:
+                fut = self.store.refresh(menu_id)
+            except Exception as e:
+                st["failures"] += 1
+                st["last_error"] = f"{type(e).__name__}: {e}"
+                return
+            st["inflight"] = fut
+            st["runs"] += 1
+
+        def _done(f, st=st, started=started) -> None:
+            with self._lock:
+                st["last_duration_seconds"] = round(time.monotonic() - started, 3)
+                err = None if f.cancelled() else f.exception()
+                if f.cancelled() or err is not None or f.result() is None:
+                    st["failures"] += 1
+                    st["last_error"] = "cancelled" if f.cancelled() else (
+                        f"{type(err).__name__}: {err}" if err is not None else "no data")
+                else:
+                    st["last_error"] = None
+        fut.add_done_callback(_done)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            menus = {
+                m: {
+                    "interval_seconds": self.intervals[m],
+                    "runs": st["runs"],
+                    "failures": st["failures"],
+                    "skipped_overlaps": st["skipped_overlaps"],
+                    "running": bool(st["inflight"] is not None and not st["inflight"].done()),
+                    "last_started": st["last_started"],
+                    "last_duration_seconds": st["last_duration_seconds"],
+                    "last_error": st["last_error"],
+                    "next_run_in_seconds": round(max(0.0, st["next_due"] - now), 3),
+                }
+                for m, st in self._state.items()
+            }
+        return {
+            "running": bool(self._thread is not None and self._thread.is_alive()),
+            "jitter": self.jitter,
+            "menus": menus,
+        }
@@ -0,0 +1,167 @@
+# services/menu_snapshot.py
+# 크롤링한 메뉴 데이터 스냅샷 저장소 (api/chat_2.py)
+#  - 메뉴별 TTL: 신선하면 그대로, 오래됐으면(stale) 즉시 반환 + 백그라운드 갱신(stale-while-revalidate)
+#  - 스냅샷이 없거나 max_stale 을 넘으면 요청 경로에서 크롤링 (동시 요청은 진행 중인 갱신 1개를 공유)
+#  - 갱신은 crawler 전용 이벤트 루프에서 실행 (DataCrawler.submit)
+#  - 백엔드 장애로 갱신 결과가 기본값(data_source=fallback)이면 직전 정상 스냅샷을 유지 → stale 로 표시되어 반환
+
+from __future__ import annotations
+
+import concurrent.futures
+import copy
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+# 메뉴 별칭 → 스냅샷 키 (DataCrawler.get_menu_data 의 메뉴 맵과 동일한 크롤러로 연결)
+MENU_ALIASES = {
+    "overview": "menu1",
+    "defects": "menu2",
+    "analytics": "menu3",
+    "menu4": "inventory",
+    "mse": "mes",
+}
+
+ALL_MENUS = ("menu1", "menu2", "menu3", "inventory", "mes")
+
+# 메뉴별 기본 TTL(초). ZZIRIT_MENU_TTL_<MENU> 환경변수로 개별 조정 (예: ZZIRIT_MENU_TTL_MES=5)
+DEFAULT_TTL = {
+    "menu1": 60.0,
+    "menu2": 300.0,
+    "menu3": 300.0,
+    "inventory": 60.0,
+    "mes": 10.0,
+}
+
+
+def _env_ttl(menu_id: str, default: float) -> float:
+    return float(os.environ.get(f"ZZIRIT_MENU_TTL_{menu_id.upper()}", default))
+
+
+def _is_fallback(data: Any) -> bool:
+    return isinstance(data, dict) and data.get("data_source") == "fallback"
+
+
+class MenuSnapshotStore:
+    """메뉴별 최신 크롤링 결과와 시각을 보관"""
+
+    def __init__(self, crawler: Any, ttl: Optional[Dict[str, float]] = None,
+                 max_stale: Optional[float] = None):
+        self.crawler = crawler
+        base = dict(DEFAULT_TTL, **(ttl or {}))
+        self.ttl = {m: _env_ttl(m, t) for m, t in base.items()}
+        # 이 시간보다 오래된 스냅샷은 반환하지 않고 새로 크롤링
+        self.max_stale = float(max_stale if max_stale is not None
+                               else os.environ.get("ZZIRIT_MENU_MAX_STALE", 1800))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refreshing: Dict[str, concurrent.futures.Future] = {}
+
+    @staticmethod
+    def normalize(menu_id: str) -> str:
+        return MENU_ALIASES.get(menu_id, menu_id)
+
+    def age(self, menu_id: str) -> Optional[float]:
+        entry = self._entries.get(self.normalize(menu_id))
+        return None if entry is None else time.monotonic() - entry["ts"]
+
+    def publish(self, menu_id: str, data: Any) -> None:
+        """새 스냅샷 저장 (None, 또는 정상 스냅샷이 있을 때의 fallback 결과는 저장하지 않음 → 직전 스냅샷 유지)"""
+        if data is None:
+            return
+        key = self.normalize(menu_id)
+        with self._lock:
+            current = self._entries.get(key)
+            if _is_fallback(data) and current is not None and not _is_fallback(current["data"]):
+                print(f"⚠️ {key} 갱신 결과가 기본값(fallback) - 직전 스냅샷 유지 ({current['fetched_at']})")
+                return
+            self._entries[key] = {
+                "data": data,
+                "ts": time.monotonic(),
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            }
+
+    async def _fetch_and_publish(self, menu_id: str) -> Any:
+        # 크롤링 루프 안에서 저장까지 마친 뒤 Future 를 완료 → 기다리던 요청은 깨어나면 바로 새 스냅샷을 읽음
+        # (done 콜백에서 저장하면 대기 스레드가 콜백보다 먼저 깨어나 빈 스냅샷을 읽을 수 있음)
+        data = await self.crawler.get_menu_data(menu_id)
+        self.publish(menu_id, data)
+        return data
+
+    def refresh(self, menu_id: str) -> concurrent.futures.Future:
+        """백그라운드 갱신 시작 (이미 진행 중이면 그 작업을 반환). Future 완료 시점에는 스냅샷이 이미 저장됨"""
+        menu_id = self.normalize(menu_id)
+        with self._lock:
+            fut = self._refreshing.get(menu_id)
+            if fut is not None and not fut.done():
+                return fut
+            fut = self.crawler.submit(self._fetch_and_publish(menu_id))
+            self._refreshing[menu_id] = fut
+
+        def _done(f: concurrent.futures.Future, menu_id: str = menu_id) -> None:
+            with self._lock:
+                if self._refreshing.get(menu_id) is f:
+                    del self._refreshing[menu_id]
+        fut.add_done_callback(_done)
+        return fut
+
+    def get_many(self, menu_ids: Iterable[str], timeout: float = 45) -> Dict[str, Dict[str, Any]]:
+        """
+        {menu_id: {"data", "age_seconds", "stale", "fetched_at"}} 반환.
+        신선하거나 max_stale 이내면 즉시 반환(오래된 것은 갱신 예약), 아니면 갱신을 기다림(메뉴 간 병렬).
+        """
+        now = time.monotonic()
+        result: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, concurrent.futures.Future] = {}
+        for menu_id in menu_ids:
+            key = self.normalize(menu_id)
+            entry = self._entries.get(key)
+            age = None if entry is None else now - entry["ts"]
+            if age is not None and age < self.ttl.get(key, 60.0):
+                result[menu_id] = self._view(entry, age, stale=False)
+            elif age is not None and age < self.max_stale:
+                self.refresh(key)
+                result[menu_id] = self._view(entry, age, stale=True)
+            else:
+                waiting[menu_id] = self.refresh(key)
+
+        deadline = time.monotonic() + timeout
+        for menu_id, fut in waiting.items():
+            try:
+                fut.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                print(f"⚠️ {menu_id} 스냅샷 갱신 실패: {e}")
+            key = self.normalize(menu_id)
+            entry = self._entries.get(key)
+            if entry is None:
+                result[menu_id] = {"data": None, "age_seconds": None, "stale": True, "fetched_at": None}
+            else:
+                age = time.monotonic() - entry["ts"]
+                result[menu_id] = self._view(entry, age, stale=age >= self.ttl.get(key, 60.0))
+        return result
+
+    def get(self, menu_id: str, timeout: float = 45) -> Any:
+        """단일 메뉴 데이터 (사본)"""
+        return self.get_many([menu_id], timeout=timeout)[menu_id]["data"]
+
+    @staticmethod
+    def _view(entry: Dict[str, Any], age: float, stale: bool) -> Dict[str, Any]:
+        # 호출자가 응답을 가공해도 스냅샷이 바뀌지 않도록 사본 반환
+        return {"data": copy.deepcopy(entry["data"]), "age_seconds": round(age, 3),
+                "stale": stale, "fetched_at": entry["fetched_at"]}
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entries = dict(self._entries)
+            refreshing = [m for m, f in self._refreshing.items() if not f.done()]
+        return {
+            "ttl": self.ttl,
+            "max_stale": self.max_stale,
+            "menus": {m: {"age_seconds": round(now - e["ts"], 3), "fetched_at": e["fetched_at"],
+                          "stale": now - e["ts"] >= self.ttl.get(m, 60.0)}
+                      for m, e in entries.items()},
+            "refreshing": refreshing,
+        }
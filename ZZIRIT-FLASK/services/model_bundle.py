@@ -0,0 +1,326 @@
+# services/model_bundle.py
+# model_bundle.pkl 공용 도우미 (api/api_server.py, ai-5-4.py)
+#  - 그룹 조회 인덱스: 번들 로드 시 1회 생성 → 파트당 조회는 그룹 수와 무관하게 O(1)
+#  - 매칭 순서: (category,size,manufacturer) 정확키 → (category,size) → category → 전역 기본값
+#  - ModelRegistry: 번들 파일 변경 감시 → 백그라운드 로드 → 원자적 교체, 직전 버전 보관(롤백)
+#    번들 경로는 감시 주기마다 다시 결정 (pkl → mmap 전환 반영), 롤백은 다시 저장하지 않고 보관된 이전 버전으로
+#    포인터/파일 이름만 교체 (mmap: CURRENT, pkl: model_bundle.pkl.prev ↔ model_bundle.pkl)
+#  - pkl 저장(save_bundle_pkl): 교체되는 기존 파일은 model_bundle.pkl.prev 로 보관 (롤백 대상)
+#  - mmap 레이아웃: 그룹별 비압축 joblib 파일 → joblib.load(mmap_mode='r') 로 압축 해제/버퍼 복사 없이
+#    페이지 캐시에서 바로 읽음 (콜드 스타트 단축. sklearn Tree 는 역직렬화 시 노드 배열을 자체 버퍼로
+#    복사하므로 워커 간 트리 메모리 공유까지는 되지 않음)
+#      <dir>/CURRENT                      : 활성 버전 이름 (원자적 교체)
+#      <dir>/<version>/index.joblib       : feature_columns, meta, 그룹키 → 파일명
+#      <dir>/<version>/group_0000.joblib  : 그룹별 {reg_usage, reg_days, cls_6m, cls_12m}
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import joblib
+
+MATCH_EXACT = "exact"
+MATCH_CATEGORY_SIZE = "category_size"
+MATCH_CATEGORY = "category"
+MATCH_GLOBAL = "global"
+MATCH_LEVELS = (MATCH_EXACT, MATCH_CATEGORY_SIZE, MATCH_CATEGORY, MATCH_GLOBAL)
+
+
+def build_group_index(models: Dict[tuple, Any]) -> Dict[str, Any]:
+    """models 키로 보조 인덱스 생성. 같은 상위 키에 여러 그룹이 있으면 먼저 학습된(삽입 순서) 그룹이 대표"""
+    by_category_size: Dict[tuple, tuple] = {}
+    by_category: Dict[Any, tuple] = {}
+    for key in models.keys():
+        cat, size = key[0], key[1]
+        by_category_size.setdefault((cat, size), key)
+        by_category.setdefault(cat, key)
+    return {
+        MATCH_CATEGORY_SIZE: by_category_size,
+        MATCH_CATEGORY: by_category,
+        MATCH_GLOBAL: next(iter(models.keys()), None),
+    }
+
+
+def resolve_group(models: Dict[tuple, Any], index: Dict[str, Any],
+                  cat: Any, size: str, man: str) -> Tuple[tuple, str]:
+    """(모델 그룹 키, 매칭 단계) 반환"""
+    key = (cat, size, man)
+    if key in models:
+        return key, MATCH_EXACT
+    key = index[MATCH_CATEGORY_SIZE].get((cat, size))
+    if key is not None:
+        return key, MATCH_CATEGORY_SIZE
+    key = index[MATCH_CATEGORY].get(cat)
+    if key is not None:
+        return key, MATCH_CATEGORY
+    if index[MATCH_GLOBAL] is None:
+        raise KeyError("model_bundle 에 모델 그룹이 없습니다.")
+    return index[MATCH_GLOBAL], MATCH_GLOBAL
+
+
+MMAP_POINTER = "CURRENT"
+PKL_COMPRESS = 3
+PKL_PREVIOUS_SUFFIX = ".prev"
+PKL_ROLLED_BACK_SUFFIX = ".rolled_back"
+
+
+def _link_replace(src: str, dst: str) -> None:
+    """src 를 dst 이름으로도 보관 (하드링크 → 원자적 교체, 하드링크 불가 파일시스템은 복사)"""
+    tmp = dst + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def save_bundle_pkl(bundle: Dict[str, Any], path: str, compress: int = PKL_COMPRESS) -> str:
+    """번들을 임시 파일에 쓴 뒤 원자적 교체. 기존 파일은 path + '.prev' 로 보관 (레지스트리 롤백 대상)"""
+    tmp_path = path + ".tmp"
+    joblib.dump(bundle, tmp_path, compress=compress)
+    if os.path.exists(path):
+        _link_replace(path, path + PKL_PREVIOUS_SUFFIX)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_mmap_pointer(out_dir: str, version: str) -> None:
+    """CURRENT 를 version 으로 원자적 교체 (임시 파일에 쓴 뒤 os.replace)"""
+    pointer = os.path.join(out_dir, MMAP_POINTER)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+
+
+def save_bundle_mmap(bundle: Dict[str, Any], out_dir: str, keep: int = 2) -> str:
+    """번들을 mmap 레이아웃으로 저장하고 CURRENT 를 새 버전으로 교체. 오래된 버전은 keep 개만 남김"""
+    meta = bundle.get("meta") or {}
+    version = str(meta.get("version") or datetime.now().strftime("%Y%m%d-%H%M%S"))
+    version_dir = os.path.join(out_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    group_files: Dict[tuple, str] = {}
+    for i, (key, group) in enumerate(bundle["models"].items()):
+        fname = f"group_{i:04d}.joblib"
+        joblib.dump(group, os.path.join(version_dir, fname), compress=0)
+        group_files[key] = fname
+    index = {"feature_columns": bundle["feature_columns"], "meta": meta, "group_files": group_files}
+    joblib.dump(index, os.path.join(version_dir, "index.joblib"), compress=0)
+
+    write_mmap_pointer(out_dir, version)
+
+    # 이미 mmap 중인 워커는 파일이 삭제돼도 매핑이 유지되므로 오래된 버전은 정리
+    old_versions = sorted(d for d in os.listdir(out_dir)
+                          if d != version and os.path.isfile(os.path.join(out_dir, d, "index.joblib")))
+    for d in old_versions[:max(0, len(old_versions) - (keep - 1))]:
+        shutil.rmtree(os.path.join(out_dir, d), ignore_errors=True)
+    return version_dir
+
+
+def load_bundle_mmap(path: str) -> Dict[str, Any]:
+    """mmap 레이아웃의 CURRENT 버전 로드 (트리 배열은 읽기 전용 메모리 맵)"""
+    with open(os.path.join(path, MMAP_POINTER), encoding="utf-8") as f:
+        version = f.read().strip()
+    version_dir = os.path.join(path, version)
+    index = joblib.load(os.path.join(version_dir, "index.joblib"))
+    models = {key: joblib.load(os.path.join(version_dir, fname), mmap_mode="r")
+              for key, fname in index["group_files"].items()}
+    return {"feature_columns": index["feature_columns"], "models": models, "meta": index["meta"],
+            "mmap_version": version}
+
+
+def load_bundle_file(path: str) -> Dict[str, Any]:
+    """번들 로드(.pkl 또는 mmap 디렉토리) + 그룹 조회 인덱스 생성 (인덱스는 저장하지 않음)"""
+    bundle = load_bundle_mmap(path) if os.path.isdir(path) else joblib.load(path)
+    bundle["group_index"] = build_group_index(bundle["models"])
+    return bundle
+
+
+def resolve_bundle_path(model_dir: str) -> str:
+    """
+    ML_model/ 의 활성 번들 경로 (api/api_server.py 레지스트리, ai-5-4.py 예측/증분 학습 공용).
+    model_bundle.pkl 과 model_bundle_mmap/CURRENT 중 더 최근에 기록된 쪽 → 마지막 학습(또는 롤백) 결과.
+    둘 다 없으면 model_bundle.pkl 경로
+    """
+    pkl = os.path.join(model_dir, "model_bundle.pkl")
+    mmap_dir = os.path.join(model_dir, "model_bundle_mmap")
+    candidates = []
+    for path, marker in ((pkl, pkl), (mmap_dir, os.path.join(mmap_dir, MMAP_POINTER))):
+        try:
+            candidates.append((os.stat(marker).st_mtime_ns, path))
+        except FileNotFoundError:
+            pass
+    return max(candidates)[1] if candidates else pkl
+
+
+class ModelRegistry:
+    """
+    model_bundle 버전 관리 (.pkl 파일 또는 mmap 디렉토리).
+    - 감시 스레드가 poll_interval 마다 파일 (mtime, size) 를 확인해 바뀌면 새 번들을 로드
+    - 로드가 끝난 뒤에만 활성 번들을 교체 → 요청 경로에서는 디스크 로드/압축 해제가 일어나지 않음
+    - 직전 번들을 보관해 rollback() 으로 즉시 되돌릴 수 있음
+    - path 에 함수를 주면 확인할 때마다 경로를 다시 결정 (서버 실행 중 mmap 번들이 처음 배포돼도 전환)
+    """
+
+    def __init__(self, path: Union[str, Callable[[], str]], poll_interval: float = 30.0):
+        self._resolve_path = path if callable(path) else (lambda p=str(path): p)
+        self.path = str(self._resolve_path())
+        self.poll_interval = float(poll_interval)
+        self._load_lock = threading.Lock()
+        self._active: Optional[Dict[str, Any]] = None
+        self._previous: Optional[Dict[str, Any]] = None
+        self._skip_signature: Optional[tuple] = None
+        self._last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _signature(self) -> Optional[tuple]:
+        # mmap 디렉토리는 CURRENT 포인터 파일의 교체 여부로 판단 (경로가 바뀌어도 다른 시그니처)
+        target = os.path.join(self.path, MMAP_POINTER) if os.path.isdir(self.path) else self.path
+        try:
+            st = os.stat(target)
+        except FileNotFoundError:
+            return None
+        return (self.path, st.st_mtime_ns, st.st_size)
+
+    def _load_entry(self, signature: tuple) -> Dict[str, Any]:
+        bundle = load_bundle_file(self.path)
+        meta = bundle.get("meta") or {}
+        version = meta.get("version") or meta.get("created_at") or str(signature[1])
+        return {
+            "bundle": bundle,
+            "version": str(version),
+            "signature": signature,
+            "loaded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def refresh(self) -> bool:
+        """파일이 바뀌었으면 새 번들을 로드해 교체. 교체했으면 True"""
+        with self._load_lock:
+            self.path = str(self._resolve_path())
+            sig = self._signature()
+            if sig is None or sig == self._skip_signature:
+                return False
+            if self._active is not None and self._active["signature"] == sig:
+                return False
+            try:
+                entry = self._load_entry(sig)
+            except Exception as e:
+                # 같은 파일을 매 주기 재시도하지 않도록 실패한 시그니처는 건너뜀
+                self._skip_signature = sig
+                self._last_error = f"{type(e).__name__}: {e}"
+                logging.warning("ModelRegistry: 번들 로드 실패 (%s): %s", self.path, e)
+                return False
+            self._previous, self._active = self._active, entry
+            self._skip_signature = None
+            self._last_error = None
+            logging.info("✅ model_bundle 교체: version=%s (%s)", entry["version"], self.path)
+            return True
+
+    def active(self) -> Optional[Dict[str, Any]]:
+        """현재 활성 항목 {bundle, version, signature, loaded_at} (없으면 동기 로드 시도)"""
+        entry = self._active
+        if entry is None:
+            self.refresh()
+            entry = self._active
+        return entry
+
+    def get(self) -> Dict[str, Any]:
+        entry = self.active()
+        if entry is None:
+            raise FileNotFoundError(f"모델 파일이 없습니다: {self.path}. 먼저 ai-5-4.py --retrain 을 실행하세요.")
+        return entry["bundle"]
+
+    @staticmethod
+    def _same_file(path: str, signature: tuple) -> bool:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == tuple(signature[1:])
+
+    def _activate_on_disk(self, entry: Dict[str, Any]) -> None:
+        """
+        entry 의 번들 파일을 디스크의 활성 번들로 지정 (다시 저장하지 않음, 이름/포인터만 교체).
+        다른 워커/재시작도 같은 버전을 로드하도록 가장 최근 기록이 되게 함 (resolve_bundle_path 규칙)
+        """
+        path = entry["signature"][0]
+        if os.path.isdir(path):
+            version = entry["bundle"].get("mmap_version")
+            if not version or not os.path.isfile(os.path.join(path, version, "index.joblib")):
+                raise FileNotFoundError(f"직전 mmap 버전 디렉토리가 없습니다: {version}")
+            write_mmap_pointer(path, version)
+            return
+        previous = path + PKL_PREVIOUS_SUFFIX
+        if self._same_file(path, entry["signature"]):
+            pass  # 파일이 그대로 있음 (다른 형식이 활성이었던 경우)
+        elif self._same_file(previous, entry["signature"]):
+            # 현재 파일은 .rolled_back 으로 보관한 뒤 보관본을 원래 이름으로 원자적 교체
+            if os.path.exists(path):
+                _link_replace(path, path + PKL_ROLLED_BACK_SUFFIX)
+            os.replace(previous, path)
+        else:
+            raise FileNotFoundError(f"직전 번들 파일이 없습니다: {previous}")
+        os.utime(path)
+
+    def rollback(self) -> bool:
+        """
+        직전 버전으로 되돌림. 보관된 직전 번들 파일(mmap 버전 디렉토리 / model_bundle.pkl.prev)로
+        포인터/파일 이름만 교체하므로 다른 워커/재시작에도 유지됨. 직전 파일이 없으면 되돌리지 않음
+        """
+        with self._load_lock:
+            previous = self._previous
+            if previous is None:
+                return False
+            try:
+                self._activate_on_disk(previous)
+            except Exception as e:
+                self._last_error = f"롤백 실패: {type(e).__name__}: {e}"
+                logging.warning("ModelRegistry: 롤백 실패: %s", e)
+                return False
+            self.path = str(self._resolve_path())
+            self._previous = self._active
+            self._active = {**previous, "signature": self._signature()}
+            self._skip_signature = None
+            self._last_error = None
+            logging.info("↩️ model_bundle 롤백: version=%s", self._active["version"])
+            return True
+
+    def start(self) -> None:
+        """백그라운드 감시 스레드 시작 (최초 로드 포함, 중복 호출 무시)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:  # 감시 스레드는 죽지 않도록
+                logging.warning("ModelRegistry: 감시 중 오류: %s", e)
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def status(self) -> Dict[str, Any]:
+        active, previous = self._active, self._previous
+        return {
+            "path": self.path,
+            "active_version": active["version"] if active else None,
+            "active_loaded_at": active["loaded_at"] if active else None,
+            "previous_version": previous["version"] if previous else None,
+            "watching": bool(self._thread is not None and self._thread.is_alive()),
+            "poll_interval": self.poll_interval,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,92 @@
+# services/order_optimizer.py
+# 발주일/발주량 최적화 벡터화 엔진 (api/api_server.py, ai-5-4.py 공용)
+#  - 누적합(prefix sum)으로 모든 후보 발주일을 한 번의 배열 연산으로 평가 (파트당 O(H))
+#  - demand/price 를 (R × H) 행렬로 주면 R개 행(파트 또는 시나리오)을 동시에 평가
+#  - 결과 top-3 구조는 기존 루프 구현(_optimize / optimize_order_day_quantity)과 동일
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def _as_column(x: Any, dtype=float) -> np.ndarray:
+    """스칼라 또는 길이 R 배열을 (R,1) 열벡터로 변환 (브로드캐스트용)"""
+    return np.asarray(x, dtype=dtype).reshape(-1, 1)
+
+
+def evaluate_order_days(opening_stock: Any, lead_time_days: Any,
+                        demand: np.ndarray, price: np.ndarray, horizon: int,
+                        service_days: int, pack_size: Any = 0, moq: Any = 0,
+                        hold_rate_per_day: float = 0.0005, penalty_mult: float = 5.0) -> Dict[str, np.ndarray]:
+    """
+    모든 행 × 모든 후보 발주일(d = 0..H-1)의 비용 요소를 계산.
+
+    demand, price: (H,) 또는 (R, H). opening_stock/lead_time_days/pack_size/moq 는 스칼라 또는 길이 R.
+    반환: {"total", "quantity", "unit_price", "penalty", "holding"} 각 (R, H) 배열
+    """
+    demand = np.atleast_2d(np.asarray(demand, dtype=float))
+    price = np.atleast_2d(np.asarray(price, dtype=float))
+    H = max(0, min(int(horizon), demand.shape[1], price.shape[1]))
+    R = max(demand.shape[0], price.shape[0], np.size(opening_stock), np.size(lead_time_days))
+    if H <= 0:
+        empty = np.zeros((R, 0), dtype=float)
+        return {"total": empty, "quantity": empty, "unit_price": empty, "penalty": empty, "holding": empty}
+
+    demand = np.broadcast_to(demand[:, :H], (R, H))
+    unit = np.broadcast_to(price[:, :H], (R, H))
+
+    # csum[:, k] = demand[:, :k].sum()
+    csum = np.zeros((R, H + 1), dtype=float)
+    np.cumsum(demand, axis=1, out=csum[:, 1:])
+
+    arrival = np.arange(H)[None, :] + _as_column(lead_time_days, dtype=np.int64)
+    start = np.clip(arrival, 0, H)
+    end = np.minimum(np.maximum(arrival + int(service_days), start), H)
+    start = np.broadcast_to(start, (R, H))
+    end = np.broadcast_to(end, (R, H))
+
+    consumed_before_arrival = np.take_along_axis(csum, start, axis=1)
+    need_qty = np.take_along_axis(csum, end, axis=1) - consumed_before_arrival
+    window_len = end - start
+
+    stock_at_arrival = _as_column(opening_stock) - consumed_before_arrival
+    penalty = np.where(stock_at_arrival < 0, -stock_at_arrival, 0.0) * unit * penalty_mult
+
+    base_order = np.maximum(0.0, need_qty - np.maximum(0.0, stock_at_arrival))
+    order_qty = np.trunc(np.maximum(base_order, _as_column(moq)))
+    pack = _as_column(pack_size)
+    order_qty = np.where(pack > 0, np.ceil(order_qty / np.where(pack > 0, pack, 1.0)) * pack, order_qty)
+
+    purchase = unit * order_qty
+    avg_carry = np.where(order_qty > need_qty, order_qty - need_qty, 0.0)
+    holding = hold_rate_per_day * unit * avg_carry * np.maximum(1, window_len)
+    total = purchase + holding + penalty
+    return {"total": total, "quantity": order_qty, "unit_price": unit, "penalty": penalty, "holding": holding}
+
+
+def top3_from_costs(costs: Dict[str, np.ndarray], row: int = 0) -> List[Dict[str, Any]]:
+    """evaluate_order_days 결과의 한 행에서 총비용 하위 3개 발주일 추천 (동률이면 빠른 날짜 우선)"""
+    total = costs["total"][row]
+    if total.size == 0:
+        return []
+    order = np.argsort(total, kind="stable")[:3]
+    return [{
+        "day_offset": int(d),
+        "quantity": int(costs["quantity"][row, d]),
+        "expected_total_cost": round(float(total[d]), 2),
+        "expected_unit_price": round(float(costs["unit_price"][row, d]), 4),
+        "stockout_penalty": round(float(costs["penalty"][row, d]), 2),
+        "holding_cost": round(float(costs["holding"][row, d]), 2),
+    } for d in order]
+
+
+def optimize_order_top3(state: Any, demand: np.ndarray, price: np.ndarray, horizon: int,
+                        service_days: int, hold_rate_per_day: float, penalty_mult: float) -> List[Dict[str, Any]]:
+    """단일 파트(PartState) 기준 top-3 추천 — 기존 _optimize 와 같은 시그니처/결과"""
+    costs = evaluate_order_days(state.opening_stock, state.lead_time_days, demand, price,
+                                horizon=horizon, service_days=service_days,
+                                pack_size=state.pack_size, moq=state.moq,
+                                hold_rate_per_day=hold_rate_per_day, penalty_mult=penalty_mult)
+    return top3_from_costs(costs)
@@ -0,0 +1,54 @@
+# services/part_number_index.py
+# 부품번호 부분일치 색인 (api/chat_4.py ExcelRAGProcessor.search_documents 의 부품번호 가중치)
+#  - 정규화(str → upper)한 부품번호의 3-gram 역색인: 3-gram → 해당 문서 id 정렬 배열
+#  - 질의 문자열의 3-gram 포스팅을 작은 것부터 교집합 → 남은 후보만 실제 부분문자열 확인
+#  - 문서 전체를 파이썬 루프로 도는 대신 일치 문서 id 배열을 바로 돌려주므로 가중치는 벡터 덧셈 1회
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable, List
+
+import numpy as np
+
+NGRAM = 3
+
+
+def normalize_part_number(value) -> str:
+    return str(value).upper()
+
+
+class PartNumberIndex:
+    """부품번호 n-gram 역색인. lookup(substring) → 부품번호에 substring 이 포함된 문서 id (오름차순)"""
+
+    def __init__(self, part_numbers: Iterable):
+        self.part_numbers: List[str] = [normalize_part_number(pn) for pn in part_numbers]
+        postings = defaultdict(list)
+        for i, pn in enumerate(self.part_numbers):
+            for gram in {pn[j:j + NGRAM] for j in range(len(pn) - NGRAM + 1)}:
+                postings[gram].append(i)
+        # 문서 순서대로 추가했으므로 이미 정렬됨
+        self.postings = {gram: np.asarray(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.part_numbers)
+
+    def lookup(self, substring: str) -> np.ndarray:
+        q = normalize_part_number(substring)
+        if len(q) < NGRAM:
+            # 3-gram 보다 짧은 질의는 색인으로 좁힐 수 없으므로 전체 확인
+            return np.asarray([i for i, pn in enumerate(self.part_numbers) if pn and q in pn], dtype=np.int64)
+        lists = []
+        for gram in {q[j:j + NGRAM] for j in range(len(q) - NGRAM + 1)}:
+            ids = self.postings.get(gram)
+            if ids is None:
+                return np.zeros(0, dtype=np.int64)
+            lists.append(ids)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            if candidates.size == 0:
+                break
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        # 3-gram 이 모두 있어도 연속 부분문자열이 아닐 수 있으므로 후보만 실제 확인
+        return np.asarray([i for i in candidates.tolist() if q in self.part_numbers[i]], dtype=np.int64)
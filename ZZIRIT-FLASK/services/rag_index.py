@@ -0,0 +1,187 @@
+# services/rag_index.py
+# RAG 인덱스 수명 관리 (api/chat_4.py 의 ExcelRAGProcessor)
+#  - 인덱스는 한 번 구축해 저장(LLM_model/*.pkl + 원본 지문) → 재시작 시 지문이 같으면 임베딩 없이 로드
+#  - 감시 스레드가 poll_interval 마다 원본 지문(pcb_parts 체크섬, 워크북 해시)만 확인 → 바뀐 경우에만 재구축
+#  - 재구축은 새 인스턴스에서 진행 후 원자적 교체 → 요청 경로는 질의 임베딩 1회 + 유사도 조회만 수행
+#  - 요청 경로 신선도: ensure_fresh() 는 마지막 확인 후 fresh_interval 초가 지났으면 감시 스레드를 깨우기만 함
+#    (감시 스레드가 없으면 1회용 백그라운드 스레드). 지문 확인(CHECKSUM TABLE, 워크북 해시)과 재구축은 요청
+#    스레드에서 하지 않고, 그동안 요청은 메모리의 현재 인덱스로 응답
+#    → 답변은 최대 fresh_interval 초 + 지문 확인/재구축 시간만큼 늦을 수 있음
+#  - 여러 프로세스(gunicorn 워커): lock_path 파일 잠금으로 재구축은 한 번에 한 프로세스만.
+#    잠금을 얻은 뒤 다른 프로세스가 같은 원본으로 이미 저장한 인덱스가 있으면 재구축 없이 로드.
+#    저장본 로드는 공유 잠금 → 쓰는 중인 파일을 읽지 않음 (fcntl 이 없는 환경은 프로세스 내 잠금만)
+#
+# processor 인터페이스 (factory() 가 반환하는 객체):
+#   fingerprint            : 현재 인덱스를 만든 원본 지문 (없으면 None)
+#   source_fingerprint()   : 지금 원본의 지문
+#   is_stale(fingerprint)  : 이 지문 기준으로 재구축이 필요하면 True
+#   build_index(fingerprint, previous) : previous(현재 활성 인덱스, 없으면 None)에서 재사용 가능한 것은 재사용
+#   save_processed_data() / load_processed_data() → bool
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextlib.contextmanager
+def file_lock(path: Optional[str], exclusive: bool = True):
+    """프로세스 간 파일 잠금 (path 가 None 이거나 fcntl 이 없으면 잠금 없음)"""
+    if path is None or fcntl is None:
+        yield
+        return
+    with open(path, "a+") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class RagIndexManager:
+    """활성 RAG 인덱스 1개 보관 + 원본 변경 시에만 백그라운드 재구축"""
+
+    def __init__(self, factory: Callable[[], Any], poll_interval: float = 300.0,
+                 fresh_interval: float = 0.0, lock_path: Optional[str] = None):
+        self.factory = factory
+        self.poll_interval = float(poll_interval)
+        self.fresh_interval = float(fresh_interval)
+        self.lock_path = lock_path
+        self._build_lock = threading.Lock()
+        self._active: Optional[Any] = None
+        self._loaded_at: Optional[str] = None
+        self._last_checked: Optional[str] = None
+        self._checked_at = float("-inf")
+        self._last_error: Optional[str] = None
+        self._builds = 0
+        self._attempted = False
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fresh_thread: Optional[threading.Thread] = None
+
+    def _swap(self, processor: Any) -> None:
+        self._active = processor
+        self._loaded_at = datetime.now().isoformat(timespec="seconds")
+
+    def load_or_build(self) -> bool:
+        """
+        저장된 인덱스가 있으면 로드만 하고 반환 (원본 변경 확인은 감시 스레드가 시작 직후 수행).
+        없으면 이 자리에서 구축. 사용할 인덱스가 있으면 True
+        """
+        self._attempted = True
+        with self._build_lock:
+            if self._active is None:
+                processor = self.factory()
+                with file_lock(self.lock_path, exclusive=False):
+                    loaded = processor.load_processed_data()
+                if loaded:
+                    self._swap(processor)
+        if self._active is None:
+            self.refresh()
+        return self._active is not None
+
+    def refresh(self, force: bool = False) -> bool:
+        """원본 지문이 바뀌었으면(또는 force) 새 인덱스를 구축(또는 다른 프로세스 저장본 로드)해 교체. 교체했으면 True"""
+        with self._build_lock:
+            return self._refresh_locked(force)
+
+    def ensure_fresh(self) -> bool:
+        """
+        요청 경로용: 마지막 원본 확인 후 fresh_interval 초가 지났으면 백그라운드 확인을 요청하고 바로 반환.
+        호출 스레드는 지문 확인/재구축/파일 잠금 대기를 하지 않음. 확인을 요청했으면 True
+        """
+        if self.fresh_interval <= 0 or time.monotonic() - self._checked_at < self.fresh_interval:
+            return False
+        # 확인이 끝나기 전 같은 주기의 다른 요청이 중복 요청하지 않도록 먼저 표시
+        self._checked_at = time.monotonic()
+        if self._thread is not None and self._thread.is_alive():
+            self._wake.set()
+        elif self._fresh_thread is None or not self._fresh_thread.is_alive():
+            self._fresh_thread = threading.Thread(target=self.refresh, name="rag-index-fresh", daemon=True)
+            self._fresh_thread.start()
+        return True
+
+    def _refresh_locked(self, force: bool) -> bool:
+        current = self._active
+        try:
+            fingerprint = self.factory().source_fingerprint()
+            self._last_checked = datetime.now().isoformat(timespec="seconds")
+            self._checked_at = time.monotonic()
+            if not force and current is not None and not current.is_stale(fingerprint):
+                return False
+            with file_lock(self.lock_path):
+                # 잠금 대기 중 다른 프로세스가 내보내기/재구축했을 수 있으므로 지문을 다시 확인
+                fingerprint = self.factory().source_fingerprint()
+                processor = self.factory()
+                if not force and processor.load_processed_data() and not processor.is_stale(fingerprint):
+                    print("📥 RAG 인덱스: 다른 프로세스가 저장한 최신 인덱스 로드")
+                else:
+                    processor = self.factory()
+                    print(f"🔄 RAG 인덱스 재구축: {fingerprint}")
+                    if not processor.build_index(fingerprint, previous=current):
+                        self._last_error = "build_index 실패"
+                        return False
+                    processor.save_processed_data()
+                    self._builds += 1
+        except Exception as e:
+            self._last_error = f"{type(e).__name__}: {e}"
+            logging.warning("RagIndexManager: 인덱스 갱신 실패: %s", e)
+            return False
+        self._swap(processor)
+        self._last_error = None
+        print(f"✅ RAG 인덱스 교체 완료: {len(processor.documents)}개 문서")
+        return True
+
+    def active(self) -> Optional[Any]:
+        """현재 활성 인덱스 (한 번도 시도하지 않았으면 동기 로드/구축, 이후 실패 복구는 감시 스레드 몫)"""
+        processor = self._active
+        if processor is None and not self._attempted:
+            self.load_or_build()
+            processor = self._active
+        return processor
+
+    def start(self) -> None:
+        """백그라운드 감시 스레드 시작 (중복 호출 무시)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="rag-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:  # 감시 스레드는 죽지 않도록
+                logging.warning("RagIndexManager: 감시 중 오류: %s", e)
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def status(self) -> Dict[str, Any]:
+        processor = self._active
+        return {
+            "documents": len(processor.documents) if processor is not None else 0,
+            "fingerprint": processor.fingerprint if processor is not None else None,
+            "built_at": getattr(processor, "built_at", None),
+            "loaded_at": self._loaded_at,
+            "last_checked": self._last_checked,
+            "builds": self._builds,
+            "watching": bool(self._thread is not None and self._thread.is_alive()),
+            "poll_interval": self.poll_interval,
+            "fresh_interval": self.fresh_interval,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,137 @@
+# services/vector_index.py
+# RAG 벡터 검색 인덱스 (api/chat_4.py ExcelRAGProcessor, rag_index_bench.py)
+#  - ExactIndex: 행 정규화된 float32 행렬 × 질의 벡터 1회 + argpartition (전체 정렬 없음). 작은 코퍼스용
+#  - IVFIndex  : 구면 k-means 로 n_lists 개 셀로 나눈 역색인(순수 NumPy). 질의와 가까운 n_probe 개 셀만 스캔
+#    기본 n_probe = n_lists / IVF_PROBE_DIVISOR. 목표: recall@50 ≥ RECALL_TARGET (exact 상위 50 대비,
+#    rag_index_bench.py 가 기본 n_probe 에서 확인하고 미달이면 실패)
+#  - build_vector_index(kind="auto"): 행 수가 ann_min_rows 미만이면 exact, 이상이면 ivf
+#  - 공통 인터페이스: search(q, k) → (ids, cosine), scores(q, ids=None) → cosine (ids 행만 또는 전체)
+
+from __future__ import annotations
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+INDEX_EXACT = "exact"
+INDEX_IVF = "ivf"
+# 기본 스캔 셀 비율 (n_lists 의 1/4). 1/16 은 2만~5만 행에서 recall@50 0.78~0.85 (상위 50 중 1/5 누락)
+IVF_PROBE_DIVISOR = 4
+RECALL_TARGET = 0.95
+
+
+def normalize_rows(x) -> np.ndarray:
+    """float32 로 변환 + 행별 L2 정규화 (영벡터는 그대로) → 내적 = 코사인 유사도"""
+    x = np.atleast_2d(np.asarray(x, dtype=np.float32))
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k 개 위치 (내림차순). argpartition 으로 O(n) 선택 후 k 개만 정렬"""
+    n = scores.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class ExactIndex:
+    """전수 비교 (정확)"""
+    kind = INDEX_EXACT
+    exact = True
+
+    def __init__(self, vectors):
+        self.matrix = normalize_rows(vectors)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def scores(self, query, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        q = normalize_rows(query)[0]
+        return (self.matrix if ids is None else self.matrix[ids]) @ q
+
+    def search(self, query, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        s = self.scores(query)
+        ids = top_k(s, k)
+        return ids, s[ids]
+
+
+class IVFIndex:
+    """역색인(IVF) 근사 검색. 셀 수 기본 √n, 스캔 셀 수 기본 n_lists/IVF_PROBE_DIVISOR"""
+    kind = INDEX_IVF
+    exact = False
+
+    def __init__(self, vectors, n_lists: Optional[int] = None, n_probe: Optional[int] = None,
+                 iters: int = 10, train_per_list: int = 64, seed: int = 0):
+        self.matrix = normalize_rows(vectors)
+        n = self.matrix.shape[0]
+        self.n_lists = max(1, min(n, int(n_lists or round(np.sqrt(n)))))
+        self.n_probe = max(1, min(self.n_lists, int(n_probe or max(1, self.n_lists // IVF_PROBE_DIVISOR))))
+        rng = np.random.default_rng(seed)
+
+        # 구면 k-means: 표본으로 중심 학습 → 전체 행을 가장 가까운 중심에 배정
+        sample = self.matrix[rng.choice(n, size=min(n, self.n_lists * train_per_list), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=self.n_lists, replace=False)].copy()
+        for _ in range(iters):
+            assign = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=self.n_lists) == 0
+            # 빈 셀은 임의 표본으로 다시 시작
+            sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+
+        assign = self._assign(self.matrix, centroids)
+        # 셀별로 연속 배치 → 스캔 시 연속 메모리 읽기
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=self.n_lists))])
+        self.sorted_matrix = self.matrix[self.order]
+
+    @staticmethod
+    def _assign(x: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        out = np.empty(x.shape[0], dtype=np.int64)
+        for start in range(0, x.shape[0], chunk):
+            out[start:start + chunk] = np.argmax(x[start:start + chunk] @ centroids.T, axis=1)
+        return out
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def scores(self, query, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        q = normalize_rows(query)[0]
+        return (self.matrix if ids is None else self.matrix[ids]) @ q
+
+    def search(self, query, k: int, n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        q = normalize_rows(query)[0]
+        n_probe = min(self.n_lists, int(n_probe or self.n_probe))
+        cells = top_k(self.centroids @ q, n_probe)
+        ranges = [(self.offsets[c], self.offsets[c + 1]) for c in cells]
+        if not ranges:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        # 셀별 연속 구간을 슬라이스(뷰)로 바로 곱함 → 행 모음 복사(fancy indexing) 없음
+        rows = np.concatenate([np.arange(a, b) for a, b in ranges])
+        s = np.concatenate([self.sorted_matrix[a:b] @ q for a, b in ranges])
+        best = top_k(s, k)
+        return self.order[rows[best]], s[best]
+
+
+def build_vector_index(vectors, kind: Optional[str] = None, ann_min_rows: Optional[int] = None):
+    """
+    kind: "auto" | "exact" | "ivf" (기본 ZZIRIT_RAG_VECTOR_INDEX, 없으면 auto).
+    auto 는 행 수가 ann_min_rows(기본 ZZIRIT_RAG_ANN_MIN_ROWS=20000) 미만이면 exact
+    """
+    kind = (kind or os.environ.get("ZZIRIT_RAG_VECTOR_INDEX", "auto")).lower()
+    if ann_min_rows is None:
+        ann_min_rows = int(os.environ.get("ZZIRIT_RAG_ANN_MIN_ROWS", 20000))
+    n = np.asarray(vectors).shape[0]
+    if kind == INDEX_IVF or (kind == "auto" and n >= ann_min_rows):
+        return IVFIndex(vectors)
+    return ExactIndex(vectors)
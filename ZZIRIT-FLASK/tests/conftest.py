@@ -0,0 +1,26 @@
+# tests/conftest.py
+# ZZIRIT-FLASK 루트를 import 경로에 추가 (services.*, api.* 를 앱과 같은 방식으로 import)
+#  - ai54: 파일명에 하이픈이 있는 ai-5-4.py 를 모듈로 로드
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def ai54(tmp_path_factory):
+    # 모듈 import 시 ML_model 디렉토리를 만들므로 임시 작업 디렉토리에서 로드
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("ai54"))
+    try:
+        spec = importlib.util.spec_from_file_location("ai_5_4", os.path.join(ROOT, "ai-5-4.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
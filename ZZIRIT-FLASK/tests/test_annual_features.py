@@ -0,0 +1,122 @@
+# tests/test_annual_features.py
+# ai-5-4.py load_annual_category_data 벡터화 rolling/shift/future_30d_used ↔ 기존 그룹별 계산 동등성
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def reference_features(m, data_root, years):
+    """벡터화 이전 구현: 그룹별 transform(lambda) + 그룹별 슬라이스 합 라벨"""
+    frames = []
+    for yr in years:
+        for p in sorted(os.listdir(os.path.join(data_root, str(yr)))):
+            df = pd.read_csv(os.path.join(data_root, str(yr), p))
+            df["year"] = yr
+            frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    df["date"] = pd.to_datetime(df["date"])
+    df.sort_values(["part_id", "date"], inplace=True)
+    df["category"] = df["category"].map(m._norm_category)
+    df["size"] = df["size"].map(m._norm_size)
+    df["manufacturer"] = df["manufacturer"].map(m._norm_manufacturer)
+
+    df["dow"] = df["date"].dt.dayofweek
+    df["month"] = df["date"].dt.month
+    df["rolling7_used"] = df.groupby("part_id")["used_actual"].transform(lambda s: s.rolling(7, 1).mean())
+    df["rolling30_used"] = df.groupby("part_id")["used_actual"].transform(lambda s: s.rolling(30, 1).mean())
+    for lag in [1, 7, 30]:
+        df[f"lag{lag}_used"] = df.groupby("part_id")["used_actual"].shift(lag).fillna(0)
+    df["roll7_std_used"] = df.groupby("part_id")["used_actual"].transform(lambda s: s.rolling(7, 1).std().fillna(0))
+    df["roll30_std_used"] = df.groupby("part_id")["used_actual"].transform(lambda s: s.rolling(30, 1).std().fillna(0))
+
+    eps = 1e-5
+    df["days_to_zero_est"] = df["closing_stock"] / (df["rolling7_used"] + eps)
+    df["risk_6m"] = (df["days_to_zero_est"] <= 183).astype(int)
+    df["risk_12m"] = (df["days_to_zero_est"] <= 365).astype(int)
+
+    fut = []
+    for _, g in df.groupby("part_id"):
+        u = g["used_actual"].to_numpy()
+        fut.extend([u[i + 1:i + 31].sum() for i in range(len(u))])
+    df["future_30d_used"] = fut
+
+    df = df.sort_values(["part_id", "date"]).copy()
+    df["_row"] = df.groupby("part_id").cumcount()
+    df["_n"] = df.groupby("part_id")["part_id"].transform("size")
+    return df[df["_row"] < df["_n"] - 30].drop(columns=["_row", "_n"]).reset_index(drop=True)
+
+
+def write_unsorted_fixture(root, seed, float_usage=False, with_nan=False):
+    """
+    일부러 정렬되지 않은 입력: 파일 안의 행 순서를 섞고, 한 파일에 여러 파트를 섞어 넣고,
+    파트 길이를 다르게 (31행 이하로 라벨이 전부 잘리는 파트 포함)
+    """
+    rng = np.random.default_rng(seed)
+    for yr in (2023, 2024):
+        os.makedirs(os.path.join(root, str(yr)))
+        rows = []
+        for p, n in enumerate([45, 80, 31, 12, 66]):
+            used = rng.integers(0, 50, n).astype(float)
+            if float_usage:
+                used += rng.random(n)
+            if with_nan:
+                used[rng.random(n) < 0.05] = np.nan
+            rows.append(pd.DataFrame({
+                "part_id": f"P{4 - p:03d}",
+                "date": pd.date_range(f"{yr}-01-01", periods=n).strftime("%Y-%m-%d"),
+                "category": ["Capacitor", None, "IC"][p % 3],
+                "size": ["402", "0603/1608", "1206"][p % 3],
+                "manufacturer": ["  SAMSUNG ", "MURATA"][p % 2],
+                "used_actual": used,
+                "closing_stock": rng.integers(0, 5000, n),
+            }))
+        df = pd.concat(rows, ignore_index=True)
+        df = df.iloc[rng.permutation(len(df))]
+        for i, idx in enumerate(np.array_split(np.arange(len(df)), 3)):
+            df.iloc[idx].to_csv(os.path.join(root, str(yr), f"Part_{i}.csv"), index=False)
+
+
+@pytest.mark.parametrize("float_usage,with_nan", [(False, False), (True, False), (True, True)])
+def test_features_match_reference_on_unsorted_input(ai54, tmp_path, float_usage, with_nan):
+    write_unsorted_fixture(str(tmp_path), seed=3 + float_usage + with_nan, float_usage=float_usage, with_nan=with_nan)
+    got = ai54.load_annual_category_data(str(tmp_path), years=[2023, 2024])
+    want = reference_features(ai54, str(tmp_path), [2023, 2024])
+
+    assert list(got.columns) == list(want.columns)
+    assert len(got) > 0
+    for col in want.columns:
+        if col == "future_30d_used" and float_usage:
+            # 누적합 차이와 슬라이스 합은 부동소수 반올림만 다름
+            np.testing.assert_allclose(got[col], want[col], rtol=0, atol=1e-9)
+            assert got[col].isna().equals(want[col].isna())
+        else:
+            pd.testing.assert_series_equal(got[col], want[col], check_dtype=False)
+
+
+def test_result_is_sorted_by_part_and_date(ai54, tmp_path):
+    write_unsorted_fixture(str(tmp_path), seed=11)
+    got = ai54.load_annual_category_data(str(tmp_path), years=[2023, 2024])
+    ai54._check_sorted_by_part_date(got)
+    assert got.equals(got.sort_values(["part_id", "date"]).reset_index(drop=True))
+
+
+def test_sort_check_rejects_interleaved_parts(ai54):
+    df = pd.DataFrame({"part_id": ["A", "B", "A"], "date": pd.to_datetime(["2024-01-01"] * 3)})
+    with pytest.raises(ValueError):
+        ai54._check_sorted_by_part_date(df)
+    df = pd.DataFrame({"part_id": ["A", "A"], "date": pd.to_datetime(["2024-01-02", "2024-01-01"])})
+    with pytest.raises(ValueError):
+        ai54._check_sorted_by_part_date(df)
+
+
+def test_misordered_feature_cache_is_recomputed(ai54, tmp_path):
+    data_root, cache_dir = str(tmp_path / "data"), str(tmp_path / "cache")
+    write_unsorted_fixture(data_root, seed=5)
+    want = ai54.load_features_cached(data_root, years=[2023, 2024], cache_dir=cache_dir)
+    (path,) = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir)]
+    want.iloc[::-1].to_parquet(path, index=False)
+    got = ai54.load_features_cached(data_root, years=[2023, 2024], cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(got, want)
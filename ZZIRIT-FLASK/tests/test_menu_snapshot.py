@@ -0,0 +1,77 @@
+# tests/test_menu_snapshot.py
+# services/menu_snapshot.py MenuSnapshotStore: 콜드 스타트에 동시 요청이 같은 갱신을 기다릴 때 빈 스냅샷을 받지 않음
+
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from services.menu_snapshot import MenuSnapshotStore
+
+
+class FakeCrawler:
+    """DataCrawler 처럼 전용 이벤트 루프 스레드에서 코루틴 실행"""
+
+    def __init__(self, delay=0.05, callback_delay=0.1):
+        self.delay = delay
+        self.callback_delay = callback_delay
+        self.calls = Counter()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def get_menu_data(self, menu_id):
+        self.calls[menu_id] += 1
+        await asyncio.sleep(self.delay)
+        return {"menu": menu_id, "data_source": "api"}
+
+    def submit(self, coro):
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        # 먼저 등록된 done 콜백이 느린 상황: 저장소의 콜백은 대기 스레드가 깨어난 뒤에 실행됨
+        fut.add_done_callback(lambda f: time.sleep(self.callback_delay))
+        return fut
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1)
+
+
+@pytest.fixture
+def crawler():
+    c = FakeCrawler()
+    yield c
+    c.close()
+
+
+def test_cold_start_waiters_get_fetched_data(crawler):
+    store = MenuSnapshotStore(crawler)
+    result = store.get_many(["menu1"], timeout=5)
+    assert result["menu1"]["data"] == {"menu": "menu1", "data_source": "api"}
+    assert result["menu1"]["stale"] is False
+
+
+def test_cold_start_concurrent_requests_share_one_fetch(crawler):
+    store = MenuSnapshotStore(crawler)
+    menus = ["menu1", "mes", "menu4"]
+    n_threads = 8
+    barrier = threading.Barrier(n_threads)
+    results = [None] * n_threads
+
+    def worker(i):
+        barrier.wait()
+        results[i] = store.get_many(menus, timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    for r in results:
+        assert r is not None
+        for menu_id in menus:
+            assert r[menu_id]["data"] is not None, menu_id
+        assert r["menu4"]["data"]["menu"] == "inventory"
+    assert crawler.calls == Counter({"menu1": 1, "mes": 1, "inventory": 1})
@@ -0,0 +1,157 @@
+# tests/test_model_bundle.py
+# services/model_bundle.py 번들 경로 결정 (api_server 레지스트리 ↔ ai-5-4.py 공용 규칙), ModelRegistry 롤백,
+# api/api_server.py 모델 관리 엔드포인트
+
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from services.model_bundle import (MMAP_POINTER, ModelRegistry, load_bundle_file, resolve_bundle_path,
+                                   save_bundle_mmap, save_bundle_pkl)
+
+
+def make_bundle(version):
+    return {
+        "feature_columns": ["f0", "f1"],
+        "models": {("CAP", "0402", "SAMSUNG"): {"weights": np.arange(4, dtype=np.float64)}},
+        "meta": {"version": version},
+    }
+
+
+def write_pkl(model_dir, version, mtime):
+    path = os.path.join(model_dir, "model_bundle.pkl")
+    joblib.dump(make_bundle(version), path)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def write_mmap(model_dir, version, mtime):
+    out_dir = os.path.join(model_dir, "model_bundle_mmap")
+    save_bundle_mmap(make_bundle(version), out_dir)
+    pointer = os.path.join(out_dir, MMAP_POINTER)
+    os.utime(pointer, (mtime, mtime))
+    return out_dir
+
+
+def test_resolve_without_bundles_returns_pkl_path(tmp_path):
+    assert resolve_bundle_path(str(tmp_path)) == os.path.join(str(tmp_path), "model_bundle.pkl")
+
+
+def test_resolve_single_format(tmp_path):
+    model_dir = str(tmp_path)
+    mmap_dir = write_mmap(model_dir, "m1", 1_000_000)
+    assert resolve_bundle_path(model_dir) == mmap_dir
+
+
+@pytest.mark.parametrize("pkl_newer", [True, False])
+def test_resolve_both_formats_picks_latest(tmp_path, pkl_newer):
+    model_dir = str(tmp_path)
+    pkl = write_pkl(model_dir, "p1", 2_000_000 if pkl_newer else 1_000_000)
+    mmap_dir = write_mmap(model_dir, "m1", 1_000_000 if pkl_newer else 2_000_000)
+    expected = pkl if pkl_newer else mmap_dir
+    assert resolve_bundle_path(model_dir) == expected
+    assert load_bundle_file(resolve_bundle_path(model_dir))["meta"]["version"] == ("p1" if pkl_newer else "m1")
+
+
+@pytest.mark.parametrize("pkl_newer", [True, False])
+def test_trainer_uses_same_bundle_as_server(ai54, tmp_path, monkeypatch, pkl_newer):
+    model_dir = str(tmp_path)
+    write_pkl(model_dir, "p1", 2_000_000 if pkl_newer else 1_000_000)
+    write_mmap(model_dir, "m1", 1_000_000 if pkl_newer else 2_000_000)
+    monkeypatch.setattr(ai54, "MODEL_DIR", model_dir)
+    assert ai54._bundle_path() == resolve_bundle_path(model_dir)
+
+    # 증분 학습도 같은 번들에서 시작 (meta.groups 가 없으므로 재사용 그룹은 없음, 로드 대상만 확인)
+    loaded = []
+    monkeypatch.setattr(ai54, "load_bundle_file", lambda path: loaded.append(path) or load_bundle_file(path))
+    ai54._load_previous_groups(model_dir, ["f0", "f1"])
+    assert loaded == [resolve_bundle_path(model_dir)]
+
+
+# ── ModelRegistry 롤백: 다시 저장하지 않고 보관된 직전 파일로 교체, 디스크에 유지
+
+def _no_dump(*args, **kwargs):
+    raise AssertionError("롤백 중 번들을 다시 저장하면 안 됨")
+
+
+def test_rollback_mmap_switches_pointer(tmp_path, monkeypatch):
+    model_dir = str(tmp_path)
+    write_mmap(model_dir, "m1", 1_000_000)
+    registry = ModelRegistry(lambda: resolve_bundle_path(model_dir))
+    assert registry.refresh()
+    write_mmap(model_dir, "m2", 2_000_000)
+    assert registry.refresh()
+
+    monkeypatch.setattr(joblib, "dump", _no_dump)
+    assert registry.rollback()
+    assert registry.status()["active_version"] == "m1"
+    assert not registry.refresh()
+    # 재시작(새 레지스트리)도 롤백된 버전을 로드
+    restarted = ModelRegistry(lambda: resolve_bundle_path(model_dir))
+    assert restarted.get()["meta"]["version"] == "m1"
+
+
+def test_rollback_pkl_keeps_newer_artifact(tmp_path, monkeypatch):
+    model_dir = str(tmp_path)
+    path = os.path.join(model_dir, "model_bundle.pkl")
+    save_bundle_pkl(make_bundle("p1"), path)
+    os.utime(path, (1_000_000, 1_000_000))
+    write_mmap(model_dir, "m0", 500_000)  # 더 오래된 mmap 내보내기
+    registry = ModelRegistry(lambda: resolve_bundle_path(model_dir))
+    assert registry.refresh()
+    save_bundle_pkl(make_bundle("p2"), path)
+    os.utime(path, (2_000_000, 2_000_000))
+    assert registry.refresh()
+    assert registry.status()["active_version"] == "p2"
+
+    monkeypatch.setattr(joblib, "dump", _no_dump)
+    assert registry.rollback()
+    assert registry.status()["active_version"] == "p1"
+    assert not registry.refresh()
+    assert resolve_bundle_path(model_dir) == path
+    assert load_bundle_file(path)["meta"]["version"] == "p1"
+    assert load_bundle_file(path + ".rolled_back")["meta"]["version"] == "p2"
+
+
+def test_rollback_without_previous_file_is_refused(tmp_path):
+    model_dir = str(tmp_path)
+    path = write_pkl(model_dir, "p1", 1_000_000)
+    registry = ModelRegistry(lambda: resolve_bundle_path(model_dir))
+    assert registry.refresh()
+    write_pkl(model_dir, "p2", 2_000_000)  # .prev 를 남기지 않는 교체
+    assert registry.refresh()
+    assert not registry.rollback()
+    assert registry.status()["active_version"] == "p2"
+    assert registry.status()["last_error"]
+    assert load_bundle_file(path)["meta"]["version"] == "p2"
+
+
+# ── api/api_server.py: import 시 감시 스레드 미시작, reload/rollback 보호
+
+@pytest.fixture
+def api_client():
+    from flask import Flask
+
+    import api.api_server as api_server
+    app = Flask("test")
+    app.register_blueprint(api_server.api_bp, url_prefix="/api")
+    return api_server, app.test_client()
+
+
+def test_import_does_not_start_watcher(api_client):
+    api_server, _ = api_client
+    assert not api_server._REGISTRY.status()["watching"]
+
+
+def test_model_admin_endpoints_require_token(api_client, monkeypatch):
+    api_server, client = api_client
+    monkeypatch.setattr(api_server._REGISTRY, "refresh", lambda: False)
+    monkeypatch.delenv("ZZIRIT_MODEL_ADMIN_TOKEN", raising=False)
+    assert client.post("/api/model/reload").status_code == 403
+    assert client.post("/api/model/rollback").status_code == 403
+    monkeypatch.setenv("ZZIRIT_MODEL_ADMIN_TOKEN", "secret")
+    assert client.post("/api/model/reload").status_code == 401
+    assert client.post("/api/model/reload", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.post("/api/model/reload", headers={"X-Admin-Token": "secret"}).status_code == 200
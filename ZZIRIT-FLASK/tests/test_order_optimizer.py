@@ -0,0 +1,130 @@
+# tests/test_order_optimizer.py
+# services/order_optimizer.py 벡터화 엔진 ↔ 기존 파트별 루프(api/api_server.py _optimize, 벡터화 이전) 동등성
+
+import numpy as np
+import pytest
+
+from api.api_server import PartState, _demand_from_usage30
+from services.order_optimizer import evaluate_order_days, optimize_order_top3, top3_from_costs
+
+HOLD = 0.0005
+PENALTY = 5.0
+
+
+def reference_optimize(state, demand, price, horizon, service_days, hold_rate_per_day, penalty_mult):
+    """벡터화 이전 _optimize 루프 (기준 구현)"""
+    H = min(horizon, len(demand), len(price))
+    if H <= 0:
+        return []
+    outcomes = []
+    for d in range(H):
+        arrival_day = d + state.lead_time_days
+        consumed_before_arrival = float(demand[:min(arrival_day, H)].sum())
+        stock_at_arrival = state.opening_stock - consumed_before_arrival
+        unit_price = float(price[d])
+
+        penalty_cost = max(0.0, -stock_at_arrival) * unit_price * penalty_mult
+
+        window = demand[arrival_day:min(arrival_day + service_days, H)]
+        need_qty = float(window.sum())
+        base_order = max(0.0, need_qty - max(0.0, stock_at_arrival))
+        order_qty = int(max(base_order, state.moq))
+        if state.pack_size > 0:
+            order_qty = int(np.ceil(order_qty / state.pack_size) * state.pack_size)
+
+        purchase_cost = unit_price * order_qty
+        avg_carry = max(0.0, order_qty - float(window.mean() * len(window) if len(window) else 0.0))
+        holding_cost = hold_rate_per_day * unit_price * avg_carry * max(1, len(window))
+        total_cost = purchase_cost + holding_cost + penalty_cost
+        outcomes.append((total_cost, d, order_qty, unit_price, penalty_cost, holding_cost))
+
+    outcomes.sort(key=lambda x: x[0])
+    return [{
+        "day_offset": int(d),
+        "quantity": int(qty),
+        "expected_total_cost": round(float(total), 2),
+        "expected_unit_price": round(float(unit), 4),
+        "stockout_penalty": round(float(pen), 2),
+        "holding_cost": round(float(hold), 2),
+    } for (total, d, qty, unit, pen, hold) in outcomes[:3]]
+
+
+def _random_case(rng, integer_demand):
+    H = int(rng.integers(1, 91))
+    if integer_demand:
+        # 정수 수요/고정 가격: 동률 후보가 많아 빠른 날짜 우선 규칙까지 검증
+        demand = rng.integers(0, 20, size=H).astype(float)
+        price = np.full(H, float(rng.integers(1, 5)))
+    else:
+        demand = rng.uniform(0, 50, size=H) * (rng.random(H) < 0.8)
+        price = rng.uniform(1, 300) * (1.0 + rng.normal(0, 0.002, size=H))
+    state = PartState(part_id=1, opening_stock=float(rng.integers(-200, 800)),
+                      lead_time_days=int(rng.integers(0, 40)),
+                      pack_size=int(rng.choice([0, 1, 10, 100])), moq=int(rng.choice([0, 0, 50, 500])))
+    return state, demand, price, H, int(rng.integers(1, 30))
+
+
+def _assert_same(got, want):
+    """발주일 순서/수량은 정확히 같아야 함. 비용은 계산 순서 차이로 round(·, 2) 경계에서 1센트까지 허용"""
+    assert [(g["day_offset"], g["quantity"]) for g in got] == [(w["day_offset"], w["quantity"]) for w in want]
+    for g, w in zip(got, want):
+        for key in ("expected_total_cost", "expected_unit_price", "stockout_penalty", "holding_cost"):
+            assert g[key] == pytest.approx(w[key], rel=1e-9, abs=0.011)
+
+
+@pytest.mark.parametrize("integer_demand", [True, False])
+def test_optimize_order_top3_matches_reference_loop(integer_demand):
+    rng = np.random.default_rng(20240 + integer_demand)
+    for _ in range(500):
+        state, demand, price, H, service_days = _random_case(rng, integer_demand)
+        want = reference_optimize(state, demand, price, H, service_days, HOLD, PENALTY)
+        got = optimize_order_top3(state, demand, price, horizon=H, service_days=service_days,
+                                  hold_rate_per_day=HOLD, penalty_mult=PENALTY)
+        _assert_same(got, want)
+
+
+def test_ties_prefer_earlier_day():
+    # 수요 0 + 고정 가격: 모든 후보 비용이 같으므로 가장 빠른 3일
+    state = PartState(part_id=1, opening_stock=100, lead_time_days=3, pack_size=0, moq=0)
+    demand, price = np.zeros(30), np.full(30, 10.0)
+    got = optimize_order_top3(state, demand, price, horizon=30, service_days=14,
+                              hold_rate_per_day=HOLD, penalty_mult=PENALTY)
+    assert [r["day_offset"] for r in got] == [0, 1, 2]
+    _assert_same(got, reference_optimize(state, demand, price, 30, 14, HOLD, PENALTY))
+
+
+def test_zero_demand_with_moq_and_pack():
+    state = PartState(part_id=1, opening_stock=0, lead_time_days=0, pack_size=100, moq=150)
+    demand, price = np.zeros(10), np.linspace(5.0, 1.0, 10)
+    got = optimize_order_top3(state, demand, price, horizon=10, service_days=5,
+                              hold_rate_per_day=HOLD, penalty_mult=PENALTY)
+    _assert_same(got, reference_optimize(state, demand, price, 10, 5, HOLD, PENALTY))
+    assert all(r["quantity"] == 200 for r in got)
+
+
+def test_empty_horizon():
+    state = PartState(part_id=1, opening_stock=0, lead_time_days=0, pack_size=0, moq=0)
+    assert optimize_order_top3(state, np.zeros(0), np.zeros(0), horizon=30, service_days=14,
+                               hold_rate_per_day=HOLD, penalty_mult=PENALTY) == []
+
+
+def test_batch_rows_match_single_part_calls():
+    rng = np.random.default_rng(7)
+    R, H = 25, 60
+    demand = rng.uniform(0, 30, size=(R, H))
+    price = rng.uniform(1, 100, size=(R, 1)) * (1.0 + rng.normal(0, 0.002, size=(1, H)))
+    stock = rng.integers(-100, 500, size=R).astype(float)
+    lead = rng.integers(0, 20, size=R)
+    costs = evaluate_order_days(stock, lead, demand, price, horizon=H, service_days=14, pack_size=10, moq=0,
+                                hold_rate_per_day=HOLD, penalty_mult=PENALTY)
+    for r in range(R):
+        state = PartState(part_id=r, opening_stock=stock[r], lead_time_days=lead[r], pack_size=10, moq=0)
+        want = reference_optimize(state, demand[r], price[r], H, 14, HOLD, PENALTY)
+        _assert_same(top3_from_costs(costs, row=r), want)
+
+
+def test_demand_from_usage30_is_daily_rate_over_horizon():
+    # usage30 은 30일 수요 → 일 수요 usage30/30 을 horizon 만큼 반복 (horizon 으로 나누지 않음)
+    np.testing.assert_array_equal(_demand_from_usage30(60.0, 90), np.full((1, 90), 2.0))
+    np.testing.assert_array_equal(_demand_from_usage30([30.0, -5.0], 3), [[1.0, 1.0, 1.0], [0.0, 0.0, 0.0]])
+    assert _demand_from_usage30(60.0, 180).sum() == pytest.approx(360.0)
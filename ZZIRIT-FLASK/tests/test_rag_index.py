@@ -0,0 +1,108 @@
+# tests/test_rag_index.py
+# services/rag_index.py RagIndexManager: 요청 경로(ensure_fresh)는 지문 확인/재구축을 기다리지 않음
+
+import threading
+import time
+
+from services.rag_index import RagIndexManager
+
+
+class FakeSource:
+    """원본 상태 + 지문 확인/재구축을 붙잡아 둘 수 있는 이벤트"""
+
+    def __init__(self):
+        self.fingerprint = "v1"
+        self.release = threading.Event()
+        self.release.set()
+        self.checks = 0
+
+
+class FakeProcessor:
+    def __init__(self, source):
+        self.source = source
+        self.fingerprint = None
+        self.documents = []
+
+    def source_fingerprint(self):
+        self.source.checks += 1
+        self.source.release.wait(5)  # CHECKSUM TABLE / 워크북 해시가 느린 상황
+        return self.source.fingerprint
+
+    def is_stale(self, fingerprint):
+        return self.fingerprint != fingerprint
+
+    def build_index(self, fingerprint, previous=None):
+        self.source.release.wait(5)  # 내보내기/재임베딩이 느린 상황
+        self.fingerprint = fingerprint
+        self.documents = [fingerprint]
+        return True
+
+    def save_processed_data(self):
+        return True
+
+    def load_processed_data(self):
+        return False
+
+
+def _manager(source, fresh_interval=0.01):
+    return RagIndexManager(lambda: FakeProcessor(source), poll_interval=3600, fresh_interval=fresh_interval)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_ensure_fresh_does_not_block_on_stale_source():
+    source = FakeSource()
+    manager = _manager(source)
+    assert manager.load_or_build()
+    old = manager.active()
+    assert old.fingerprint == "v1"
+
+    source.fingerprint = "v2"
+    source.release.clear()
+    time.sleep(0.02)
+    t = time.perf_counter()
+    assert manager.ensure_fresh()
+    elapsed = time.perf_counter() - t
+    assert elapsed < 0.2
+    # 재구축이 끝나기 전까지 요청은 기존 인덱스로 응답
+    assert manager.active() is old
+
+    source.release.set()
+    assert _wait_for(lambda: manager.active().fingerprint == "v2")
+
+
+def test_ensure_fresh_wakes_watcher_instead_of_checking_inline():
+    source = FakeSource()
+    manager = _manager(source)
+    assert manager.load_or_build()
+    manager.start()
+    try:
+        assert _wait_for(lambda: manager.status()["last_checked"] is not None)
+        source.fingerprint = "v2"
+        source.release.clear()
+        time.sleep(0.02)
+        checks = source.checks
+        t = time.perf_counter()
+        assert manager.ensure_fresh()
+        assert time.perf_counter() - t < 0.2
+        assert manager.active().fingerprint == "v1"
+        source.release.set()
+        assert _wait_for(lambda: manager.active().fingerprint == "v2")
+        assert source.checks > checks
+    finally:
+        manager.stop()
+
+
+def test_ensure_fresh_is_throttled():
+    source = FakeSource()
+    manager = _manager(source, fresh_interval=3600)
+    assert manager.load_or_build()
+    manager._checked_at = time.monotonic()
+    assert not manager.ensure_fresh()